@@ -2,20 +2,27 @@
 # created: 2021-06-23
 # creator: liguopeng@liguopeng.net
 import logging
+import random
+import re
+import time
 import traceback
 from functools import wraps
 
 import werkzeug
-from quart import jsonify, Quart, json, Blueprint
-from quart import has_request_context, request
+from quart import Quart, json, Blueprint
+from quart import current_app, has_app_context, has_request_context, request
+from quart.json.provider import DefaultJSONProvider
 from quart.logging import default_handler
 from werkzeug.exceptions import NotFound, HTTPException
 
 from gcommon.aio import gasync
 from gcommon.error import GErrors
 from gcommon.error.gerror import GExcept, GError
+from gcommon.logger import glogger
+from gcommon.logger.log_util import Truncated
+from gcommon.utils import gjsonobj, gtrace
 from gcommon.utils.gglobal import Global
-from gcommon.utils.gjsonobj import JsonObject
+from gcommon.utils.gjsonobj import JSONable, JsonObject, JsonTable
 from gcommon.web.web_utils import WebConst
 
 logger = logging.getLogger("http")
@@ -23,8 +30,39 @@ logger = logging.getLogger("http")
 
 PASSTHROUGH_HTTP_ERROR = True
 
+# access log 直接输出请求和响应的原始内容（不解析 json），内容超过 ACCESS_LOG_BODY_LIMIT 时截断
+ACCESS_LOG_RAW_BODY = False
+ACCESS_LOG_BODY_LIMIT = 4096
+
+
+def json_default(obj):
+    """JSONable、JsonTable 之外的类型与 quart 的 jsonify 相同（日期为 HTTP 日期格式，Decimal/UUID 为字符串）。
+
+    用作 gjsonobj.dumpb/dumpb_message 等的 default 参数，没有 app context 时使用 quart 缺省的转换。
+    """
+    if isinstance(obj, (JSONable, JsonTable)):
+        return obj.to_json()
+
+    if has_app_context():
+        return current_app.json.default(obj)
+
+    return DefaultJSONProvider.default(obj)
+
+
+def jsonify(data):
+    """构造 json 响应。
+
+    使用 gjsonobj 的 json 后端直接生成 utf-8 bytes，不转义非 ascii 字符（quart 的 jsonify 缺省转义）。
+    """
+    body = gjsonobj.dumpb(data, sort_keys=True, default=json_default)
+    return current_app.response_class(body, mimetype=WebConst.MIME_TYPE_JSON)
+
 
 def web_response(result, *args, **kws):
+    """构造标准响应 {code, message, data}。
+
+    data 可以是 JsonObject、JSONable、JsonTable（大量记录）等。
+    """
     r = JsonObject()
 
     r.code = result.code
@@ -58,6 +96,79 @@ def web_response_ok(*args, **kws):
     return web_response(GErrors.ok, *args, **kws)
 
 
+def web_response_stream(items, result=None, ndjson=False, batch_size=100, **kws):
+    """流式响应（chunked），用于返回大量记录的导出类接口。
+
+    items 可以是异步迭代器（async generator）或者普通迭代器。
+    - 缺省输出标准响应 {code, message, ..., data: [item, ...]}，kws 为额外的顶层字段；
+    - ndjson=True 时每行输出一个 item（不包含 code/message）。
+
+    每 batch_size 个 item 输出一个数据块。响应开始后无法再修改状态码，
+    迭代过程中出现异常只能记录日志并中断连接。
+    """
+    result = result or GErrors.ok
+
+    async def _iter_items():
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                yield item
+        else:
+            for item in items:
+                yield item
+
+    async def _generate_json():
+        head = JsonObject()
+        head.code = result.code
+        head.message = result.desc
+        for key, value in kws.items():
+            head[key] = value
+
+        chunk = [gjsonobj.dumpb(head, default=json_default)[:-1] + b',"data":[']
+        count = 0
+        async for item in _iter_items():
+            if count:
+                chunk.append(b",")
+
+            chunk.append(gjsonobj.dumpb_message(item, default=json_default))
+            count += 1
+
+            if count % batch_size == 0:
+                yield b"".join(chunk)
+                chunk = []
+
+        chunk.append(b"]}")
+        yield b"".join(chunk)
+
+    async def _generate_ndjson():
+        chunk = []
+        async for item in _iter_items():
+            chunk.append(gjsonobj.dumpb_message(item, default=json_default))
+            chunk.append(b"\n")
+
+            if len(chunk) >= batch_size * 2:
+                yield b"".join(chunk)
+                chunk = []
+
+        if chunk:
+            yield b"".join(chunk)
+
+    async def _generate():
+        try:
+            async for chunk in (_generate_ndjson() if ndjson else _generate_json()):
+                yield chunk
+        except Exception:
+            logger.error("streaming response error: %s", traceback.format_exc())
+            raise
+
+    mimetype = WebConst.MIME_TYPE_NDJSON if ndjson else WebConst.MIME_TYPE_JSON
+    response = current_app.response_class(_generate(), mimetype=mimetype)
+
+    # 导出可能持续较长时间，不使用 RESPONSE_TIMEOUT；access log 不读取响应内容
+    response.timeout = None
+    setattr(response, WebConst.GCOMMON_STREAMING_RESPONSE, True)
+    return response
+
+
 def web_response_paginator(paginator, *args, **kws):
     return web_response(GErrors.ok, *args, paginator=paginator, **kws)
 
@@ -130,26 +241,75 @@ async def handle_bad_request(e):
     return resp
 
 
+async def mark_request_start():
+    """记录请求开始的时间，用于 access log 中的 latency"""
+    setattr(request, WebConst.GCOMMON_REQUEST_START_TIME, time.perf_counter())
+
+
+def _access_extra(response):
+    """access log 的结构化字段（json 格式日志中输出）"""
+    start_time = getattr(request, WebConst.GCOMMON_REQUEST_START_TIME, None)
+    latency = round((time.perf_counter() - start_time) * 1000, 3) if start_time else None
+
+    return glogger.access_extra(request.method, request.path, response.status_code, latency,
+                                remote=request.remote_addr)
+
+
 async def log_request_and_response(response):
     """web 服务器的 access log"""
     if type(request.routing_exception) == NotFound:
-        logger.access("404 - request (from %s): %s %s",
-                      request.remote_addr, request.method, request.full_path)
+        logger.log(glogger.ACCESS, "404 - request (from %s): %s %s",
+                   request.remote_addr, request.method, request.full_path,
+                   extra=_access_extra(response))
         return response
 
+    # 只对成功的请求采样，错误响应总是输出
+    if response.status_code < 400:
+        sample_rate = FlaskLogManager.access_log_sample_rate(request.path)
+        if sample_rate < 1.0 and random.random() >= sample_rate:
+            return response
+
+    if ACCESS_LOG_RAW_BODY:
+        request_body, response_body = await _read_raw_bodies(response)
+    else:
+        request_body, response_body = await _read_bodies(response)
+
+    request_body = request_body or None
+    logger.log(glogger.ACCESS, "request (from %s): %s %s - %s, response: %s",
+               request.remote_addr, request.method, request.full_path,
+               request_body, response_body, extra=_access_extra(response))
+
+    return response
+
+
+def _response_body_placeholder(response):
+    """不输出响应内容时，日志中使用的占位符"""
+    if not getattr(request, WebConst.GCOMMON_DETAIL_RESPONSE_LOG, True):
+        return "..."
+
+    if getattr(response, WebConst.GCOMMON_STREAMING_RESPONSE, False):
+        # 流式响应：读取内容会把整个响应缓存在内存中
+        return "<streaming>"
+
+    if FlaskLogManager.should_ignore_response_body(request.path):
+        return "..."
+
+    return None
+
+
+async def _read_bodies(response):
+    """解析 json 请求和响应，重新序列化后输出"""
     if request.is_json and request.content_length:
         request_body = await request.get_json()
         request_body = json.dumps(request_body, ensure_ascii=False)
     else:
         request_body = await request.get_data()
 
-    detail_response_log = getattr(request, WebConst.GCOMMON_DETAIL_RESPONSE_LOG, True)
+    response_body = _response_body_placeholder(response)
+    if response_body is not None:
+        return request_body, response_body
 
-    if not detail_response_log:
-        response_body = "..."
-    elif FlaskLogManager.should_ignore_response_body(request.path):
-        response_body = "..."
-    elif response.is_json:
+    if response.is_json:
         # response_body = await response.json
         response_body = await gasync.maybe_async(response.get_json)
         response_body = json.dumps(response_body, ensure_ascii=False)
@@ -157,11 +317,44 @@ async def log_request_and_response(response):
         # response_body = await response.data
         response_body = await gasync.maybe_async(response.get_data)
 
-    request_body = request_body or None
-    logger.access("request (from %s): %s %s - %s, response: %s",
-                  request.remote_addr, request.method, request.full_path,
-                  request_body, response_body)
+    return request_body, response_body
+
+
+async def _read_raw_bodies(response):
+    """原始内容（bytes），不解析 json，写日志时才截断和解码"""
+    request_body = await request.get_data()
+    request_body = Truncated(request_body, ACCESS_LOG_BODY_LIMIT) if request_body else None
 
+    response_body = _response_body_placeholder(response)
+    if response_body is None:
+        response_body = Truncated(await response.get_data(), ACCESS_LOG_BODY_LIMIT)
+
+    return request_body, response_body
+
+
+async def start_request_span():
+    """开始 http 请求的 span（启用 gtrace 时），上游的 traceparent 从请求头中读取"""
+    if not gtrace.is_enabled():
+        return
+
+    rule = request.url_rule.rule if request.url_rule else request.path
+    span = gtrace.start_span("HTTP %s %s" % (request.method, rule), gtrace.KIND_SERVER,
+                             request.headers.get(gtrace.TRACEPARENT) or None, path=request.path)
+    setattr(request, WebConst.GCOMMON_TRACE_SPAN, (span, gtrace.activate(span)))
+
+
+async def finish_request_span(response):
+    """结束 http 请求的 span，并在响应头中返回 traceparent"""
+    trace = getattr(request, WebConst.GCOMMON_TRACE_SPAN, None)
+    if trace is None:
+        return response
+
+    span, token = trace
+    span.set_attribute("status", response.status_code)
+    response.headers[gtrace.TRACEPARENT] = span.traceparent
+
+    gtrace.deactivate(token)
+    gtrace.finish_span(span, "HTTP %s" % response.status_code if response.status_code >= 500 else None)
     return response
 
 
@@ -178,12 +371,22 @@ def create_quart_blueprint(name, import_name=""):
 
 def create_quart_app(name, static_url_path="", static_folder=""):
     """创建 quart app，并注入 middleware"""
-    global PASSTHROUGH_HTTP_ERROR
+    global PASSTHROUGH_HTTP_ERROR, ACCESS_LOG_RAW_BODY, ACCESS_LOG_BODY_LIMIT
     PASSTHROUGH_HTTP_ERROR = Global.config.get("common.http.passthrough_http_error")
 
+    ACCESS_LOG_RAW_BODY = Global.config.get("common.http.access_log.raw_body", ACCESS_LOG_RAW_BODY)
+    ACCESS_LOG_BODY_LIMIT = Global.config.get("common.http.access_log.body_limit", ACCESS_LOG_BODY_LIMIT)
+
+    sample_rates = Global.config.get("common.http.access_log.sample_rates") or {}
+    for path, rate in sample_rates.items():
+        FlaskLogManager.set_access_log_sample_rate(path, rate)
+
     app = Quart(name, static_folder=static_folder, static_url_path=static_url_path)
     app.register_error_handler(Exception, handle_bad_request)
+    app.before_request(mark_request_start)
+    app.before_request(start_request_span)
     app.after_request(log_request_and_response)
+    app.after_request(finish_request_span)
 
     # app.asgi_app = ExceptionMiddleware(app.asgi_app)
     return app
@@ -222,19 +425,73 @@ def disable_detail_response_log(f):
     return wrap
 
 
+class PathMatcher(object):
+    """路径匹配：所有模式编译成一个正则表达式。
+
+    prefix=True 时按前缀匹配，否则按子串匹配；多个模式匹配时使用最长的。
+    """
+
+    def __init__(self, prefix=True):
+        self.prefix = prefix
+
+        self._values = {}
+        self._pattern = None
+        self._pattern_values = []
+
+    def __bool__(self):
+        return bool(self._values)
+
+    def add(self, path, value=True):
+        self._values[path] = value
+        self._pattern = None
+
+    def clear(self):
+        self._values.clear()
+        self._pattern = None
+
+    def _compile(self):
+        paths = sorted(self._values, key=len, reverse=True)
+        self._pattern = re.compile("|".join("(%s)" % re.escape(path) for path in paths))
+        self._pattern_values = [None] + [self._values[path] for path in paths]
+
+    def match(self, path, default=None):
+        if not self._values:
+            return default
+
+        if self._pattern is None:
+            self._compile()
+
+        match = self._pattern.match(path) if self.prefix else self._pattern.search(path)
+        return self._pattern_values[match.lastindex] if match else default
+
+
 class FlaskLogManager(object):
-    _path_without_detail_response_log = set()
+    # 包含这些路径的请求不输出响应内容（子串匹配）
+    _path_without_detail_response_log = PathMatcher(prefix=False)
+
+    # 路径前缀 -> access log 采样比例
+    _access_log_sample_rates = PathMatcher(prefix=True)
 
     @classmethod
     def disable_detail_response_log_by_path(cls, path):
-        """禁止详细响应日志"""
+        """禁止详细响应日志（请求路径包含 path 时）"""
         cls._path_without_detail_response_log.add(path)
 
     @classmethod
     def should_ignore_response_body(cls, uri: str):
         """判断是否应该输出详细日志"""
-        for path in cls._path_without_detail_response_log:
-            if uri.find(path) >= 0:
-                return True
+        return cls._path_without_detail_response_log.match(uri, False)
 
-        return False
+    @classmethod
+    def set_access_log_sample_rate(cls, path, rate):
+        """路径前缀为 path 的成功请求，access log 只输出 rate (0 - 1) 比例"""
+        cls._access_log_sample_rates.add(path, rate)
+
+    @classmethod
+    def access_log_sample_rate(cls, uri: str):
+        return cls._access_log_sample_rates.match(uri, 1.0)
+
+    @classmethod
+    def reset(cls):
+        cls._path_without_detail_response_log.clear()
+        cls._access_log_sample_rates.clear()
@@ -272,12 +272,27 @@ def run_forever(*functions):
     loop = asyncio.get_event_loop()
     AsyncThreads.register_main_loop()
 
+    _start_loop_monitor(loop)
+
     for func in functions:
         call_when_running(func)
 
     loop.run_forever()
 
 
+def _start_loop_monitor(loop):
+    """监控主事件循环的调度延迟和慢回调，可以在配置中关闭（common.loop_monitor.disabled）"""
+    from gcommon.aio import gloopmonitor
+    from gcommon.utils.gglobal import Global
+
+    if Global.config.get("common.loop_monitor.disabled"):
+        return
+
+    interval = Global.config.get("common.loop_monitor.interval", 0.1)
+    slow_threshold = Global.config.get("common.loop_monitor.slow_callback_ms", 100) / 1000
+    gloopmonitor.start_loop_monitor(loop, interval, slow_threshold)
+
+
 async def maybe_async(func, *args, **kwargs):
     """异步调用一个函数，该函数可能是同步函数，也可能是异步函数"""
     result = func(*args, **kwargs)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""事件循环的健康监控。
+
+- 定时探测：每隔 interval 秒 sleep 一次，实际唤醒时间与预期时间的差值即调度延迟，
+  记录到 Timer("event_loop_lag") 的直方图中；
+- 慢回调：后台线程检查探测是否按时唤醒，超过阈值时抓取事件循环线程的当前调用栈，
+  记录正在执行的 task 和回调名称，并计数 Counter("event_loop_slow_callbacks")。
+"""
+
+import asyncio
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from gcommon.utils import gtime
+from gcommon.utils.gcounter import Counter, Timer
+
+logger = logging.getLogger("loopmon")
+
+LAG_TIMER_NAME = "event_loop_lag"
+SLOW_CALLBACK_COUNTER_NAME = "event_loop_slow_callbacks"
+
+_asyncio_folder = os.path.dirname(asyncio.__file__)
+
+
+def _callback_name(stack: traceback.StackSummary):
+    """调用栈中事件循环正在执行的回调：Handle._run 之后第一个不属于 asyncio 的帧"""
+    start = 0
+    for index, frame in enumerate(stack):
+        if frame.name == "_run" and frame.filename.startswith(_asyncio_folder):
+            start = index + 1
+
+    for frame in stack[start:]:
+        if not frame.filename.startswith(_asyncio_folder):
+            return "%s (%s:%s)" % (frame.name, frame.filename, frame.lineno)
+
+    return ""
+
+
+class LoopMonitor(object):
+    def __init__(self, loop, interval=0.1, slow_threshold=0.1, max_slow_callbacks=20):
+        self.loop = loop
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+
+        self.lag_timer = Timer.get(LAG_TIMER_NAME)
+        self.slow_callback_counter = Counter.get(SLOW_CALLBACK_COUNTER_NAME)
+
+        # 最近的慢回调
+        self.slow_callbacks = collections.deque(maxlen=max_slow_callbacks)
+
+        self._thread_id = 0
+        self._deadline_ns = 0
+        self._reported_deadline_ns = 0
+        self._stall = None
+
+        # 探测协程（事件循环线程）和后台线程之间共享 _deadline_ns、_stall
+        self._lock = threading.Lock()
+
+        self._probe_task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._stopped.clear()
+        self._probe_task = self.loop.create_task(self._probe())
+
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._probe_task:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    async def _probe(self):
+        self._thread_id = threading.get_ident()
+        interval_ns = int(self.interval * 1e9)
+
+        while True:
+            deadline = time.perf_counter_ns() + interval_ns
+            self._deadline_ns = deadline
+            await asyncio.sleep(self.interval)
+
+            lag = time.perf_counter_ns() - deadline
+            self.lag_timer.record(lag if lag > 0 else 0)
+
+            with self._lock:
+                # 唤醒后后台线程不再检查这个 deadline
+                self._deadline_ns = 0
+                stall, self._stall = self._stall, None
+
+            if stall is not None:
+                stall["durationMs"] = lag / 1e6
+
+    def _watch(self):
+        threshold_ns = int(self.slow_threshold * 1e9)
+        poll = min(self.interval, self.slow_threshold) / 2
+
+        while not self._stopped.wait(poll):
+            deadline = self._deadline_ns
+            if not deadline or deadline == self._reported_deadline_ns:
+                continue
+
+            late = time.perf_counter_ns() - deadline
+            if late < threshold_ns:
+                continue
+
+            with self._lock:
+                # 探测协程可能已经被唤醒
+                if deadline != self._deadline_ns:
+                    continue
+
+                self._reported_deadline_ns = deadline
+                stall = self._capture(late)
+                if stall is not None:
+                    self._stall = stall
+
+            if stall is not None:
+                logger.warning("event loop blocked for more than %.1f ms, task: %s, callback: %s, stack:\n%s",
+                               stall["lateMs"], stall["task"], stall["callback"], "".join(stall["stack"]))
+
+    def _capture(self, late):
+        """事件循环被阻塞：抓取事件循环线程的调用栈（调用者持有锁，事件循环线程唤醒后等待）"""
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return None
+
+        stack = traceback.extract_stack(frame)
+        task = asyncio.current_task(self.loop)
+
+        stall = {
+            "time": gtime.local_time_str(),
+            "task": task.get_name() if task else "",
+            "callback": _callback_name(stack),
+            "lateMs": late / 1e6,
+            "durationMs": None,
+            "stack": stack.format(),
+        }
+
+        self.slow_callbacks.append(stall)
+        self.slow_callback_counter.inc()
+        return stall
+
+    def snapshot(self) -> dict:
+        return {
+            "interval": self.interval,
+            "slowThreshold": self.slow_threshold,
+            "lag": self.lag_timer.histogram.snapshot().summary(),
+            "slowCallbacks": self.slow_callback_counter.value,
+            "recentSlowCallbacks": list(self.slow_callbacks),
+        }
+
+
+_monitor: LoopMonitor = None
+
+
+def start_loop_monitor(loop=None, interval=0.1, slow_threshold=0.1) -> LoopMonitor:
+    """监控主事件循环（由 gasync.run_forever 调用）"""
+    global _monitor
+    if _monitor:
+        return _monitor
+
+    _monitor = LoopMonitor(loop or asyncio.get_event_loop(), interval, slow_threshold)
+    _monitor.start()
+    return _monitor
+
+
+def stop_loop_monitor():
+    global _monitor
+    if _monitor:
+        _monitor.stop()
+        _monitor = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    return _monitor
@@ -3,38 +3,79 @@
 # created: 2015-08-31
 
 """计数器、计时器、序号发生器等。"""
-import time
+import inspect
 import logging
+import random
+import time
+from functools import wraps
 
 from gcommon.utils.gcounter import Counter
 from gcommon.utils.gcounter import Gauge
 from gcommon.utils.gcounter import Timer
-from functools import wraps
 
 logger = logging.getLogger('monitor')
 
 
-def monitor(name=None):
+def monitor(name=None, sample_rate=1.0):
+    """统计函数的调用次数（name）、正在执行的数量（name_active）和执行时间（name_time）。
+
+    支持普通函数和 async 函数。计数器在装饰时创建，调用时不再查找注册表。
+    sample_rate 小于 1 时只对这一比例的调用计时，调用次数和执行数量仍然每次统计。
+    """
     def monitor_decorator(func):
-        @wraps(func)
-        async def __inner(*args, **kwargs):
-            if not name:
-                func_name = func.__name__
-            else:
-                func_name = name
-            counter = Counter.get(func_name)
-            if not counter:
-                counter = Counter(func_name)
-
-            counter.inc()
-            gauge_name = '%s_active' % func_name
-            timer_name = '%s_time' % func_name
-            with Gauge.create(gauge_name), Timer.create(timer_name):
-                result = await func(*args, **kwargs)
-
-            logger.debug("function %s counter %s active %s", func_name, counter.value,
-                         Counter.get(gauge_name).value)
-            return result
+        func_name = name or func.__name__
+
+        counter = Counter.get(func_name)
+        gauge = Gauge.get('%s_active' % func_name)
+        timer = Timer.get('%s_time' % func_name)
+
+        sampled = sample_rate < 1
+        rand = random.random
+        perf_counter_ns = time.perf_counter_ns
+
+        def log_finished():
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("function %s counter %s active %s", func_name, counter.value, gauge.value)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def __inner(*args, **kwargs):
+                counter.inc()
+                gauge.inc()
+                try:
+                    if sampled and rand() >= sample_rate:
+                        result = await func(*args, **kwargs)
+                    else:
+                        start = perf_counter_ns()
+                        try:
+                            result = await func(*args, **kwargs)
+                        finally:
+                            timer.record(perf_counter_ns() - start)
+                finally:
+                    gauge.dec()
+
+                log_finished()
+                return result
+        else:
+            @wraps(func)
+            def __inner(*args, **kwargs):
+                counter.inc()
+                gauge.inc()
+                try:
+                    if sampled and rand() >= sample_rate:
+                        result = func(*args, **kwargs)
+                    else:
+                        start = perf_counter_ns()
+                        try:
+                            result = func(*args, **kwargs)
+                        finally:
+                            timer.record(perf_counter_ns() - start)
+                finally:
+                    gauge.dec()
+
+                log_finished()
+                return result
+
         return __inner
     return monitor_decorator
 
@@ -11,7 +11,7 @@ import traceback
 
 from gcommon.aio import gasync
 from gcommon.aio.gasync import maybe_async
-from gcommon.logger import log_util
+from gcommon.logger import log_util, glogger
 from gcommon.server import server_base
 from gcommon.utils import gproc, genv, gmain
 from gcommon.utils.gglobal import Global
@@ -76,6 +76,7 @@ class SimpleServer(ObjectWithLogger):
         Global.set_config(self.config)
 
         self.full_server_name = gproc.get_process_id(self.SERVICE_NAME, int(self.options.instance))
+        Global.set_server(self.service_name, int(self.options.instance), self.full_server_name)
         self.unique_server_name = gproc.get_process_unique_id(self.SERVICE_NAME, int(self.options.instance))
 
     @property
@@ -126,8 +127,14 @@ class SimpleServer(ObjectWithLogger):
         log_levels = genv.get_env(gmain.ENV_LOG_LEVEL_NAMES)
         level_names = gmain.parse_log_level_names(log_levels)
 
+        queue_size = int(genv.get_env(gmain.ENV_LOG_QUEUE_SIZE) or 0)
+        queue_full_policy = genv.get_env(gmain.ENV_LOG_QUEUE_FULL_POLICY) or glogger.QUEUE_FULL_DROP
+        compress = genv.get_env(gmain.ENV_LOG_COMPRESS) or None
+
         server_base.init_logger(self.options, thread_logger=self.IS_MULTI_THREAD,
-                                file_handler=log_to_file, formatter=formatter, level_names=level_names)
+                                file_handler=log_to_file, formatter=formatter, level_names=level_names,
+                                queue_size=queue_size, queue_full_policy=queue_full_policy,
+                                compress=compress)
         self.logger = logging.getLogger(self.SERVICE_NAME)
 
     def get_config_params(self):
@@ -28,12 +28,16 @@ from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
 from kafka.errors import KafkaError, KafkaConnectionError
 
 from gcommon.aio import gasync
-from gcommon.utils import gtime, gerrors
+from gcommon.logger.log_util import ThrottledLogger
+from gcommon.utils import gtime, gerrors, gjsonobj, gtrace
 from gcommon.utils.gjsonobj import JsonObject
 from gcommon.utils.gobject import ObjectWithLogger
 
 logger = logging.getLogger("kafka")
 
+# 每条消息的日志，每个位置每秒最多 100 条
+throttled_logger = ThrottledLogger(logger, per_second=100)
+
 
 class KafkaConfig(object):
     API_VERSION = (0, 10)
@@ -84,6 +88,12 @@ class KafkaConsumer(object):
     """
     Message_Content_Is_Json = True
 
+    # json 消息中的嵌套对象在访问时才转换（LazyJsonObject）
+    Message_Content_Lazy_Json = True
+
+    # 消息内容为 msgpack 格式（由 KafkaProducer.send_msgpack 发送），解析结果与 json 相同
+    Message_Content_Is_Msgpack = False
+
     def __init__(self, kafka_config: KafkaConfig, callback: KafkaConsumerCallback = None):
         self.config = kafka_config
 
@@ -131,17 +141,24 @@ class KafkaConsumer(object):
             await consumer.stop()
 
     async def _process_kafka_message(self, message):
-        logger.debug("message received, topic=%s, partition=%s, offset=%s, timestamp=%s",
-                     message.topic, message.partition, message.offset, message.timestamp)
+        throttled_logger.debug("message received, topic=%s, partition=%s, offset=%s, timestamp=%s",
+                               message.topic, message.partition, message.offset, message.timestamp)
 
         event_id = f"{message.topic}-{message.partition}-{message.offset}"
         event_time = gtime.timestamp_to_date(int(message.timestamp / 1000))
-        content = message.value.decode("utf-8")
-        if self.Message_Content_Is_Json:
-            content = JsonObject.loads(content)
+        if self.Message_Content_Is_Msgpack:
+            content = JsonObject.loads_msgpack(message.value, lazy=self.Message_Content_Lazy_Json)
+        elif self.Message_Content_Is_Json:
+            # 直接解析 bytes，无需先解码成 str
+            content = JsonObject.loads(message.value, lazy=self.Message_Content_Lazy_Json)
+        else:
+            content = message.value.decode("utf-8")
 
-        await gasync.maybe_async(self._on_kafka_message, message.topic,
-                                 event_id, event_time, content)
+        # 上游的 traceparent 在消息头中
+        parent = gtrace.extract_from_kafka_headers(message.headers)
+        with gtrace.span("kafka.consume", gtrace.KIND_CONSUMER, parent, topic=message.topic):
+            await gasync.maybe_async(self._on_kafka_message, message.topic,
+                                     event_id, event_time, content)
 
 
 class KafkaProducer(object):
@@ -161,9 +178,20 @@ class KafkaProducer(object):
 
     async def send_json(self, topic, message: JsonObject, key=None):
         # Produce message
+        # FrozenJsonObject（或者包含 FrozenJsonObject 的消息）复用缓存的序列化结果
+        assert self.started
+        value = gjsonobj.dumpb_message(message)
+        with gtrace.span("kafka.send", gtrace.KIND_PRODUCER, topic=topic):
+            await self.producer.send_and_wait(topic, value=value, key=key, headers=gtrace.kafka_headers())
+
+    async def send_msgpack(self, topic, message: JsonObject, key=None):
+        """以 msgpack 格式发送（接收方设置 KafkaConsumer.Message_Content_Is_Msgpack）"""
+        from gcommon.utils import gmsgpack
+
         assert self.started
-        value = message.dumps(ensure_ascii=False).encode('utf-8')
-        await self.producer.send_and_wait(topic, value=value, key=key)
+        value = gmsgpack.packb(message)
+        with gtrace.span("kafka.send", gtrace.KIND_PRODUCER, topic=topic):
+            await self.producer.send_and_wait(topic, value=value, key=key, headers=gtrace.kafka_headers())
 
     async def stop(self):
         # Wait for all pending messages to be delivered or expire.
@@ -3,7 +3,6 @@
 # creator: liguopeng@liguopeng.net
 
 import asyncio
-import json
 import logging
 import socket
 import threading
@@ -13,11 +12,18 @@ from datetime import datetime
 import paho.mqtt.client as mqtt
 
 from gcommon.aio import gasync
+from gcommon.logger.log_util import ThrottledLogger, Truncated
 from gcommon.server.server_config import ServerConfig
-from gcommon.utils import gtime
+from gcommon.utils import gtime, gjsonobj, gtrace
 
 logger = logging.getLogger("mqtt")
 
+# 每条消息的日志，每个位置每秒最多 100 条
+throttled_logger = ThrottledLogger(logger, per_second=100)
+
+# 日志中消息内容的最大长度
+PAYLOAD_LOG_LIMIT = 1024
+
 
 class MqttConfig(ServerConfig):
     pass
@@ -39,7 +45,7 @@ class MqttObserverBase(object):
 
     @abstractmethod
     def on_mqtt_message(self, _client, _user_data, message):
-        logger.debug(message.payload)
+        throttled_logger.debug("%s", Truncated(message.payload, PAYLOAD_LOG_LIMIT))
 
     def send_message(self, topic, message, qos=0) -> mqtt.MQTTMessageInfo:
         return self.mqtt_listener.send_message(topic, message, qos)
@@ -122,14 +128,19 @@ class MqttListener(object):
         self._working = True
 
     def send_message(self, topic, message, qos=0) -> mqtt.MQTTMessageInfo:
-        if isinstance(message, dict):
-            message = json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+        with gtrace.span("mqtt.publish", gtrace.KIND_PRODUCER, topic=topic):
+            if isinstance(message, dict):
+                if gtrace.is_enabled():
+                    # mqtt 没有消息头，traceparent 放在 json 消息中（不修改调用者的消息）
+                    message = gtrace.inject(dict(message))
 
-        if isinstance(message, str):
-            message = message.encode(encoding="utf-8")
+                message = gjsonobj.dumpb_message(message)
 
-        info = self.client.publish(topic, message, qos=qos)
-        return info
+            if isinstance(message, str):
+                message = message.encode(encoding="utf-8")
+
+            info = self.client.publish(topic, message, qos=qos)
+            return info
 
     def reconnect(self):
         """掉线重连"""
@@ -225,5 +236,8 @@ class MqttListener(object):
 
     @abstractmethod
     def on_message(self, client, userdata, message):
-        logger.debug(message.topic + " " + str(message.payload))
-        self.observer.on_mqtt_message(client, userdata, message)
+        throttled_logger.debug("%s %s", message.topic, Truncated(message.payload, PAYLOAD_LOG_LIMIT))
+
+        parent = gtrace.extract_from_json(message.payload)
+        with gtrace.span("mqtt.message", gtrace.KIND_CONSUMER, parent, topic=message.topic):
+            self.observer.on_mqtt_message(client, userdata, message)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""gmonitor.monitor 的调用开销（手工运行，不在单元测试中执行）
+
+python -m gcommon.aio.test.benchmark_gmonitor
+"""
+
+import timeit
+from functools import wraps
+
+from gcommon.aio.gmonitor import monitor
+from gcommon.utils.gcounter import Counter, Gauge, Timer
+
+
+def _legacy_monitor(name=None):
+    """原来的实现：每次调用都查找注册表，进入两个 context manager"""
+    def monitor_decorator(func):
+        @wraps(func)
+        async def __inner(*args, **kwargs):
+            func_name = name or func.__name__
+            counter = Counter.get(func_name)
+            counter.inc()
+            with Gauge.create('%s_active' % func_name), Timer.create('%s_time' % func_name):
+                result = await func(*args, **kwargs)
+
+            return result
+        return __inner
+    return monitor_decorator
+
+
+async def _handler():
+    return 1
+
+
+def _run(coroutine):
+    """不经过事件循环，直接执行一个不会挂起的协程"""
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+
+
+def bench_monitor(number=200000):
+    handlers = [
+        ("no monitor", _handler),
+        ("legacy monitor", _legacy_monitor("bench_legacy")(_handler)),
+        ("monitor", monitor("bench_full")(_handler)),
+        ("monitor sample_rate=0.1", monitor("bench_sampled", sample_rate=0.1)(_handler)),
+        ("monitor sample_rate=0.01", monitor("bench_sampled_1", sample_rate=0.01)(_handler)),
+    ]
+
+    baseline = None
+    for title, handler in handlers:
+        seconds = timeit.timeit(lambda: _run(handler()), number=number) / number * 1000 * 1000
+        if baseline is None:
+            baseline = seconds
+
+        print("%-30s %8.3f us/call  overhead %8.3f us" % (title, seconds, seconds - baseline))
+
+
+if __name__ == '__main__':
+    bench_monitor()
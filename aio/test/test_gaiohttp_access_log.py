@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import asyncio
+import logging
+
+from gcommon.aio import gaiohttp
+from gcommon.aio.gaiohttp import FlaskLogManager, PathMatcher, create_quart_app, web_response_ok
+from gcommon.logger import glogger
+from gcommon.logger.test.log_helper import ListHandler
+
+app = create_quart_app(__name__)
+
+
+@app.route("/access/items", methods=["POST"])
+async def create_item():
+    return web_response_ok(name="中文" * 10)
+
+
+@app.route("/access/secret/items", methods=["POST"])
+async def create_secret_item():
+    return web_response_ok(secret="secret")
+
+
+@app.route("/access/sampled/items", methods=["POST"])
+async def create_sampled_item():
+    return web_response_ok()
+
+
+@app.route("/access/sampled/failed", methods=["POST"])
+async def create_failed_item():
+    return web_response_ok(), 500
+
+
+def _post(path, body, status=200):
+    handler = ListHandler()
+    http_logger = logging.getLogger("http")
+    http_logger.addHandler(handler)
+
+    old_level = http_logger.level
+    http_logger.setLevel(logging.DEBUG)
+
+    async def request():
+        return await app.test_client().post(path, json=body)
+
+    try:
+        response = asyncio.run(request())
+    finally:
+        http_logger.removeHandler(handler)
+        http_logger.setLevel(old_level)
+
+    assert response.status_code == status
+    return [record for record in handler.records if record.levelno == glogger.ACCESS]
+
+
+def test_path_matcher():
+    matcher = PathMatcher()
+    assert matcher.match("/api", 1.0) == 1.0
+
+    matcher.add("/api/", 0.5)
+    matcher.add("/api/users", 0.1)
+    matcher.add("/api/users/me", 1.0)
+
+    assert matcher.match("/api/items") == 0.5
+    assert matcher.match("/api/users/1") == 0.1
+    assert matcher.match("/api/users/me") == 1.0
+    assert matcher.match("/v1/api/users", 1.0) == 1.0
+
+    # 子串匹配（FlaskLogManager 排除响应内容的缺省方式）
+    matcher = PathMatcher(prefix=False)
+    matcher.add("login")
+    matcher.add("/token")
+    assert matcher.match("/api/v1/login", False)
+    assert matcher.match("/api/token/refresh", False)
+    assert not matcher.match("/api/users", False)
+
+
+def test_raw_body_access_log():
+    FlaskLogManager.disable_detail_response_log_by_path("/secret/")
+    FlaskLogManager.set_access_log_sample_rate("/access/sampled/", 0)
+
+    old_raw_body, old_limit = gaiohttp.ACCESS_LOG_RAW_BODY, gaiohttp.ACCESS_LOG_BODY_LIMIT
+    gaiohttp.ACCESS_LOG_RAW_BODY, gaiohttp.ACCESS_LOG_BODY_LIMIT = True, 40
+    try:
+        [record] = _post("/access/items", {"name": "x" * 100})
+        [secret_record] = _post("/access/secret/items", {"name": "secret"})
+        assert not _post("/access/sampled/items", {})
+
+        # 错误响应不采样
+        [failed_record] = _post("/access/sampled/failed", {}, status=500)
+    finally:
+        gaiohttp.ACCESS_LOG_RAW_BODY, gaiohttp.ACCESS_LOG_BODY_LIMIT = old_raw_body, old_limit
+        FlaskLogManager.reset()
+
+    message = record.getMessage()
+    assert '- {"name": "' + "x" * 30 + "...(112 bytes)" in message
+    assert 'response: {"code":0' in message
+    assert record.status == 200 and record.path == "/access/items"
+
+    # 日志中只保存截断后的内容
+    assert len(record.args[3].value) == 40
+
+    assert secret_record.getMessage().endswith("response: ...")
+    assert failed_record.status == 500
+
+
+if __name__ == '__main__':
+    test_path_matcher()
+    test_raw_body_access_log()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import asyncio
+import time
+
+from gcommon.aio.gloopmonitor import LoopMonitor
+
+
+async def blocking_handler():
+    time.sleep(0.2)
+
+
+async def _run_monitor():
+    monitor = LoopMonitor(asyncio.get_running_loop(), interval=0.01, slow_threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(blocking_handler(), name="blocking-task")
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    return monitor
+
+
+def test_loop_monitor():
+    monitor = asyncio.run(_run_monitor())
+
+    snapshot = monitor.snapshot()
+    assert snapshot["lag"]["count"] > 5
+    assert snapshot["lag"]["max"] >= 100
+    assert snapshot["slowCallbacks"] >= 1
+
+    stall = snapshot["recentSlowCallbacks"][-1]
+    assert stall["task"] == "blocking-task"
+    assert stall["callback"].startswith("blocking_handler")
+    assert "time.sleep(0.2)" in "".join(stall["stack"])
+    assert stall["durationMs"] >= 100
+
+
+if __name__ == '__main__':
+    test_loop_monitor()
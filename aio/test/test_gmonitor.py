@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import asyncio
+
+import pytest
+
+from gcommon.aio.gmonitor import monitor
+from gcommon.utils.gcounter import Counter, Timer
+
+
+@monitor()
+def sync_add(a, b):
+    return a + b
+
+
+@monitor("test_monitor_async")
+async def async_add(a, b):
+    await asyncio.sleep(0)
+    return a + b
+
+
+@monitor("test_monitor_sampled", sample_rate=0)
+def sampled():
+    return 1
+
+
+@monitor("test_monitor_error")
+async def raise_error():
+    raise ValueError("error")
+
+
+def test_monitor_sync():
+    assert sync_add(1, 2) == 3
+    assert sync_add.__name__ == "sync_add"
+
+    assert Counter.get("sync_add").value == 1
+    assert Counter.get("sync_add_active").value == 0
+    assert Timer.get("sync_add_time").count == 1
+
+
+def test_monitor_async():
+    assert asyncio.run(async_add(1, 2)) == 3
+
+    assert Counter.get("test_monitor_async").value == 1
+    assert Timer.get("test_monitor_async_time").count == 1
+
+
+def test_monitor_sampled():
+    for _ in range(10):
+        sampled()
+
+    assert Counter.get("test_monitor_sampled").value == 10
+    assert Timer.get("test_monitor_sampled_time").count == 0
+
+
+def test_monitor_error():
+    with pytest.raises(ValueError):
+        asyncio.run(raise_error())
+
+    assert Counter.get("test_monitor_error_active").value == 0
+    assert Timer.get("test_monitor_error_time").count == 1
+
+
+if __name__ == '__main__':
+    test_monitor_sync()
+    test_monitor_async()
+    test_monitor_sampled()
+    test_monitor_error()
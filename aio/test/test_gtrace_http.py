@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import asyncio
+
+from gcommon.aio.gaiohttp import create_quart_app, web_response_ok
+from gcommon.utils import gtrace
+
+app = create_quart_app(__name__)
+
+
+@app.route("/users/<user_id>")
+async def get_user(user_id):
+    with gtrace.span("load_user"):
+        pass
+
+    return web_response_ok(userId=user_id)
+
+
+def test_http_span():
+    upstream = "00-%s-%s-01" % ("a" * 32, "b" * 16)
+
+    async def request():
+        return await app.test_client().get("/users/1", headers={"traceparent": upstream})
+
+    gtrace.enable()
+    gtrace.clear()
+    try:
+        response = asyncio.run(request())
+    finally:
+        gtrace.disable()
+
+    assert response.status_code == 200
+
+    load_user, http = gtrace.export(clear=True)
+    assert http["name"] == "HTTP GET /users/<user_id>"
+    assert http["traceId"] == "a" * 32
+    assert http["parentId"] == "b" * 16
+    assert http["attributes"] == {"path": "/users/1", "status": 200}
+    assert load_user["parentId"] == http["spanId"]
+
+    assert response.headers["traceparent"] == "00-%s-%s-01" % ("a" * 32, http["spanId"])
+
+
+if __name__ == '__main__':
+    test_http_span()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import asyncio
+import json
+
+from quart import Quart
+
+from gcommon.aio.gaiohttp import web_response_stream, log_request_and_response
+
+app = Quart(__name__)
+app.after_request(log_request_and_response)
+
+
+async def _load_records(count):
+    for i in range(count):
+        await asyncio.sleep(0)
+        yield {"seq": i, "name": "记录-%s" % i}
+
+
+@app.route("/export")
+async def export():
+    return web_response_stream(_load_records(250), total=250, batch_size=100)
+
+
+@app.route("/export.ndjson")
+async def export_ndjson():
+    return web_response_stream(_load_records(5), ndjson=True)
+
+
+@app.route("/empty")
+async def export_empty():
+    return web_response_stream([])
+
+
+async def _get(path):
+    client = app.test_client()
+    response = await client.get(path)
+    return response, await response.get_data()
+
+
+def test_stream_json():
+    response, body = asyncio.run(_get("/export"))
+    assert response.mimetype == "application/json"
+
+    result = json.loads(body)
+    assert result["code"] == 0
+    assert result["total"] == 250
+    assert len(result["data"]) == 250
+    assert result["data"][249]["name"] == "记录-249"
+
+    response, body = asyncio.run(_get("/empty"))
+    assert json.loads(body)["data"] == []
+
+
+def test_stream_ndjson():
+    response, body = asyncio.run(_get("/export.ndjson"))
+    assert response.mimetype == "application/x-ndjson"
+
+    lines = body.decode("utf-8").splitlines()
+    assert [json.loads(line)["seq"] for line in lines] == list(range(5))
+
+
+if __name__ == '__main__':
+    test_stream_json()
+    test_stream_ndjson()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import asyncio
+import datetime
+import decimal
+import json
+
+from quart import Quart, websocket
+
+from gcommon.aio.ws_server import WebSocketConnection
+from gcommon.utils.gjsonobj import JsonObject
+
+
+class _EchoConnection(WebSocketConnection):
+    def _start_service(self):
+        pass
+
+    def _stop_service(self):
+        pass
+
+    async def _handle_ws_message(self, msg_id, msg_type, payload):
+        data = JsonObject()
+        data.created = datetime.datetime(2021, 8, 4, 12, 30)
+        data.amount = decimal.Decimal("1.5")
+        await self.send_response(payload, "pong", data)
+
+
+app = Quart(__name__)
+
+
+@app.websocket("/ws")
+async def serve_ws():
+    await _EchoConnection().serve(websocket)
+
+
+def test_send_datetime_payload():
+    async def talk():
+        async with app.test_client().websocket("/ws") as test_ws:
+            await test_ws.send_json({"cmd": "ping", "cid": "1"})
+            return json.loads(await test_ws.receive())
+
+    message = asyncio.run(talk())
+    assert message["cmd"] == "pong" and message["respToCid"] == "1"
+
+    # 与 quart 的 send_json 相同
+    assert message["data"] == {"created": "Wed, 04 Aug 2021 12:30:00 GMT", "amount": "1.5"}
+
+
+if __name__ == '__main__':
+    test_send_datetime_payload()
@@ -5,16 +5,31 @@
 """用于调试、监控的通用工具"""
 
 
+import asyncio
 import logging
 
+from quart import current_app, request
+
+from gcommon.aio import gloopmonitor
 from gcommon.aio.gaiohttp import create_quart_blueprint, web_response_ok
 from gcommon.error import GErrors
+from gcommon.utils import gmetrics, gprofiler, gmemtrace, gtrace
+from gcommon.utils.gcounter import Counter
+from gcommon.utils.gglobal import Global
 from gcommon.web.web_utils import WebConst
 
 
 app = create_quart_blueprint("Dev Tools")
 base_url = "/dev"
 
+# 监控数据在一个抓取周期内只生成一次
+_metrics_cache = gmetrics.MetricsCache()
+
+
+async def _run_in_thread(func, *args):
+    """耗时的操作在线程中执行，不阻塞事件循环"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
 
 @app.route("/loggers/<name>/levels/<level>", methods=WebConst.PUT)
 async def update_log_level(name, level):
@@ -48,3 +63,165 @@ async def update_log_level(name, level):
 
     return web_response_ok(oldLevel=old_level)
 
+
+@app.route("/metrics", methods=WebConst.GET)
+async def get_metrics():
+    """以 Prometheus 文本格式导出 gcounter 中的计数器、计时器"""
+    _metrics_cache.ttl = Global.config.get("common.metrics.cache_seconds", 5)
+
+    labels = {}
+    if Global.service_name:
+        labels["service"] = Global.service_name
+    if Global.full_server_name:
+        labels["instance"] = Global.full_server_name
+
+    content = _metrics_cache.get(labels)
+    return current_app.response_class(content, content_type=gmetrics.CONTENT_TYPE)
+
+
+@app.route("/metrics/host", methods=WebConst.GET)
+async def get_host_metrics():
+    """本机所有进程的汇总数据（需要先调用 gshmcounter.enable_shared_metrics）"""
+    from gcommon.utils import gshmcounter
+
+    shared_metrics = gshmcounter.get_shared_metrics()
+    GErrors.gen_target_not_found.raise_if(not shared_metrics, "未启用共享内存监控数据")
+
+    labels = {"service": Global.service_name} if Global.service_name else {}
+    content = shared_metrics.render(labels)
+    return current_app.response_class(content, content_type=gmetrics.CONTENT_TYPE)
+
+
+@app.route("/rates", methods=WebConst.GET)
+async def get_rates():
+    """开启了速率统计的计数器，最近 1/5/15 分钟的每秒平均值"""
+    rates = {name: counter.rate_meter.rates()
+             for name, counter in sorted(Counter.all().items()) if counter.rate_meter is not None}
+
+    return web_response_ok(rates=rates)
+
+
+@app.route("/loop", methods=WebConst.GET)
+async def get_loop_status():
+    """主事件循环的调度延迟（毫秒）和最近的慢回调"""
+    loop_monitor = gloopmonitor.get_loop_monitor()
+    GErrors.gen_target_not_found.raise_if(not loop_monitor, "未启用事件循环监控")
+
+    return web_response_ok(**loop_monitor.snapshot())
+
+
+@app.route("/profile", methods=WebConst.GET)
+async def profile():
+    """对所有线程采样 seconds 秒（rate 次/秒），返回 collapsed stack（flame graph 格式）"""
+    seconds = request.args.get("seconds", 10, type=float)
+    rate = request.args.get("rate", 100, type=int)
+
+    GErrors.gen_bad_request.raise_if(not 0 < seconds <= 300, "采样时间无效")
+    GErrors.gen_bad_request.raise_if(not 0 < rate <= 1000, "采样频率无效")
+    GErrors.gen_exceed_request_limit.raise_if(gprofiler.StackSampler.is_running(), "已经有一个采样正在运行")
+
+    sampler = gprofiler.StackSampler(rate)
+    try:
+        content = await _run_in_thread(sampler.run, seconds)
+    except gprofiler.ProfilerBusyError:
+        GErrors.gen_exceed_request_limit.raise_("已经有一个采样正在运行")
+
+    return current_app.response_class(content, content_type="text/plain; charset=utf-8")
+
+
+@app.route("/tracemalloc/start", methods=WebConst.PUT)
+async def start_tracemalloc():
+    """开始跟踪内存分配，frames 为保存的调用栈深度"""
+    frames = request.args.get("frames", 1, type=int)
+    GErrors.gen_bad_request.raise_if(not 0 < frames <= 100, "调用栈深度无效")
+
+    gmemtrace.start(frames)
+    return web_response_ok(**gmemtrace.status())
+
+
+@app.route("/tracemalloc/stop", methods=WebConst.PUT)
+async def stop_tracemalloc():
+    """停止跟踪内存分配，并清除所有快照"""
+    gmemtrace.stop()
+    return web_response_ok(**gmemtrace.status())
+
+
+@app.route("/tracemalloc", methods=WebConst.GET)
+async def get_tracemalloc_status():
+    return web_response_ok(**gmemtrace.status())
+
+
+@app.route("/tracemalloc/snapshots/<name>", methods=WebConst.POST)
+async def take_tracemalloc_snapshot(name):
+    """创建命名快照"""
+    GErrors.gen_not_completed_yet.raise_if(not gmemtrace.is_tracing(), "未开始跟踪内存分配")
+
+    await _run_in_thread(gmemtrace.take_snapshot, name)
+    return web_response_ok(**gmemtrace.status())
+
+
+def _get_group_by():
+    group_by = request.args.get("groupBy", "lineno")
+    GErrors.gen_bad_request.raise_if(group_by not in gmemtrace.GROUP_BY, "无效的分组方式")
+    return group_by
+
+
+def _get_tracemalloc_snapshot(name):
+    if not name:
+        return None
+
+    snapshot = gmemtrace.get_snapshot(name)
+    GErrors.gen_target_not_found.raise_if(not snapshot, "快照不存在")
+    return snapshot
+
+
+@app.route("/tracemalloc/top", methods=WebConst.GET)
+async def get_tracemalloc_top():
+    """占用内存最多的分配位置。不指定 snapshot 时使用当前的内存分配"""
+    GErrors.gen_not_completed_yet.raise_if(not gmemtrace.is_tracing(), "未开始跟踪内存分配")
+
+    snapshot = _get_tracemalloc_snapshot(request.args.get("snapshot", ""))
+    limit = request.args.get("limit", 20, type=int)
+
+    stats = await _run_in_thread(gmemtrace.top, snapshot, limit, _get_group_by())
+    return web_response_ok(stats)
+
+
+@app.route("/tracemalloc/diff", methods=WebConst.GET)
+async def get_tracemalloc_diff():
+    """两个快照之间的差异（from -> to）。不指定 to 时与当前的内存分配比较"""
+    GErrors.gen_not_completed_yet.raise_if(not gmemtrace.is_tracing(), "未开始跟踪内存分配")
+
+    old_snapshot = _get_tracemalloc_snapshot(request.args.get("from", ""))
+    GErrors.gen_bad_request.raise_if(not old_snapshot, "需要指定快照")
+
+    new_snapshot = _get_tracemalloc_snapshot(request.args.get("to", ""))
+    limit = request.args.get("limit", 20, type=int)
+
+    stats = await _run_in_thread(gmemtrace.diff, old_snapshot, new_snapshot, limit, _get_group_by())
+    return web_response_ok(stats)
+
+
+@app.route("/tracing/enable", methods=WebConst.PUT)
+async def enable_tracing():
+    """开始记录 span，bufferSize 为保存的 span 数量上限"""
+    buffer_size = request.args.get("bufferSize", 10000, type=int)
+    GErrors.gen_bad_request.raise_if(not 0 < buffer_size <= 1000000, "缓冲区大小无效")
+
+    gtrace.enable(buffer_size)
+    return web_response_ok(enabled=True)
+
+
+@app.route("/tracing/disable", methods=WebConst.PUT)
+async def disable_tracing():
+    gtrace.disable()
+    return web_response_ok(enabled=False)
+
+
+@app.route("/tracing/spans", methods=WebConst.GET)
+async def get_tracing_spans():
+    """导出已经结束的 span，可以按 traceId 过滤，clear=1 时同时清空缓冲区"""
+    trace_id = request.args.get("traceId", "")
+    clear = request.args.get("clear", 0, type=int)
+
+    return web_response_ok(gtrace.export(bool(clear), trace_id))
@@ -4,6 +4,8 @@
 
 import aiohttp
 
+from gcommon.utils.gjsonobj import JsonObject
+
 
 Content_Type_XML = 'application/xml'
 Content_Type_Plain_Text = 'text/plain'
@@ -35,4 +37,10 @@ class Session(object):
         async with self.session.delete(url, **kwargs) as response:
             return await response.text()
 
+    async def iter_json(self, url, method="GET", chunk_size=64 * 1024, lazy=False, ndjson=False, **kwargs):
+        """流式读取 json 数组（ndjson=True 时为 NDJSON）响应，逐个返回元素（不在内存中保存整个响应）"""
+        async with self.session.request(method, url, **kwargs) as response:
+            async for item in JsonObject.aiter_loads(response.content, chunk_size, lazy=lazy, ndjson=ndjson):
+                yield item
+
 
@@ -10,13 +10,17 @@ from abc import abstractmethod
 
 from quart import Websocket
 
-from gcommon.aio import gasync
-from gcommon.utils import gtime
+from gcommon.aio import gasync, gaiohttp
+from gcommon.logger.log_util import LazyArg, ThrottledLogger
+from gcommon.utils import gtime, gjsonobj, gtrace
 from gcommon.utils.gcounter import Sequence, Gauge
-from gcommon.utils.gjsonobj import JsonObject
+from gcommon.utils.gjsonobj import JsonObject, LazyJsonObject, FrozenJsonObject
 
 logger = logging.getLogger('websock')
 
+# 消息日志每个位置每秒最多 100 条
+throttled_logger = ThrottledLogger(logger, per_second=100)
+
 
 class WebSocketConnection(object):
     """派生类需要增加自己的构造参数"""
@@ -25,6 +29,12 @@ class WebSocketConnection(object):
     _message_seq = Sequence()
     _connections = {}
 
+    # 客户端消息中的嵌套对象在访问时才转换（LazyJsonObject）
+    _lazy_json_payload = True
+
+    # 以二进制帧收发 msgpack 消息（客户端发来的文本帧仍然按 json 解析）
+    _msgpack_payload = False
+
     def __init__(self):
         self.client_id = self._client_seq.next_value()
         self.connection: Websocket = None
@@ -42,8 +52,7 @@ class WebSocketConnection(object):
             gasync.async_call_soon(self._start_service)
 
             while True:
-                data = await self.connection.receive_json()
-                data = JsonObject(data)
+                data = await self._receive_payload()
                 await self.on_message_received(data)
         finally:
             logger.info('[%06x] - client closes transport.', self.client_id)
@@ -51,6 +60,20 @@ class WebSocketConnection(object):
             await self.close_connection()
             await gasync.maybe_async(self._stop_service)
 
+    async def _receive_payload(self) -> JsonObject:
+        if self._msgpack_payload:
+            data = await self.connection.receive()
+            if isinstance(data, bytes):
+                return JsonObject.loads_msgpack(data, lazy=self._lazy_json_payload)
+
+            return JsonObject.loads(data, lazy=self._lazy_json_payload)
+
+        data = await self.connection.receive_json()
+        if self._lazy_json_payload:
+            return LazyJsonObject(data)
+        else:
+            return JsonObject(data)
+
     @abstractmethod
     def _start_service(self):
         pass
@@ -64,14 +87,15 @@ class WebSocketConnection(object):
         cmd_id = payload.cid
         cmd = payload.cmd
 
-        logger.debug('[%06x] - incoming msg: %s, id: %s, payload: %s.',
-                     self.client_id, cmd, cmd_id, payload.dumps())
+        throttled_logger.debug('[%06x] - incoming msg: %s, id: %s, payload: %s.',
+                               self.client_id, cmd, cmd_id, LazyArg(payload.dumps))
 
         try:
-            await gasync.maybe_async(self._handle_ws_message, cmd_id, cmd, payload)
+            # 客户端可以在消息中携带 traceparent
+            with gtrace.span("ws.message", gtrace.KIND_SERVER, payload.traceparent, cmd=cmd):
+                await gasync.maybe_async(self._handle_ws_message, cmd_id, cmd, payload)
         except:
-            stack = traceback.format_exc()
-            logger.error('[%06x] - error in onMessage: %s.', self.client_id, ''.join(stack))
+            logger.error('[%06x] - error in onMessage: %s.', self.client_id, traceback.format_exc())
             raise
 
     @abstractmethod
@@ -105,14 +129,28 @@ class WebSocketConnection(object):
         await self.send_message(payload)
 
     async def send_message(self, payload: JsonObject):
+        """发送消息。payload.data 为 FrozenJsonObject 时（推送给多个客户端），复用其序列化结果"""
         message_sequence = self._message_seq.next_value()
-        logger.debug('[%06x] - outgoing msg, seq: %s, size: %s.',
-                     self.client_id, message_sequence, payload.dumps())
+
+        if isinstance(payload, FrozenJsonObject):
+            # 不修改原消息，只复制第一层
+            frozen_payload, payload = payload, JsonObject()
+            dict.update(payload, frozen_payload)
 
         payload.cid = str(message_sequence)
         payload.timestamp = gtime.local_time_str()
+        gtrace.inject(payload)
+
+        if self._msgpack_payload:
+            message = payload.dumpb_msgpack()
+        else:
+            # 与 quart 的 send_json 相同，日期、Decimal、UUID 等转换为字符串
+            message = gjsonobj.dumps_message(payload, default=gaiohttp.json_default)
+
+        throttled_logger.debug('[%06x] - outgoing msg, seq: %s, size: %s.',
+                               self.client_id, message_sequence, len(message))
 
-        await self.connection.send_json(payload)
+        await self.connection.send(message)
 
     async def close_connection(self, code=0, reason=""):
         try:
@@ -3,11 +3,27 @@
 
 """Provide logging module."""
 
+import atexit
+import copy
+import gzip
+import json
 import os
+import queue
+import shutil
 import sys
 import logging
+import time
 
-from logging.handlers import TimedRotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from gcommon.logger.log_util import Truncated
+from gcommon.utils.gcounter import Counter
 
 
 VERBOSE = logging.DEBUG - 5
@@ -26,6 +42,18 @@ LOG_MESSAGE = "%(levelname)-3s %(name)-8s %(message)s"
 LOG_FORMAT = '%(asctime)-15s %(levelname)-3s %(name)-8s %(message)s'
 THREAD_LOG_FORMAT = '%(asctime)-15s [%(thread)08d] %(levelname)-3s %(name)-8s %(message)s'
 
+# init_logger(formatter=LOG_FORMAT_JSON)：每行输出一个 json 对象
+LOG_FORMAT_JSON = 'json'
+
+# 日志队列满时的处理方式：丢弃日志，或者等待写日志线程
+QUEUE_FULL_DROP = "drop"
+QUEUE_FULL_BLOCK = "block"
+
+DROPPED_RECORDS_COUNTER_NAME = "logging_dropped_records"
+
+# 当前使用的写日志线程（init_logger 指定 queue_size 时创建）
+_queue_listener = None
+
 
 class StdIORedirector:
     """Redirect std-out/std-err to log file."""
@@ -59,34 +87,287 @@ class StdIORedirector:
         pass
 
 
+# 归档日志的压缩方式
+COMPRESS_GZIP = "gzip"
+COMPRESS_ZSTD = "zstd"
+
+_compress_extensions = {COMPRESS_GZIP: ".gz", COMPRESS_ZSTD: ".zst"}
+
+# 压缩归档日志的线程（第一次压缩时创建）
+_compress_executor = None
+
+
+def _open_compressed_file(filename, compress):
+    if compress == COMPRESS_ZSTD:
+        return zstandard.ZstdCompressor().stream_writer(open(filename, "wb"))
+
+    return gzip.open(filename, "wb", compresslevel=6)
+
+
+def _compress_file(source, dest, compress):
+    try:
+        with open(source, "rb") as src, _open_compressed_file(dest, compress) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+        os.remove(source)
+    except OSError as e:
+        # 不能使用 logging，避免再次进入日志 handler
+        sys.stderr.write("failed to compress log file %s: %s\n" % (source, e))
+
+
+def wait_for_compression():
+    """等待已经提交的归档日志压缩完成"""
+    if _compress_executor is not None:
+        _compress_executor.submit(lambda: None).result()
+
+
 class RotatingFileHandler(TimedRotatingFileHandler):
     """Rotate log file by both time and size."""
 
     def __init__(self, filename, max_bytes=0, when='d', interval=1, backup_count=0, encoding=None, delay=False,
-                 utc=False):
+                 utc=False, compress=None):
         """Create a new time-size rotating file handler. 
         
         when        - 'd' or 'D' means 'days'
         backupCount - max log files
         utc         - if using UTC time
+        compress    - 'gzip' or 'zstd', compress rotated files in a background thread
         """
+        assert compress in (None, COMPRESS_GZIP, COMPRESS_ZSTD)
+
+        # 当前日志文件的大小，打开文件时读取，之后在 emit 中累加
+        self._bytes = 0
 
         TimedRotatingFileHandler.__init__(self, filename, when, interval, backup_count, encoding, delay, utc)
         self.maxBytes = max_bytes
 
-    def shouldRollover(self, record):
-        if self.stream is None:
-            self.stream = self._open()
+        if compress == COMPRESS_ZSTD and zstandard is None:
+            # 没有安装 zstandard 时使用 gzip
+            compress = COMPRESS_GZIP
+
+        self.compress = compress
+        if compress:
+            self.namer = self._compressed_name
+            self.rotator = self._compress_rotated
+
+    def _open(self):
+        stream = TimedRotatingFileHandler._open(self)
+        self._bytes = os.fstat(stream.fileno()).st_size
+        return stream
+
+    def _compressed_name(self, name):
+        return name + _compress_extensions[self.compress]
+
+    def _compress_rotated(self, source, dest):
+        """改名后在后台线程中压缩，不阻塞写日志"""
+        global _compress_executor
+
+        uncompressed = dest[:-len(_compress_extensions[self.compress])]
+        if not os.path.exists(source):
+            return
+
+        os.replace(source, uncompressed)
+
+        if _compress_executor is None:
+            _compress_executor = ThreadPoolExecutor(1, thread_name_prefix="log-compress")
+
+        _compress_executor.submit(_compress_file, uncompressed, dest, self.compress)
 
-        if self.maxBytes > 0:
-            msg = "%s\n" % self.format(record)
-            self.stream.seek(0, 2)
+    def _record_size(self, msg):
+        if msg.isascii():
+            return len(msg)
 
-            if self.stream.tell() + len(msg) >= self.maxBytes:
-                return True
+        return len(msg.encode(self.encoding or "utf-8", errors="replace"))
+
+    def shouldRollover(self, record):
+        if self.maxBytes > 0 and self._bytes >= self.maxBytes:
+            return True
 
         return TimedRotatingFileHandler.shouldRollover(self, record)
 
+    def emit(self, record):
+        """只格式化一次日志，用已知的文件大小判断是否需要归档（不需要 seek/tell）"""
+        try:
+            msg = self.format(record) + self.terminator
+            size = self._record_size(msg)
+
+            if self.stream is None:
+                self.stream = self._open()
+
+            if (self.maxBytes > 0 and self._bytes + size >= self.maxBytes) \
+                    or TimedRotatingFileHandler.shouldRollover(self, record):
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+
+            self.stream.write(msg)
+            self.flush()
+            self._bytes += size
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+# LogRecord 自身的属性，其他属性（logger 调用时的 extra 参数）作为 json 日志的附加字段
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+def _json_log_default(obj):
+    return str(obj)
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行紧凑的 json：
+
+    {"time": ..., "level": ..., "logger": ..., "thread": ..., "message": ..., <extra 字段>}
+
+    time 为带时区的 ISO 8601 格式，例如 2026-10-17T12:00:00.000+08:00。
+    消息在 handler 输出时才格式化（record.getMessage），
+    ACCESS 日志可以通过 extra=access_extra(...) 输出 method/path/status/latency 等字段。
+    """
+
+    default_time_format = "%Y-%m-%dT%H:%M:%S"
+    default_msec_format = "%s.%03d%s"
+
+    def __init__(self, datefmt=None):
+        logging.Formatter.__init__(self, datefmt=datefmt)
+
+        # 重复使用同一个 encoder
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_log_default)
+
+        # 同一秒内的日志复用格式化的时间：(秒, 时间, 时区)，整体替换，多个线程使用时不会不一致
+        self._second_cache = (None, "", "")
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return logging.Formatter.formatTime(self, record, datefmt)
+
+        second = int(record.created)
+        cache = self._second_cache
+        if cache[0] != second:
+            local_time = self.converter(second)
+            offset = time.strftime("%z", local_time)
+            cache = (second, time.strftime(self.default_time_format, local_time), offset[:3] + ":" + offset[3:])
+            self._second_cache = cache
+
+        return self.default_msec_format % (cache[1], record.msecs, cache[2])
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if record.exc_text:
+            data["exception"] = record.exc_text
+
+        if record.stack_info:
+            data["stack"] = record.stack_info
+
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+
+        return self._encoder.encode(data)
+
+
+def access_extra(method, path, status, latency=None, **fields) -> dict:
+    """ACCESS 日志的结构化字段（latency 单位为毫秒）：
+
+    logger.access("...", *args, extra=access_extra(method, path, status, latency))
+    """
+    fields["method"] = method
+    fields["path"] = path
+    fields["status"] = status
+
+    if latency is not None:
+        fields["latency"] = latency
+
+    return fields
+
+
+# 这些类型的日志参数不会被修改，可以推迟到写日志线程中格式化
+_IMMUTABLE_ARG_TYPES = frozenset((str, bytes, int, float, bool, type(None)))
+
+
+def _is_immutable_args(args):
+    if type(args) is not tuple:
+        return False
+
+    for arg in args:
+        if type(arg) not in _IMMUTABLE_ARG_TYPES and not (isinstance(arg, Truncated) and arg.immutable):
+            return False
+
+    return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """把日志放入有上限的队列，由写日志线程写入文件。
+
+    队列满时按 policy 丢弃日志（计数）或者等待。
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def __init__(self, log_queue, policy=QUEUE_FULL_DROP):
+        assert policy in (QUEUE_FULL_DROP, QUEUE_FULL_BLOCK)
+
+        QueueHandler.__init__(self, log_queue)
+        self.policy = policy
+        self.dropped = Counter.get(DROPPED_RECORDS_COUNTER_NAME)
+
+    def prepare(self, record):
+        """只格式化消息和异常，其他格式化（时间、json 等）在写日志线程中进行。
+
+        参数都不会被修改时（str/bytes/数字、Truncated(bytes) 等），消息也在写日志线程中格式化。
+        """
+        record = copy.copy(record)
+        if not (isinstance(record.msg, str) and _is_immutable_args(record.args)):
+            record.message = record.msg = record.getMessage()
+            record.args = None
+
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+    def enqueue(self, record):
+        if self.policy == QUEUE_FULL_BLOCK:
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped.inc()
+
+
+class _LogQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # 队列满时也要等待停止标记放入队列，保证之前的日志都被写入
+        self.queue.put(self._sentinel)
+
+
+def stop_log_queue():
+    """停止写日志线程，队列中的日志全部写入后返回（进程退出时自动调用）"""
+    global _queue_listener
+    if _queue_listener is None:
+        return
+
+    listener, _queue_listener = _queue_listener, None
+    listener.stop()
+
+    for handler in listener.handlers:
+        handler.flush()
+
 
 class LevelFilter(logging.Filter):
     def __init__(self, level, name=''):
@@ -100,9 +381,10 @@ class LevelFilter(logging.Filter):
         return 1
 
 
-def create_file_handler(filename, formatter, level, backup_count, max_bytes):
+def create_file_handler(filename, formatter, level, backup_count, max_bytes, compress=None):
     handler = RotatingFileHandler(filename, when='midnight', interval=1,
-                                  backup_count=backup_count, max_bytes=max_bytes, encoding='utf-8')
+                                  backup_count=backup_count, max_bytes=max_bytes, encoding='utf-8',
+                                  compress=compress)
     handler.setFormatter(formatter)
     handler.setLevel(level)
 
@@ -122,7 +404,18 @@ def init_stdio_logger():
 
 
 def init_logger(log_folder='', redirect_stdio=False, stdio_handler=True,
-                file_handler=True, thread_logger=False, detail=False, formatter=None, level_names=None):
+                file_handler=True, thread_logger=False, detail=False, formatter=None, level_names=None,
+                queue_size=0, queue_full_policy=QUEUE_FULL_DROP, compress=None):
+    """初始化 root logger。
+
+    queue_size 大于 0 时，日志先放入有上限的队列，由单独的线程写入文件和控制台，
+    调用日志的线程（例如事件循环）不会因为磁盘慢而阻塞。队列满时按 queue_full_policy
+    丢弃（计数器 logging_dropped_records）或者等待。
+
+    compress 为 gzip 或 zstd 时，归档的日志文件在后台线程中压缩。
+
+    formatter 为 LOG_FORMAT_JSON 时输出 json 格式的日志（JsonFormatter）。
+    """
     # Create a new handler for "root logger" on console (stdout):
     # logging.basicConfig(level=logging.DEBUG, format='%(asctime)-15s %(name)-5s %(levelname)-5s %(message)s')
 
@@ -161,21 +454,23 @@ def init_logger(log_folder='', redirect_stdio=False, stdio_handler=True,
 
     logger.setLevel(logging.DEBUG)
 
-    if not formatter:
-        formatter = _get_log_formatter(threading=thread_logger, detail=detail)
-
-    formatter = logging.Formatter(formatter)
+    if formatter == LOG_FORMAT_JSON:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(formatter or _get_log_formatter(threading=thread_logger, detail=detail))
 
     if file_handler:
         # interval = 1
         backup_count = 5000
 
         # debug log
-        debug_handle = create_file_handler(debug_log, formatter, logging.DEBUG, backup_count, 1280 * 1024 * 1024)
+        debug_handle = create_file_handler(debug_log, formatter, logging.DEBUG, backup_count, 1280 * 1024 * 1024,
+                                           compress=compress)
         logger.addHandler(debug_handle)
 
         # access log
-        access_handle = create_file_handler(access_log, formatter, ACCESS, backup_count, 512 * 1024 * 1024)
+        access_handle = create_file_handler(access_log, formatter, ACCESS, backup_count, 512 * 1024 * 1024,
+                                            compress=compress)
 
         access_filter = LevelFilter(ACCESS, 'access_filter')
         access_handle.addFilter(access_filter)
@@ -183,7 +478,8 @@ def init_logger(log_folder='', redirect_stdio=False, stdio_handler=True,
         logger.addHandler(access_handle)
 
         # monitor log
-        monitor_handler = create_file_handler(monitor_log, formatter, logging.CRITICAL, backup_count, 128 * 1024 * 1024)
+        monitor_handler = create_file_handler(monitor_log, formatter, logging.CRITICAL, backup_count, 128 * 1024 * 1024,
+                                              compress=compress)
         logger.addHandler(monitor_handler)
 
         if redirect_stdio:
@@ -205,6 +501,36 @@ def init_logger(log_folder='', redirect_stdio=False, stdio_handler=True,
         logger.addHandler(h1)
         logger.addHandler(h2)
 
+    if queue_size > 0:
+        _start_log_queue(queue_size, queue_full_policy)
+
+
+def _start_log_queue(queue_size, queue_full_policy):
+    """把 root logger 的 handler 移到写日志线程中，root logger 只保留队列"""
+    global _queue_listener
+    old_listener = _queue_listener
+    stop_log_queue()
+
+    # 再次初始化时，去掉原来的队列，原来写日志线程中的 handler 不再使用
+    handlers = []
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        if isinstance(handler, QueueHandler):
+            handler.close()
+        else:
+            handlers.append(handler)
+
+    if old_listener is not None:
+        for handler in old_listener.handlers:
+            if handler not in handlers:
+                handler.close()
+
+    log_queue = queue.Queue(queue_size)
+    logger.addHandler(BoundedQueueHandler(log_queue, queue_full_policy))
+
+    _queue_listener = _LogQueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+
 
 def _create_stream_handler(stream, formatter, level):
     ch = logging.StreamHandler(stream)
@@ -238,6 +564,9 @@ def _get_log_formatter(threading=False, detail=False):
     return formatter + " " + LOG_MESSAGE
 
 
+atexit.register(stop_log_queue)
+
+
 # Test Codes
 if __name__ == "__main__":
     init_logger()
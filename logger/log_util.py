@@ -1,6 +1,11 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 # created: 2015-03-16
+import codecs
+import logging
+import random
+import sys
+import threading
 import time
 import traceback
 
@@ -83,3 +88,193 @@ def log_callback(logger, name=None):
 
         return _func_logger
     return _func_logger_decorator
+
+
+class LazyArg(object):
+    """日志参数，在日志被格式化时才计算（日志级别不够时不计算）：
+
+    logger.debug("payload: %s", LazyArg(payload.dumps))
+    """
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
+
+    __repr__ = __str__
+
+
+class Truncated(object):
+    """日志参数，格式化时只输出前 limit 个字符（bytes 按 utf-8 解码，长度为字节数）。
+
+    str/bytes 在创建时就截断（只保留前 limit 个字符和原来的长度），
+    日志在队列中等待时不会占用整个内容的内存。
+    """
+    __slots__ = ("value", "limit", "size")
+
+    def __init__(self, value, limit=1024):
+        self.limit = limit
+        self.size = None
+
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            self.size = len(value)
+            value = bytes(value[:limit])
+        elif isinstance(value, str):
+            self.size = len(value)
+            value = value[:limit]
+
+        self.value = value
+
+    @property
+    def immutable(self):
+        """内容不会被修改，可以推迟到写日志线程中格式化"""
+        return isinstance(self.value, (str, bytes))
+
+    def __str__(self):
+        value = self.value
+        unit = "chars"
+        if isinstance(value, bytes):
+            size = self.size
+            unit = "bytes"
+            # 截断处不完整的 utf-8 字符不输出
+            text = codecs.getincrementaldecoder("utf-8")("replace").decode(value)
+        else:
+            text = str(value)
+            size = len(text) if self.size is None else self.size
+            text = text[:self.limit]
+
+        if size > self.limit:
+            return "%s...(%s %s)" % (text, size, unit)
+
+        return text
+
+    __repr__ = __str__
+
+
+class ThrottledLogger(object):
+    """用于高频调用的日志：先按 sample_rate 采样，再按调用位置限制频率。
+
+    每个调用位置（文件和行号）每秒最多输出 per_second 条，被抑制的条数在这一秒结束后
+    以该位置的名义单独输出一条日志。高于 max_level 的日志（缺省为 ERROR）不采样、不限制。
+    """
+
+    # 汇总被抑制的日志的检查间隔（秒）
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, logger, per_second=10, sample_rate=1.0, max_level=logging.WARNING, clock=time.monotonic):
+        self.logger = logger
+        self.per_second = per_second
+        self.sample_rate = sample_rate
+        self.max_level = max_level
+
+        self._clock = clock
+
+        # (code, lineno) -> [当前秒, 已输出条数, 被抑制条数, 被抑制的第一条日志]
+        self._sites = {}
+        self._second = None
+
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _log(self, level, msg, args, kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+
+        # 日志中的文件和行号使用调用者的位置
+        kwargs.setdefault("stacklevel", 3)
+
+        if level > self.max_level:
+            self.logger.log(level, msg, *args, **kwargs)
+            return
+
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        now = int(self._clock())
+        if now != self._second:
+            self._second = now
+            self.flush()
+
+        frame = sys._getframe(2)
+        key = (frame.f_code, frame.f_lineno)
+
+        site = self._sites.get(key, None)
+        if site is None:
+            site = self._sites[key] = [now, 0, 0, None]
+
+        if site[0] != now:
+            site[0], site[1] = now, 0
+
+        if site[1] >= self.per_second:
+            with self._lock:
+                if not site[2]:
+                    site[3] = (level, frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name, msg)
+                site[2] += 1
+
+            self._schedule_flush()
+            return
+
+        site[1] += 1
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def flush(self):
+        """输出之前各秒被抑制的条数，返回是否还有没有输出的（当前这一秒的）"""
+        now = int(self._clock())
+
+        suppressed = []
+        pending = False
+        with self._lock:
+            for site in self._sites.values():
+                if not site[2]:
+                    continue
+
+                if site[0] == now:
+                    pending = True
+                    continue
+
+                suppressed.append((site[2], site[3]))
+                site[2], site[3] = 0, None
+
+        for count, (level, pathname, lineno, func_name, msg) in suppressed:
+            record = self.logger.makeRecord(self.logger.name, level, pathname, lineno,
+                                            "%s similar messages suppressed: %s", (count, msg), None, func_name)
+            self.logger.handle(record)
+
+        return pending
+
+    def _schedule_flush(self):
+        """调用位置之后可能不再输出日志，由定时器输出被抑制的条数"""
+        if self._timer is not None:
+            return
+
+        with self._lock:
+            if self._timer is not None:
+                return
+
+            self._timer = threading.Timer(self.FLUSH_INTERVAL, self._flush_later)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_later(self):
+        self._timer = None
+        if self.flush():
+            self._schedule_flush()
+
+    def debug(self, msg, *args, **kwargs):
+        self._log(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._log(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._log(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self._log(logging.ERROR, msg, args, kwargs)
+
+    def exception(self, msg, *args, **kwargs):
+        kwargs.setdefault("exc_info", True)
+        self._log(logging.ERROR, msg, args, kwargs)
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*- 
+# created: 2021-06-22
+# creator: liguopeng@liguopeng.net
+
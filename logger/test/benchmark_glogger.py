@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""RotatingFileHandler 的写日志性能对比（手工运行，不在单元测试中执行）
+
+python -m gcommon.logger.test.benchmark_glogger
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from logging.handlers import TimedRotatingFileHandler
+
+from gcommon.logger import glogger
+
+
+class _LegacyRotatingFileHandler(glogger.RotatingFileHandler):
+    """原来的实现：每条日志格式化两次，并且 seek/tell，作为对比"""
+
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+
+        if self.maxBytes > 0:
+            msg = "%s\n" % self.format(record)
+            self.stream.seek(0, 2)
+
+            if self.stream.tell() + len(msg) >= self.maxBytes:
+                return True
+
+        return TimedRotatingFileHandler.shouldRollover(self, record)
+
+    def emit(self, record):
+        TimedRotatingFileHandler.emit(self, record)
+
+
+def _run(handler_class, number, max_bytes, **kwargs):
+    folder = tempfile.mkdtemp()
+    handler = handler_class(os.path.join(folder, "debug.log"), max_bytes=max_bytes, encoding="utf-8", **kwargs)
+    handler.setFormatter(logging.Formatter(glogger.LOG_FORMAT))
+
+    test_logger = logging.Logger("benchmark")
+    test_logger.addHandler(handler)
+
+    start = time.perf_counter()
+    for i in range(number):
+        test_logger.info("request processed, user=%s, path=%s, cost=%.3f", i, "/api/v1/items", 0.001)
+
+    elapsed = time.perf_counter() - start
+
+    handler.close()
+    glogger.wait_for_compression()
+    shutil.rmtree(folder)
+
+    return number / elapsed
+
+
+def main():
+    number = 200000
+    max_bytes = 4 * 1024 * 1024
+
+    print("legacy handler:    %.0f records/s" % _run(_LegacyRotatingFileHandler, number, max_bytes))
+    print("size tracking:     %.0f records/s" % _run(glogger.RotatingFileHandler, number, max_bytes))
+    print("size tracking+gz:  %.0f records/s" % _run(glogger.RotatingFileHandler, number, max_bytes,
+                                                     compress=glogger.COMPRESS_GZIP))
+
+
+if __name__ == '__main__':
+    main()
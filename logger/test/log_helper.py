@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""日志测试的辅助工具"""
+
+import logging
+
+
+class ListHandler(logging.Handler):
+    """保存所有日志记录（records），设置了 formatter 时同时保存格式化后的文本（lines）"""
+
+    def __init__(self, formatter=None):
+        logging.Handler.__init__(self)
+        if formatter:
+            self.setFormatter(formatter)
+
+        self.records = []
+        self.lines = []
+
+    def emit(self, record):
+        self.records.append(record)
+        if self.formatter:
+            self.lines.append(self.format(record))
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import datetime
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+
+from gcommon.logger import glogger
+from gcommon.logger.log_util import Truncated
+from gcommon.logger.test.log_helper import ListHandler
+from gcommon.utils.gcounter import Counter
+
+
+def _reset_root_logger():
+    glogger.stop_log_queue()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def test_log_queue():
+    log_folder = tempfile.mkdtemp()
+    glogger.init_logger(log_folder, stdio_handler=False, queue_size=100, queue_full_policy=glogger.QUEUE_FULL_BLOCK)
+
+    try:
+        root = logging.getLogger()
+        assert len(root.handlers) == 1
+        assert isinstance(root.handlers[0], glogger.BoundedQueueHandler)
+
+        test_logger = logging.getLogger("test_queue")
+        for i in range(1000):
+            test_logger.debug("message %s", i)
+
+        test_logger.access("access %s", 1)
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            test_logger.exception("failed")
+    finally:
+        # 停止时写入队列中所有的日志
+        _reset_root_logger()
+
+    with open(os.path.join(log_folder, "debug.log"), encoding="utf-8") as f:
+        content = f.read()
+
+    assert "message 999" in content
+    assert content.count("test_queue") == 1002
+    assert "ValueError: bad value" in content
+
+    with open(os.path.join(log_folder, "access.log"), encoding="utf-8") as f:
+        assert f.read().strip().endswith("access 1")
+
+
+def test_log_queue_init_twice():
+    log_folder = tempfile.mkdtemp()
+    glogger.init_logger(log_folder, stdio_handler=False, queue_size=2, queue_full_policy=glogger.QUEUE_FULL_BLOCK)
+
+    try:
+        glogger.init_logger(log_folder, stdio_handler=False, queue_size=2,
+                            queue_full_policy=glogger.QUEUE_FULL_BLOCK)
+
+        root = logging.getLogger()
+        assert len(root.handlers) == 1
+
+        handlers = glogger._queue_listener.handlers
+        assert not any(isinstance(handler, glogger.BoundedQueueHandler) for handler in handlers)
+        assert len(handlers) == 3
+
+        # 原来的队列不在写日志线程中，不会阻塞
+        test_logger = logging.getLogger("test_queue_twice")
+        for i in range(10):
+            test_logger.debug("message %s", i)
+    finally:
+        _reset_root_logger()
+
+    with open(os.path.join(log_folder, "debug.log"), encoding="utf-8") as f:
+        assert f.read().count("test_queue_twice") == 10
+
+
+def test_log_queue_drop():
+    dropped = Counter.get(glogger.DROPPED_RECORDS_COUNTER_NAME)
+    old_value = dropped.value
+
+    handler = glogger.BoundedQueueHandler(queue.Queue(2))
+    for i in range(5):
+        handler.handle(logging.makeLogRecord({"msg": "message %s" % i}))
+
+    assert handler.queue.qsize() == 2
+    assert dropped.value - old_value == 3
+
+
+def test_log_queue_block():
+    log_queue = queue.Queue(1)
+    handler = glogger.BoundedQueueHandler(log_queue, glogger.QUEUE_FULL_BLOCK)
+    handler.handle(logging.makeLogRecord({"msg": "first"}))
+
+    blocked = threading.Thread(target=handler.handle, args=(logging.makeLogRecord({"msg": "second"}),))
+    blocked.start()
+    blocked.join(0.05)
+    assert blocked.is_alive()
+
+    assert log_queue.get().msg == "first"
+    blocked.join()
+    assert log_queue.get().msg == "second"
+
+
+def test_log_queue_defer_format():
+    handler = glogger.BoundedQueueHandler(queue.Queue(10))
+
+    # 参数不会被修改，在写日志线程中格式化
+    args = ("/api", 200, b"body", Truncated(b"response", 4))
+    record = handler.prepare(logging.makeLogRecord({"msg": "%s %s %s %s", "args": args}))
+    assert record.args == args
+    assert record.getMessage() == "/api 200 b'body' resp...(8 bytes)"
+
+    # 可变参数在调用日志的线程中格式化
+    items = [1, 2]
+    record = handler.prepare(logging.makeLogRecord({"msg": "%s %s", "args": (items, Truncated(items))}))
+    items.append(3)
+    assert record.args is None
+    assert record.msg == "[1, 2] [1, 2]"
+
+
+def _write_records(handler, count, message="message"):
+    for i in range(count):
+        handler.handle(logging.makeLogRecord({"msg": "%s %04d" % (message, i)}))
+
+
+def test_rotating_size():
+    log_file = os.path.join(tempfile.mkdtemp(), "debug.log")
+    handler = glogger.RotatingFileHandler(log_file, max_bytes=1000, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    # 每条日志 13 字节，写入 76 条后归档
+    _write_records(handler, 100)
+    assert handler._bytes == os.path.getsize(log_file) == 24 * 13
+    handler.close()
+
+    # 重新打开时从文件读取大小，中文按 utf-8 编码的字节数计算
+    handler = glogger.RotatingFileHandler(log_file, max_bytes=1000, encoding="utf-8", delay=True)
+    _write_records(handler, 10, "中文")
+    assert handler._bytes == os.path.getsize(log_file) == 24 * 13 + 10 * 12
+    handler.close()
+
+
+def test_rotating_compress():
+    log_file = os.path.join(tempfile.mkdtemp(), "debug.log")
+    handler = glogger.RotatingFileHandler(log_file, max_bytes=1000, encoding="utf-8",
+                                          compress=glogger.COMPRESS_GZIP)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    _write_records(handler, 100)
+    handler.close()
+    glogger.wait_for_compression()
+
+    rotated = glob.glob(log_file + ".*")
+    assert len(rotated) == 1 and rotated[0].endswith(".gz")
+
+    with gzip.open(rotated[0], "rt", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    assert len(lines) == 76
+    assert lines[0] == "message 0000"
+
+
+class _Lazy(object):
+    formatted = 0
+
+    def __str__(self):
+        _Lazy.formatted += 1
+        return "lazy"
+
+
+def test_json_formatter():
+    handler = ListHandler(glogger.JsonFormatter())
+
+    test_logger = logging.Logger("test_json", logging.INFO)
+    test_logger.addHandler(handler)
+
+    # 日志级别不够时不格式化消息
+    lazy = _Lazy()
+    test_logger.debug("value: %s", lazy)
+    assert _Lazy.formatted == 0
+
+    test_logger.info("value: %s, 中文", lazy)
+    assert _Lazy.formatted == 1
+
+    test_logger.log(glogger.ACCESS, "request %s", "/api",
+                    extra=glogger.access_extra("GET", "/api", 200, 1.5, user=1))
+
+    try:
+        raise ValueError("bad value")
+    except ValueError:
+        test_logger.exception("failed")
+
+    first, access, error = [json.loads(line) for line in handler.lines]
+    assert "\n" not in handler.lines[0]
+
+    assert first["message"] == "value: lazy, 中文"
+    assert first["level"] == logging.getLevelName(logging.INFO)
+    assert first["logger"] == "test_json"
+    assert first["thread"] == "MainThread"
+    assert len(first["time"]) == len("2026-10-17T12:00:00.000+08:00")
+
+    # 带时区的 ISO 8601 时间
+    created = datetime.datetime.fromisoformat(first["time"])
+    assert abs(created.timestamp() - time.time()) < 10
+
+    assert access["message"] == "request /api"
+    assert access["method"] == "GET" and access["path"] == "/api"
+    assert access["status"] == 200 and access["latency"] == 1.5 and access["user"] == 1
+
+    assert error["message"] == "failed"
+    assert "ValueError: bad value" in error["exception"]
+
+
+def test_json_log_queue():
+    log_folder = tempfile.mkdtemp()
+    glogger.init_logger(log_folder, stdio_handler=False, formatter=glogger.LOG_FORMAT_JSON,
+                        queue_size=100, queue_full_policy=glogger.QUEUE_FULL_BLOCK)
+
+    try:
+        test_logger = logging.getLogger("test_json_queue")
+        test_logger.access("request %s", "/api", extra=glogger.access_extra("POST", "/api", 500))
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            test_logger.exception("failed")
+    finally:
+        _reset_root_logger()
+
+    with open(os.path.join(log_folder, "access.log"), encoding="utf-8") as f:
+        access = json.loads(f.read())
+
+    assert access["message"] == "request /api"
+    assert access["method"] == "POST" and access["status"] == 500
+
+    with open(os.path.join(log_folder, "debug.log"), encoding="utf-8") as f:
+        error = json.loads(f.read().splitlines()[-1])
+
+    assert error["message"] == "failed"
+    assert "ValueError: bad value" in error["exception"]
+
+
+if __name__ == '__main__':
+    test_log_queue()
+    test_log_queue_init_twice()
+    test_log_queue_drop()
+    test_log_queue_block()
+    test_log_queue_defer_format()
+    test_rotating_size()
+    test_rotating_compress()
+    test_json_formatter()
+    test_json_log_queue()
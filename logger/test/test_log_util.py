@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import logging
+
+from gcommon.logger.log_util import LazyArg, ThrottledLogger, Truncated
+from gcommon.logger.test.log_helper import ListHandler
+
+
+def _create_logger(level=logging.DEBUG):
+    handler = ListHandler()
+
+    test_logger = logging.Logger("test_log_util", level)
+    test_logger.addHandler(handler)
+    return test_logger, handler
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lazy_arg():
+    called = []
+
+    def dumps():
+        called.append(1)
+        return "payload"
+
+    test_logger, handler = _create_logger(logging.INFO)
+    test_logger.debug("message: %s", LazyArg(dumps))
+    assert not called
+
+    test_logger.info("message: %s", LazyArg(dumps))
+    assert handler.records[0].getMessage() == "message: payload"
+    assert called == [1]
+
+
+def test_truncated():
+    assert str(Truncated("abc", 5)) == "abc"
+    assert str(Truncated("abcdefgh", 5)) == "abcde...(8 chars)"
+    assert str(Truncated("中文中文", 2)) == "中文...(4 chars)"
+    assert str(Truncated("中文".encode("utf-8"), 3)) == "中...(6 bytes)"
+    assert str(Truncated("中文".encode("utf-8"), 4)) == "中...(6 bytes)"
+
+
+def test_rate_limit():
+    clock = _Clock()
+    test_logger, handler = _create_logger()
+    throttled = ThrottledLogger(test_logger, per_second=3, clock=clock)
+
+    def log_messages(start, end):
+        for i in range(start, end):
+            throttled.info("message %s", i)
+            throttled.warning("other")
+
+    log_messages(0, 10)
+
+    # 每个调用位置分别计数
+    assert [record.getMessage() for record in handler.records] == [
+        "message 0", "other", "message 1", "other", "message 2", "other"]
+
+    # 记录调用者的位置
+    assert handler.records[0].funcName == "log_messages"
+
+    clock.now += 1
+    log_messages(10, 12)
+
+    # 下一秒先输出被抑制的条数（使用原来的调用位置）
+    assert [record.getMessage() for record in handler.records[6:]] == [
+        "7 similar messages suppressed: message %s", "7 similar messages suppressed: other",
+        "message 10", "other", "message 11", "other"]
+    assert handler.records[6].funcName == "log_messages"
+    assert handler.records[6].levelno == logging.INFO
+
+    # 调用位置之后不再输出日志时，由 flush（定时器）输出
+    log_messages(12, 20)
+    assert len(handler.records) == 14
+    assert throttled.flush()
+
+    clock.now += 1
+    assert not throttled.flush()
+    assert [record.getMessage() for record in handler.records[14:]] == [
+        "7 similar messages suppressed: message %s", "7 similar messages suppressed: other"]
+
+
+def test_errors_not_throttled():
+    test_logger, handler = _create_logger()
+    throttled = ThrottledLogger(test_logger, per_second=1, sample_rate=0, clock=_Clock())
+
+    for i in range(5):
+        throttled.error("error %s", i)
+
+    assert len(handler.records) == 5
+    assert handler.records[0].funcName == "test_errors_not_throttled"
+
+    # max_level=ERROR 时错误日志同样限制频率（web_router 的异常日志）
+    clock = _Clock()
+    throttled = ThrottledLogger(test_logger, per_second=1, max_level=logging.ERROR, clock=clock)
+    for i in range(5):
+        throttled.error("error %s", i)
+
+    assert len(handler.records) == 6
+
+    clock.now += 1
+    throttled.flush()
+    assert handler.records[-1].getMessage() == "4 similar messages suppressed: error %s"
+    assert handler.records[-1].levelno == logging.ERROR
+
+
+def test_sampling():
+    test_logger, handler = _create_logger()
+    throttled = ThrottledLogger(test_logger, per_second=100000, sample_rate=0.1)
+
+    for i in range(10000):
+        throttled.debug("message %s", i)
+
+    assert 700 < len(handler.records) < 1300
+
+    # 日志级别不够时不采样、不计数
+    test_logger.setLevel(logging.INFO)
+    throttled.debug("message")
+    assert not throttled._sites or all(site[2] == 0 for site in throttled._sites.values())
+
+
+if __name__ == '__main__':
+    test_lazy_arg()
+    test_truncated()
+    test_rate_limit()
+    test_errors_not_throttled()
+    test_sampling()
@@ -96,14 +96,17 @@ def _get_log_folder(options):
     return log_folder
 
     
-def init_logger(options, *, thread_logger=False, formatter=None, file_handler=True, level_names=None):
+def init_logger(options, *, thread_logger=False, formatter=None, file_handler=True, level_names=None,
+                queue_size=0, queue_full_policy=glogger.QUEUE_FULL_DROP, compress=None):
     log_folder = _get_log_folder(options)
     # TODO: stdio_handler should be False in production environment
     glogger.init_logger(log_folder, redirect_stdio=False,
                         stdio_handler=True, file_handler=file_handler,
                         detail=options.log_line_no,
                         thread_logger=options.multi_thread or thread_logger,
-                        formatter=formatter, level_names=level_names)
+                        formatter=formatter, level_names=level_names,
+                        queue_size=queue_size, queue_full_policy=queue_full_policy,
+                        compress=compress)
  
 
 def server_init(parse_command_line, DEFAULT_CONFIG=None):
@@ -11,6 +11,8 @@ import time
 from twisted.internet.defer import inlineCallbacks, maybeDeferred
 
 from gcommon.error.gerror import GExcept
+from gcommon.logger import glogger
+from gcommon.logger.log_util import LazyArg, ThrottledLogger, Truncated
 from gcommon.utils import gtime
 from gcommon.utils.gjsonobj import JsonObject
 from gcommon.error import *
@@ -19,6 +21,11 @@ from gcommon.twisted.web.web_utils import WebConst, set_options_methods
 
 
 logger = logging.getLogger('Router')
+# 处理函数的异常日志每秒最多 10 条，被抑制的条数在下一秒汇总输出
+throttled_logger = ThrottledLogger(logger, per_second=10, max_level=logging.ERROR)
+
+# access log 中请求和响应内容的最大长度
+BODY_LOG_LIMIT = 1024
 
 
 def url_route(url_pattern, **args):
@@ -140,8 +147,9 @@ class WebNavigator(object):
                 try:
                     f.raiseException()
                 except Exception as e:
-                    logger.error('%s - error - exception: %s, stack: \n%s', view_func.__name__,
-                                 f.getErrorMessage(), ''.join(traceback.format_tb(f.getTracebackObject())))
+                    throttled_logger.error('%s - error - exception: %s, stack: \n%s', view_func.__name__,
+                                           f.getErrorMessage(),
+                                           LazyArg(lambda: ''.join(traceback.format_tb(f.getTracebackObject()))))
 
                     result = JsonObject()
                     if isinstance(e, GExcept):
@@ -165,10 +173,12 @@ class WebNavigator(object):
         request.setHeader('Content-Type', 'application/json')
         request.write(result.dumps().encode('utf-8'))
 
+        latency = gtime.past_millisecond(when_started)
         logger.access('processed %s request from %s:%s: %sms - %s - %s - %s',
                       method, request.client.host, request.client.port,
-                      gtime.past_millisecond(when_started),
-                      path, request.loaded_content, result)
+                      latency, path, Truncated(request.loaded_content, BODY_LOG_LIMIT),
+                      Truncated(result, BODY_LOG_LIMIT),
+                      extra=glogger.access_extra(method, path, request.code, latency, code=result.get("code")))
         request.finish()
 
 
@@ -2,7 +2,15 @@
 # -*- coding: utf-8 -*-
 # created: 2015-08-19
 
-"""计数器、计时器、序号发生器等。"""
+"""计数器、计时器、序号发生器等。
+
+Counter/Gauge/Timer 可以在多个线程中同时使用：每个线程写自己的分片，读取时合并，
+写操作不需要加锁。
+"""
+import array
+import itertools
+import math
+import threading
 import time
 from contextlib import contextmanager
 
@@ -10,20 +18,26 @@ from contextlib import contextmanager
 class _Register(object):
     """具有名称的对象的全局注册表"""
     _items = None
+    _lock = threading.RLock()
 
     @classmethod
     def register(cls, name, item):
-        cls._initialize()
-        assert cls._items.get(name, None) is None
-        cls._items[name] = item
+        with cls._lock:
+            cls._initialize()
+            assert cls._items.get(name, None) is None
+            cls._items[name] = item
 
     @classmethod
     def get(cls, name):
         cls._initialize()
 
         item = cls._items.get(name, None)
-        if not item:
-            item = cls(name)
+        if item is None:
+            with cls._lock:
+                # 多个线程同时首次使用时，只创建一次
+                item = cls._items.get(name, None)
+                if item is None:
+                    item = cls(name)
 
         return item
 
@@ -35,18 +49,79 @@ class _Register(object):
     @classmethod
     def _initialize(cls):
         if cls._items is None:
-            cls._items = {}
+            with cls._lock:
+                if cls._items is None:
+                    cls._items = {}
+
+
+class _Shards(object):
+    """按线程分片的一组数值（每个分片是长度为 width 的 list）。
+
+    每个线程只写自己的分片，因此写操作不需要加锁；读取时合并所有分片。
+    已经退出的线程的分片在读取时合并到 _base 中，避免分片无限增长。
+    """
+
+    def __init__(self, width=1):
+        self._width = width
+        self._local = threading.local()
+        self._shards = []
+        self._base = self._new_value()
+        self._lock = threading.Lock()
+
+    def shard(self) -> list:
+        """当前线程的分片"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            return self._new_shard()
+
+    def _new_value(self):
+        return [0] * self._width
+
+    def _new_shard(self):
+        shard = self._new_value()
+        with self._lock:
+            self._shards.append((threading.current_thread(), shard))
+
+        self._local.shard = shard
+        return shard
+
+    def sum(self) -> list:
+        """合并所有分片"""
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge(self._base, shard)
+
+            self._shards = alive
+
+            total = self._new_value()
+            self._merge(total, self._base)
+            for _thread, shard in alive:
+                self._merge(total, shard)
+
+        return total
+
+    def _merge(self, values, shard):
+        for index, value in enumerate(shard):
+            values[index] += value
 
 
 class Sequence(object):
-    """序列号生成器"""
+    """序列号生成器，可以在多个线程中使用"""
     def __init__(self, start=0, step=1):
         self.value = start
         self.step = step
+        # itertools.count 的 next 是原子操作
+        self._counter = itertools.count(start + step, step)
 
     def next_value(self):
-        self.value += self.step
-        return self.value
+        value = next(self._counter)
+        self.value = value
+        return value
 
     def __str__(self):
         return str(self.value)
@@ -72,36 +147,184 @@ class SimpleCounter(object):
         return str(self._value)
 
 
-class Counter(SimpleCounter, _Register):
-    """有名称的计数器将被存入全局注册表。"""
-    def __init__(self, name=None):
-        SimpleCounter.__init__(self)
-        if name:
-            self.register(name, self)
+class RateMeter(object):
+    """最近一段时间的速率（例如最近 1/5/15 分钟每秒的请求数）。
+
+    用 array 实现的环形缓冲区，每秒一个桶，保存最近 seconds 秒的数据。
+    每个线程先在自己的分片 [秒, 数量] 中累加当前这一秒的数量，进入下一秒时才加锁
+    写入环形缓冲区；读取时合并各线程还没有写入的数量。
+    """
+
+    # 缺省的统计窗口：名称 -> 秒数
+    WINDOWS = (("m1", 60), ("m5", 300), ("m15", 900))
+
+    def __init__(self, seconds=900, clock=time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self._buckets = array.array("d", bytes(8 * seconds))
+        self._zeros = array.array("d", bytes(8 * seconds))
+
+        # 最后一个桶对应的时间（秒）
+        self._last = int(clock())
+        self._lock = threading.Lock()
+
+        # 各线程的分片：[(thread, [秒, 数量])]
+        self._local = threading.local()
+        self._pending = []
+
+    def _advance(self, now):
+        """清空从上次记录到 now 之间过期的桶"""
+        passed = now - self._last
+        if passed <= 0:
+            return
+
+        self._last = now
+        if passed >= self.seconds:
+            self._buckets[:] = self._zeros
+            return
+
+        start = (now - passed + 1) % self.seconds
+        end = start + passed
+        if end <= self.seconds:
+            self._buckets[start:end] = self._zeros[:passed]
+        else:
+            self._buckets[start:] = self._zeros[start:]
+            self._buckets[:end - self.seconds] = self._zeros[:end - self.seconds]
+
+    def _new_shard(self, now):
+        shard = [now, 0]
+        with self._lock:
+            self._pending.append((threading.current_thread(), shard))
+
+        self._local.shard = shard
+        return shard
+
+    def _flush(self, shard):
+        """把分片的数量写入环形缓冲区（调用者持有锁）"""
+        second, count = shard
+        shard[1] = 0
+        if not count:
+            return
+
+        if second > self._last:
+            self._advance(second)
+
+        if second > self._last - self.seconds:
+            self._buckets[second % self.seconds] += count
+
+    def mark(self, count=1):
+        now = int(self._clock())
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard(now)
+
+        if shard[0] != now:
+            with self._lock:
+                self._flush(shard)
+                shard[0] = now
+
+        shard[1] += count
+
+    def total(self, window):
+        """最近 window 秒（包括当前这一秒）的总数"""
+        window = min(window, self.seconds)
+        with self._lock:
+            self._advance(int(self._clock()))
+            first = self._last - window
+
+            # 已经退出的线程的分片写入环形缓冲区，其他线程的分片只读取
+            pending = 0
+            alive = []
+            for thread, shard in self._pending:
+                if not thread.is_alive():
+                    self._flush(shard)
+                    continue
+
+                alive.append((thread, shard))
+                second, count = shard
+                if first < second <= self._last:
+                    pending += count
+
+            self._pending = alive
+
+            end = self._last % self.seconds + 1
+            start = end - window
+            if start >= 0:
+                return sum(self._buckets[start:end]) + pending
+
+            return sum(self._buckets[start:]) + sum(self._buckets[:end]) + pending
+
+    def rate(self, window):
+        """最近 window 秒的平均速率（每秒）"""
+        return self.total(window) / min(window, self.seconds)
+
+    def rates(self) -> dict:
+        """各个缺省窗口的速率，{"m1": ..., "m5": ..., "m15": ...}"""
+        return {name: self.rate(window) for name, window in self.WINDOWS}
+
+
+class ShardedCounter(object):
+    """线程安全的计数器：每个线程累加自己的分片，读取时合并。"""
+
+    # 导出监控数据时的类型：counter / gauge
+    metric_type = "counter"
+
+    # 调用 enable_rate 之后，inc 同时记录到 RateMeter
+    rate_meter = None
+
+    def __init__(self):
+        self._shards = _Shards()
 
     def inc(self, count=1):
-        self._value += count
+        self._shards.shard()[0] += count
+        if self.rate_meter is not None:
+            self.rate_meter.mark(count)
+
+    def enable_rate(self, seconds=900) -> RateMeter:
+        """开始统计最近一段时间的速率"""
+        if self.rate_meter is None:
+            self.rate_meter = RateMeter(seconds)
+
+        return self.rate_meter
 
     def dec(self, count=1):
-        self._value -= count
+        self._shards.shard()[0] -= count
 
     @property
     def value(self):
-        return self._value
+        return self._shards.sum()[0]
 
     def __str__(self):
-        return str(self._value)
+        return str(self.value)
+
+
+class Counter(ShardedCounter, _Register):
+    """有名称的计数器将被存入全局注册表。"""
+    def __init__(self, name=None):
+        ShardedCounter.__init__(self)
+        if name:
+            self.register(name, self)
 
     def __repr__(self):
-        return str(self._value)
+        return str(self.value)
 
 
 class Gauge(object):
+    @staticmethod
+    def get(name) -> Counter:
+        """用作 gauge 的计数器"""
+        counter = Counter.get(name)
+        if counter.metric_type != "gauge":
+            counter.metric_type = "gauge"
+
+        return counter
+
     @staticmethod
     @contextmanager
     def create(name, value=1):
         """某种状态的当前活跃数量。"""
-        counter = Counter.get(name)
+        counter = Gauge.get(name)
         try:
             counter.inc(value)
             yield counter
@@ -110,43 +333,207 @@ class Gauge(object):
         pass
 
 
+# 直方图的精度：每个 2 的幂区间分成 2 ** HISTOGRAM_SUB_BITS 个桶，相对误差不超过 1/32
+HISTOGRAM_SUB_BITS = 5
+_HISTOGRAM_EXACT = 1 << (HISTOGRAM_SUB_BITS + 1)
+_HISTOGRAM_MIN_INIT = 1 << 63
+
+
+def _bucket_index(value):
+    """数值所在的桶。小于 _HISTOGRAM_EXACT 的值每个值一个桶，之后按对数分桶"""
+    if value < _HISTOGRAM_EXACT:
+        return value
+
+    shift = value.bit_length() - HISTOGRAM_SUB_BITS - 1
+    return (shift << HISTOGRAM_SUB_BITS) + (value >> shift)
+
+
+def _bucket_range(index):
+    """桶包含的数值范围 [low, high]"""
+    if index < _HISTOGRAM_EXACT:
+        return index, index
+
+    shift = (index >> HISTOGRAM_SUB_BITS) - 1
+    mantissa = index - (shift << HISTOGRAM_SUB_BITS)
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class HistogramSnapshot(object):
+    """直方图快照（数值单位为纳秒）。可以合并多个快照，或者计算两个快照之间的增量。"""
+
+    def __init__(self, count=0, total=0, min_value=0, max_value=0, buckets=None):
+        self.count = count
+        self.total = total
+        self.min = min_value
+        self.max = max_value
+        self.buckets = buckets or {}
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def merge(self, other: "HistogramSnapshot") -> "HistogramSnapshot":
+        """合并两个快照（例如多个进程、多个计时器）"""
+        if not other.count:
+            return HistogramSnapshot(self.count, self.total, self.min, self.max, dict(self.buckets))
+
+        if not self.count:
+            return HistogramSnapshot(other.count, other.total, other.min, other.max, dict(other.buckets))
+
+        buckets = dict(self.buckets)
+        for index, count in other.buckets.items():
+            buckets[index] = buckets.get(index, 0) + count
+
+        return HistogramSnapshot(self.count + other.count, self.total + other.total,
+                                 min(self.min, other.min), max(self.max, other.max), buckets)
+
+    def since(self, previous: "HistogramSnapshot") -> "HistogramSnapshot":
+        """从 previous 到当前快照之间的增量。
+
+        增量的 min/max 无法精确得到，取首尾非空桶的边界（桶精度）。
+        """
+        buckets = {}
+        for index, count in self.buckets.items():
+            count -= previous.buckets.get(index, 0)
+            if count:
+                buckets[index] = count
+
+        if not buckets:
+            return HistogramSnapshot()
+
+        min_value = max(_bucket_range(min(buckets))[0], self.min)
+        max_value = min(_bucket_range(max(buckets))[1], self.max)
+
+        return HistogramSnapshot(self.count - previous.count, self.total - previous.total,
+                                 min_value, max_value, buckets)
+
+    def percentile(self, percent):
+        """百分位数（percent 取值 0 ~ 100），返回所在桶的上界"""
+        if not self.count:
+            return 0
+
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return max(min(_bucket_range(index)[1], self.max), self.min)
+
+        return self.max
+
+    def summary(self, scale=1000000):
+        """count/min/max/mean 以及 p50/p90/p99/p999，数值除以 scale（默认转换成毫秒）"""
+        return {
+            "count": self.count,
+            "min": self.min / scale,
+            "max": self.max / scale,
+            "mean": self.mean / scale,
+            "p50": self.percentile(50) / scale,
+            "p90": self.percentile(90) / scale,
+            "p99": self.percentile(99) / scale,
+            "p999": self.percentile(99.9) / scale,
+        }
+
+
+class _HistogramShards(_Shards):
+    """直方图分片：[count, total, min, max, {bucket: count}]"""
+
+    def _new_value(self):
+        return [0, 0, _HISTOGRAM_MIN_INIT, 0, {}]
+
+    def _merge(self, values, shard):
+        values[0] += shard[0]
+        values[1] += shard[1]
+        values[2] = min(values[2], shard[2])
+        values[3] = max(values[3], shard[3])
+
+        buckets = values[4]
+        for index, count in list(shard[4].items()):
+            buckets[index] = buckets.get(index, 0) + count
+
+
+class Histogram(object):
+    """对数分桶的直方图，内存有上限（64 位整数最多约 1900 个桶），线程安全。"""
+
+    def __init__(self):
+        self._shards = _HistogramShards()
+
+    def record(self, value):
+        """记录一个非负整数（通常是 perf_counter_ns 得到的纳秒数）"""
+        shard = self._shards.shard()
+        shard[0] += 1
+        shard[1] += value
+        if value < shard[2]:
+            shard[2] = value
+        if value > shard[3]:
+            shard[3] = value
+
+        buckets = shard[4]
+        index = _bucket_index(value)
+        buckets[index] = buckets.get(index, 0) + 1
+
+    def snapshot(self) -> HistogramSnapshot:
+        """创建以来的累计快照"""
+        count, total, min_value, max_value, buckets = self._shards.sum()
+        if not count:
+            return HistogramSnapshot()
+
+        return HistogramSnapshot(count, total, min_value, max_value, buckets)
+
+
 class Timer(_Register):
-    """统计调用时间"""
+    """统计调用时间（直方图），可以得到 p50/p99 等百分位数"""
     @staticmethod
     @contextmanager
     def create(name):
-        """某种状态的当前活跃数量。"""
+        """记录一次调用的时间。"""
         timer = Timer.get(name)
+        start = time.perf_counter_ns()
         try:
-            start = time.time()
             yield
         finally:
-            time_past = time.time() - start
-            time_past = int(time_past * 1000)
-            timer.inc(time_past)
-        pass
+            timer.record(time.perf_counter_ns() - start)
 
     def __init__(self, name):
         self.name = name
-        self.count = 0
-        self.total_time = 0
+        self.histogram = Histogram()
+
+        # clear 时只记录清零点的快照，不修改直方图
+        self._cleared = HistogramSnapshot()
+        self._clear_lock = threading.Lock()
 
         self.register(name, self)
 
+    def record(self, time_past_ns):
+        """记录一次执行时间（纳秒）"""
+        self.histogram.record(time_past_ns)
+
     def inc(self, time_past):
-        """增加一次执行次数，并同时增加时间"""
-        self.count += 1
-        self.total_time += time_past
+        """增加一次执行次数，并同时增加时间（毫秒）"""
+        self.histogram.record(int(time_past * 1000000))
 
-    def clear(self):
-        """计算平均时间并将计时器清零"""
-        if not self.count:
-            return 0
-        average = self.total_time / self.count
-        self.count = 0
-        self.total_time = 0
+    def snapshot(self, reset=False) -> HistogramSnapshot:
+        """上次清零以来的快照；reset 为 True 时同时清零"""
+        with self._clear_lock:
+            current = self.histogram.snapshot()
+            snapshot = current.since(self._cleared)
+            if reset:
+                self._cleared = current
 
-        return average
+        return snapshot
+
+    @property
+    def count(self):
+        return self.snapshot().count
+
+    @property
+    def total_time(self):
+        """总时间（毫秒）"""
+        return self.snapshot().total / 1000000
+
+    def clear(self):
+        """计算平均时间（毫秒）并将计时器清零"""
+        return self.snapshot(reset=True).mean / 1000000
 
 
 def demo():
@@ -165,7 +552,9 @@ def demo():
             time.sleep(0.01)
 
     for name, timer in Timer.all().items():
-        # user_login 9
+        # user_login {'count': 10, 'min': 10.06, 'max': 10.2, 'mean': 10.1, 'p50': 10.09, ...}
+        print(name, timer.snapshot().summary())
+        # user_login 10.1
         print(name, timer.clear())
 
 
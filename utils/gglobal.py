@@ -12,8 +12,19 @@ class Global(object):
     # 从环境变量、命令行、配置文件加载的配置
     config = YamlConfigParser()
 
+    # 当前服务的名称、实例编号和进程标识（SimpleServer.full_server_name）
+    service_name = ""
+    instance = 0
+    full_server_name = ""
+
     @classmethod
     def set_config(cls, config: YamlConfigParser):
         cls.config = config
 
+    @classmethod
+    def set_server(cls, service_name, instance, full_server_name):
+        cls.service_name = service_name
+        cls.instance = instance
+        cls.full_server_name = full_server_name
+
 
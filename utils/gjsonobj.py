@@ -3,15 +3,276 @@
 # created: 23 Oct 2012
 # author: "Li Guo Peng" <roc.lee.80@gmail.com>
 
+import array
+import codecs
+import hashlib
+import itertools
 import json
+import re
 import sys
+from collections.abc import Mapping
 
 from gcommon.utils import gobject, gstr
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
 
 class JsonAttributeError(AttributeError): pass
 
 
+def _json_default(obj):
+    """JSONable、JsonTable 转换为 json。
+
+    与标准库 json.dumps 相同，其他类型（日期、Decimal、Enum 等）抛出 TypeError，
+    需要时由调用者通过 default 参数转换。
+    """
+    if isinstance(obj, (JSONable, JsonTable)):
+        return obj.to_json()
+
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+
+
+class _StdJsonBackend(object):
+    """标准库 json"""
+    name = "json"
+
+    def loads(self, content):
+        if isinstance(content, memoryview):
+            content = content.tobytes()
+
+        return json.loads(content)
+
+    def dumps(self, obj, indent=None, ensure_ascii=True, sort_keys=False, default=None):
+        return json.dumps(obj, ensure_ascii=ensure_ascii, indent=indent, sort_keys=sort_keys,
+                          default=default or _json_default)
+
+    def dumpb(self, obj, indent=None, ensure_ascii=False, sort_keys=False, default=None):
+        separators = None if indent else (",", ":")
+        result = json.dumps(obj, ensure_ascii=ensure_ascii, indent=indent, sort_keys=sort_keys,
+                            separators=separators, default=default or _json_default)
+        return result.encode("utf-8")
+
+
+class _OrJsonBackend(_StdJsonBackend):
+    """orjson：直接输出 utf-8 bytes，可以解析 bytes/memoryview。
+
+    orjson 不支持 ensure_ascii，此时退回到标准库；缩进固定为 2 个空格。
+    日期和 dataclass 交给 default 处理（与标准库相同），超过 64 位的整数退回到标准库。
+    与标准库不同的地方：NaN/Infinity 输出为 null，UUID 和 Enum 直接输出为字符串/值。
+    """
+    name = "orjson"
+
+    def loads(self, content):
+        return orjson.loads(content)
+
+    def dumps(self, obj, indent=None, ensure_ascii=True, sort_keys=False, default=None):
+        if ensure_ascii:
+            return _StdJsonBackend.dumps(self, obj, indent, ensure_ascii, sort_keys, default)
+
+        return self.dumpb(obj, indent, ensure_ascii, sort_keys, default).decode("utf-8")
+
+    def dumpb(self, obj, indent=None, ensure_ascii=False, sort_keys=False, default=None):
+        if ensure_ascii:
+            return _StdJsonBackend.dumpb(self, obj, indent, ensure_ascii, sort_keys, default)
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+
+        try:
+            return orjson.dumps(obj, default=default or _json_default, option=option)
+        except orjson.JSONEncodeError:
+            # 超过 64 位的整数等 orjson 不支持的内容
+            return _StdJsonBackend.dumpb(self, obj, indent, ensure_ascii, sort_keys, default)
+
+
+class _UJsonBackend(_StdJsonBackend):
+    """ujson"""
+    name = "ujson"
+
+    def loads(self, content):
+        if isinstance(content, memoryview):
+            content = content.tobytes()
+
+        return ujson.loads(content)
+
+    def dumps(self, obj, indent=None, ensure_ascii=True, sort_keys=False, default=None):
+        return ujson.dumps(obj, ensure_ascii=ensure_ascii, indent=indent or 0, sort_keys=sort_keys,
+                           escape_forward_slashes=False, default=default or _json_default)
+
+    def dumpb(self, obj, indent=None, ensure_ascii=False, sort_keys=False, default=None):
+        return self.dumps(obj, indent, ensure_ascii, sort_keys, default).encode("utf-8")
+
+
+_json_backends = {_StdJsonBackend.name: _StdJsonBackend()}
+
+if ujson:
+    _json_backends[_UJsonBackend.name] = _UJsonBackend()
+
+if orjson:
+    _json_backends[_OrJsonBackend.name] = _OrJsonBackend()
+
+# 优先使用 orjson，其次 ujson，最后是标准库
+_json_backend = _json_backends.get("orjson") or _json_backends.get("ujson") or _json_backends["json"]
+
+
+def get_json_backends():
+    """当前环境中可用的 json 后端名称"""
+    return list(_json_backends.keys())
+
+
+def get_json_backend():
+    return _json_backend.name
+
+
+def set_json_backend(name):
+    """切换 json 后端，返回原来的后端名称"""
+    global _json_backend
+
+    old_name = _json_backend.name
+    _json_backend = _json_backends[name]
+    return old_name
+
+
+def loads(content):
+    """解析 json，content 可以是 str/bytes/bytearray/memoryview"""
+    return _json_backend.loads(content)
+
+
+def dumps(obj, indent=None, ensure_ascii=True, sort_keys=False, default=None) -> str:
+    return _json_backend.dumps(obj, indent=indent, ensure_ascii=ensure_ascii,
+                               sort_keys=sort_keys, default=default)
+
+
+def dumpb(obj, indent=None, ensure_ascii=False, sort_keys=False, default=None) -> bytes:
+    """序列化成 utf-8 编码的 bytes（紧凑格式），用于网络发送"""
+    return _json_backend.dumpb(obj, indent=indent, ensure_ascii=ensure_ascii,
+                               sort_keys=sort_keys, default=default)
+
+
+class JsonStreamParser(object):
+    """增量解析 json 流，内存占用只和单个元素的大小相关。
+
+    - 缺省：顶层必须是数组，逐个返回数组元素；
+    - ndjson=True：逐个返回以空白（换行）分隔的 json 值（值本身可以是数组）。
+    """
+    _decoder = json.JSONDecoder()
+    _whitespace = re.compile(r'[ \t\n\r]*')
+
+    # 数组中下一个需要的内容
+    _EXPECT_START = 0           # [
+    _EXPECT_FIRST = 1           # 第一个元素或者 ]
+    _EXPECT_VALUE = 2           # 元素（逗号之后）
+    _EXPECT_SEPARATOR = 3       # , 或者 ]
+    _EXPECT_END = 4             # 数组已经结束，只能有空白
+
+    def __init__(self, ndjson=False):
+        self.ndjson = ndjson
+
+        self._buffer = ""
+        self._pos = 0
+        self._expect = self._EXPECT_START
+
+        # 元素不完整时，缓冲区需要达到的长度（按倍数增长，避免大元素被反复解析）
+        self._required = 0
+
+        self._utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, chunk) -> list:
+        """添加数据（str/bytes），返回已经完整解析的元素"""
+        if not isinstance(chunk, str):
+            chunk = self._utf8_decoder.decode(chunk)
+
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        self._buffer += chunk
+        if len(self._buffer) < self._required:
+            return []
+
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """数据结束，返回剩余的元素。json 不完整时抛出 JSONDecodeError"""
+        self._buffer += self._utf8_decoder.decode(b"", final=True)
+        result = self._parse(final=True)
+
+        if not self.ndjson and self._expect != self._EXPECT_END:
+            raise json.JSONDecodeError("Unterminated array", self._buffer, len(self._buffer))
+
+        return result
+
+    def _error(self, message, pos):
+        raise json.JSONDecodeError(message, self._buffer, pos)
+
+    def _parse(self, final):
+        self._required = 0
+        buffer = self._buffer
+        result = []
+
+        while True:
+            pos = self._whitespace.match(buffer, self._pos).end()
+            self._pos = pos
+            if pos == len(buffer):
+                break
+
+            if not self.ndjson:
+                char = buffer[pos]
+                expect = self._expect
+
+                if expect == self._EXPECT_END:
+                    self._error("Extra data", pos)
+
+                if expect == self._EXPECT_START:
+                    if char != "[":
+                        self._error("Expecting '['", pos)
+
+                    self._expect = self._EXPECT_FIRST
+                    self._pos = pos + 1
+                    continue
+
+                if expect == self._EXPECT_SEPARATOR or (expect == self._EXPECT_FIRST and char == "]"):
+                    if char == "]":
+                        self._expect = self._EXPECT_END
+                    elif char == ",":
+                        self._expect = self._EXPECT_VALUE
+                    else:
+                        self._error("Expecting ',' delimiter", pos)
+
+                    self._pos = pos + 1
+                    continue
+
+            try:
+                value, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+
+                self._required = (len(buffer) - pos) * 2
+                break
+
+            if end == len(buffer) and not final:
+                # 末尾的数字等标量可能还不完整
+                break
+
+            result.append(value)
+            self._pos = end
+            self._expect = self._EXPECT_SEPARATOR
+
+        return result
+
+
 class JsonObject(dict):
     def __init__(self, d=None):
         if not d:
@@ -57,30 +318,92 @@ class JsonObject(dict):
         return id(self)
 
     @staticmethod
-    def loads(json_content):
-        if not isinstance(json_content, str):
-            json_content = json_content.decode('utf-8')
+    def loads(json_content, lazy=False):
+        """解析 json（str/bytes/memoryview）。lazy=True 时返回 LazyJsonObject，嵌套对象在访问时才转换"""
+        cls = LazyJsonObject if lazy else JsonObject
 
-        j = json.loads(json_content)
+        j = _json_backend.loads(json_content)
         if isinstance(j, list):
             result = []
             for item in j:
-                result.append(JsonObject(item))
+                result.append(cls(item))
             return result
         else:
-            return JsonObject(j)
+            return cls(j)
+
+    @staticmethod
+    def iter_loads(stream, chunk_size=64 * 1024, lazy=False, ndjson=False):
+        """从文件（read 方法）或数据块迭代器中流式解析 json 数组（ndjson=True 时为 NDJSON），逐个返回元素"""
+        cls = LazyJsonObject if lazy else JsonObject
+        parser = JsonStreamParser(ndjson)
+
+        if hasattr(stream, "read"):
+            chunks = iter(lambda: stream.read(chunk_size), stream.read(0))
+        else:
+            chunks = stream
+
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                yield cls(item) if type(item) is dict else item
+
+        for item in parser.close():
+            yield cls(item) if type(item) is dict else item
+
+    @staticmethod
+    async def aiter_loads(stream, chunk_size=64 * 1024, lazy=False, ndjson=False):
+        """iter_loads 的异步版本：stream 可以是 aiohttp 的 StreamReader、aiofiles 文件等
+        （异步 read 方法），或者异步数据块迭代器"""
+        cls = LazyJsonObject if lazy else JsonObject
+        parser = JsonStreamParser(ndjson)
+
+        if hasattr(stream, "read"):
+            while True:
+                chunk = await stream.read(chunk_size)
+                if not chunk:
+                    break
+
+                for item in parser.feed(chunk):
+                    yield cls(item) if type(item) is dict else item
+        else:
+            async for chunk in stream:
+                for item in parser.feed(chunk):
+                    yield cls(item) if type(item) is dict else item
+
+        for item in parser.close():
+            yield cls(item) if type(item) is dict else item
 
     @staticmethod
     def load_obj(obj, *names):
         return JsonObject({name: getattr(obj, name) for name in names})
 
     def dumps(self, indent=None, ensure_ascii=True, sort_keys=False):
-        result = json.dumps(self, ensure_ascii=ensure_ascii, indent=indent, sort_keys=False)
+        return _json_backend.dumps(self, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
 
-        # if isinstance(result, str):
-        #    result = result.encode('utf-8')
+    def dumpb(self, indent=None, ensure_ascii=False, sort_keys=False):
+        """序列化成 utf-8 编码的 bytes"""
+        return _json_backend.dumpb(self, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
 
-        return result
+    def freeze(self):
+        """返回不可修改的副本（FrozenJsonObject），序列化结果会被缓存"""
+        return FrozenJsonObject(self)
+
+    def dumpb_msgpack(self):
+        """序列化成 msgpack（需要安装 msgpack）"""
+        from gcommon.utils import gmsgpack
+        return gmsgpack.packb(self)
+
+    @staticmethod
+    def loads_msgpack(content, lazy=False):
+        """解析 msgpack（bytes/memoryview），返回值与 loads 相同"""
+        from gcommon.utils import gmsgpack
+
+        cls = LazyJsonObject if lazy else JsonObject
+
+        j = gmsgpack.unpackb(content)
+        if isinstance(j, list):
+            return [cls(item) for item in j]
+        else:
+            return cls(j)
 
     def append(self, name, value):
         """Append an element to a list attr."""
@@ -139,6 +462,389 @@ class JsonObject(dict):
         return json_obj
 
 
+class LazyJsonObject(JsonObject):
+    """延迟转换的 JsonObject
+
+    JsonObject 在构造时递归转换所有嵌套的 dict（包括 list 中的 dict）。
+    LazyJsonObject 只记录哪些 key 的值是 dict/list，在第一次通过 __getattr__、
+    __getitem__、get、copy、dict(obj)、{**obj} 等接口访问时才转换，并将转换结果写回（缓存）。
+    适用于只读取少量字段的大消息（kafka、websocket 等）。
+    """
+    def __init__(self, d=None):
+        dict.__init__(self, d or {})
+
+        # 尚未转换的 key（值为 dict 或 list）
+        pending = {key for key, value in dict.items(self)
+                   if type(value) is dict or type(value) is list}
+        object.__setattr__(self, '_LazyJsonObject__pending', pending)
+
+    def __resolve(self, key):
+        self.__pending.discard(key)
+
+        value = dict.get(self, key)
+        if type(value) is dict:
+            dict.__setitem__(self, key, LazyJsonObject(value))
+        elif type(value) is list:
+            for i in range(len(value)):
+                if type(value[i]) is dict:
+                    value[i] = LazyJsonObject(value[i])
+
+    def __resolve_all(self):
+        for key in list(self.__pending):
+            self.__resolve(key)
+
+    def __getitem__(self, key):
+        if key in self.__pending:
+            self.__resolve(key)
+
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self.__pending:
+            self.__resolve(key)
+
+        return dict.get(self, key, default)
+
+    def pop(self, key, *args):
+        if key in self.__pending:
+            self.__resolve(key)
+
+        return dict.pop(self, key, *args)
+
+    def setdefault(self, key, default=None):
+        if key in self.__pending:
+            self.__resolve(key)
+
+        return dict.setdefault(self, key, default)
+
+    def values(self):
+        self.__resolve_all()
+        return dict.values(self)
+
+    def items(self):
+        self.__resolve_all()
+        return dict.items(self)
+
+    def copy(self):
+        self.__resolve_all()
+        return dict.copy(self)
+
+    def __or__(self, other):
+        self.__resolve_all()
+        return dict.__or__(self, other)
+
+    def __ror__(self, other):
+        self.__resolve_all()
+        return dict.__ror__(self, other)
+
+    def __reduce__(self):
+        return LazyJsonObject, (dict.copy(self),)
+
+    def __iter__(self):
+        # 重新定义 __iter__ 后，dict(obj)、{**obj} 等不再直接读取内部存储，而是通过 keys() 和 __getitem__
+        return dict.__iter__(self)
+
+
+class FrozenJsonObject(JsonObject):
+    """不可修改的 JsonObject
+
+    嵌套的 dict 转换成 FrozenJsonObject，list 转换成 tuple，修改时抛出 TypeError。
+    序列化结果（按 key 排序，紧凑格式）只计算一次，用于向大量接收者推送同一条消息；
+    内容相同的对象 hash 值相同，可以作为 dict key 或缓存 key。
+    与 dict 比较时按内容比较（list 与 tuple 相同），obj.freeze() == obj；
+    但取出的嵌套 tuple 与原来的 list 不相等。
+    """
+    def __init__(self, d=None):
+        dict.__init__(self)
+
+        for key, value in (d or {}).items():
+            dict.__setitem__(self, key, self._freeze_value(value))
+
+        object.__setattr__(self, '_FrozenJsonObject__content', None)
+        object.__setattr__(self, '_FrozenJsonObject__text', None)
+        object.__setattr__(self, '_FrozenJsonObject__hash', None)
+
+    @classmethod
+    def _freeze_value(cls, value):
+        if isinstance(value, FrozenJsonObject):
+            return value
+        elif isinstance(value, dict):
+            return cls(value)
+        elif isinstance(value, (list, tuple)):
+            return tuple(cls._freeze_value(item) for item in value)
+
+        return value
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("FrozenJsonObject is immutable")
+
+    __setattr__ = _immutable
+    __setitem__ = _immutable
+    __delitem__ = _immutable
+    __delattr__ = _immutable
+    clear = _immutable
+    pop = _immutable
+    popitem = _immutable
+    setdefault = _immutable
+    update = _immutable
+    __ior__ = _immutable
+    append = _immutable
+    copy_obj = _immutable
+
+    def __eq__(self, other):
+        result = dict.__eq__(self, other)
+        if result is not False or isinstance(other, FrozenJsonObject):
+            return result
+
+        # 另一方中的 list 在 FrozenJsonObject 中是 tuple
+        return dict.__eq__(self, FrozenJsonObject(other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __reduce__(self):
+        return FrozenJsonObject, (dict(self),)
+
+    def __hash__(self):
+        # 与 dict 的相等比较一致（1 == 1.0），值已经转换成 FrozenJsonObject/tuple
+        if self.__hash is None:
+            object.__setattr__(self, '_FrozenJsonObject__hash', hash(frozenset(self.items())))
+
+        return self.__hash
+
+    def freeze(self):
+        return self
+
+    @property
+    def content_hash(self):
+        """内容的 sha1（跨进程稳定）"""
+        return hashlib.sha1(self.dumpb()).hexdigest()
+
+    def dumpb(self, indent=None, ensure_ascii=False, sort_keys=True):
+        if indent or ensure_ascii or not sort_keys:
+            return JsonObject.dumpb(self, indent=indent, ensure_ascii=ensure_ascii, sort_keys=sort_keys)
+
+        if self.__content is None:
+            object.__setattr__(self, '_FrozenJsonObject__content', JsonObject.dumpb(self, sort_keys=True))
+
+        return self.__content
+
+    def dumps_compact(self):
+        """紧凑格式的 json 字符串（缓存），用于 websocket 等文本协议"""
+        if self.__text is None:
+            object.__setattr__(self, '_FrozenJsonObject__text', self.dumpb().decode('utf-8'))
+
+        return self.__text
+
+
+def _json_key(key):
+    """与 json.dumps 相同的 key 转换"""
+    if isinstance(key, str):
+        return key
+    elif key is True:
+        return "true"
+    elif key is False:
+        return "false"
+    elif key is None:
+        return "null"
+
+    return str(key)
+
+
+def _dump_message(obj, dump, frozen_dump, wrap):
+    frozen_values = [(key, value) for key, value in obj.items() if isinstance(value, FrozenJsonObject)]
+    if not frozen_values:
+        return dump(obj)
+
+    # 先序列化其他字段，再拼接 FrozenJsonObject 的缓存结果
+    others = {key: value for key, value in obj.items() if not isinstance(value, FrozenJsonObject)}
+    parts = [dump(others)[:-1]]
+
+    separator = wrap(",") if others else wrap("")
+    for key, value in frozen_values:
+        parts.append(separator + dump(_json_key(key)) + wrap(":") + frozen_dump(value))
+        separator = wrap(",")
+
+    parts.append(wrap("}"))
+    return wrap("").join(parts)
+
+
+def dumpb_message(obj, default=None) -> bytes:
+    """序列化待发送的消息（utf-8 bytes）。
+
+    FrozenJsonObject，以及 dict 第一层中值为 FrozenJsonObject 的字段，直接使用缓存的序列化结果。
+    default 用于转换其他字段中 json 不支持的类型（同 dumpb）。
+    """
+    if isinstance(obj, FrozenJsonObject):
+        return obj.dumpb()
+    elif not isinstance(obj, dict):
+        return dumpb(obj, default=default)
+
+    return _dump_message(obj, lambda value: dumpb(value, default=default), FrozenJsonObject.dumpb, str.encode)
+
+
+def dumps_message(obj, default=None) -> str:
+    """同 dumpb_message，返回紧凑格式的字符串（不转义非 ascii 字符）"""
+    if isinstance(obj, FrozenJsonObject):
+        return obj.dumps_compact()
+    elif not isinstance(obj, dict):
+        return dumpb(obj, default=default).decode('utf-8')
+
+    return _dump_message(obj, lambda value: dumpb(value, default=default).decode('utf-8'),
+                         FrozenJsonObject.dumps_compact, str)
+
+
+class JsonTable(object):
+    """列式存储的记录集合，用于返回大量结构相同的记录（数据库查询结果等）。
+
+    每一列保存为一个 list，整数列、浮点数列转换成 array，列名只保存一次。
+    默认序列化成客户端需要的 [{列名: 值}, ...]；columnar=True 时序列化成
+    {"columns": [列名, ...], "values": [[第一列的值], [第二列的值], ...]}。
+    可以直接作为 web_response 的 data。
+    """
+    def __init__(self, columns, columnar=False):
+        self.columns = [sys.intern(str(name)) for name in columns]
+        self.columnar = columnar
+
+        self._values = [[] for _ in self.columns]
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    _array_value_types = {"q": int, "d": float}
+
+    def _check_row(self, row):
+        if len(row) != len(self.columns):
+            raise ValueError("row has %s values, table has %s columns" % (len(row), len(self.columns)))
+
+    def append(self, row):
+        """添加一行（值的顺序与 columns 相同），值的个数与列数不同时抛出 ValueError"""
+        self._check_row(row)
+
+        columns = self._values
+        for i, value in enumerate(row):
+            values = columns[i]
+            if type(values) is array.array:
+                if type(value) is not self._array_value_types[values.typecode]:
+                    values = columns[i] = values.tolist()
+                else:
+                    try:
+                        values.append(value)
+                        continue
+                    except OverflowError:
+                        values = columns[i] = values.tolist()
+
+            values.append(value)
+
+        self._count += 1
+
+    def extend(self, rows):
+        """批量添加行，完成后把数值列转换成 array。
+
+        某一行值的个数与列数不同时抛出 ValueError，之前添加的行也被撤销。
+        """
+        values = self._values = self._column_lists()
+        count = 0
+        try:
+            for row in rows:
+                self._check_row(row)
+                for column, value in zip(values, row):
+                    column.append(value)
+                count += 1
+        except ValueError:
+            for column in values:
+                del column[self._count:]
+            raise
+        finally:
+            self._compact()
+
+        self._count += count
+        return self
+
+    def _compact(self):
+        """把只包含 int/float 的列转换成 array，减少内存"""
+        for i, values in enumerate(self._values):
+            if type(values) is not list or not values:
+                continue
+
+            first_type = type(values[0])
+            if first_type not in (int, float):
+                continue
+
+            if any(type(value) is not first_type for value in values):
+                continue
+
+            try:
+                self._values[i] = array.array("q" if first_type is int else "d", values)
+            except OverflowError:
+                pass
+
+    @classmethod
+    def from_rows(cls, rows, columns=None, columnar=False):
+        """从 SQLAlchemy 的查询结果（Result、result.mappings() 或者 Row 列表）、tuple 列表、dict 列表构造"""
+        if columns is None and hasattr(rows, "keys"):
+            columns = list(rows.keys())
+
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return cls(columns or [], columnar)
+
+        if columns is None:
+            columns = list(first._fields) if hasattr(first, "_fields") else list(first.keys())
+
+        rows = itertools.chain((first,), rows)
+        if isinstance(first, Mapping):
+            # 按列名取值（遍历 mapping 得到的是 key）
+            rows = ([row[name] for name in columns] for row in rows)
+
+        return cls(columns, columnar).extend(rows)
+
+    @classmethod
+    def from_dicts(cls, items, columns=None, columnar=False):
+        """从 dict 列表构造。不指定 columns 时取所有出现过的 key，缺少的值为 None"""
+        items = list(items)
+        if columns is None:
+            columns = {}
+            for item in items:
+                for key in item:
+                    columns.setdefault(key, None)
+
+        columns = list(columns)
+        return cls(columns, columnar).extend([item.get(name, None) for name in columns] for item in items)
+
+    @classmethod
+    def from_jsonables(cls, items, columns=None, columnar=False):
+        """从 JSONable 对象列表构造（列名为 json 字段名）"""
+        items = list(items)
+        if not items:
+            return cls(columns or [], columnar)
+
+        return cls.from_dicts(type(items[0]).to_json_many(items), columns, columnar)
+
+    def _column_lists(self):
+        return [values.tolist() if type(values) is array.array else values for values in self._values]
+
+    def rows(self):
+        """逐行返回 dict"""
+        columns = self.columns
+        return (dict(zip(columns, row)) for row in zip(*self._column_lists()))
+
+    def to_rows(self):
+        return list(self.rows())
+
+    def to_columnar(self):
+        return {"columns": self.columns, "values": self._column_lists()}
+
+    def to_json(self):
+        return self.to_columnar() if self.columnar else self.to_rows()
+
+    def dumpb(self):
+        return dumpb(self.to_json())
+
+
 if __name__ == '__main__':
     user_def = {'name': 'user123', 'password': '123456',
                 "values": {"a": 1, "b": 2}}
@@ -192,36 +898,135 @@ class IntegerJsonField(JsonField):
                            validator=validator, desc=desc, allow_blank=allow_blank)
 
 
+class _JsonCodecPlan(object):
+    """JSONable 子类的序列化计划：字段列表、json 名称、转换方式。
+
+    反射（dir/getattr）和驼峰转换只在每个类第一次序列化时执行一次。
+    """
+    LOAD_VALUE = 0
+    LOAD_LIST = 1
+    LOAD_OBJECT = 2
+
+    def __init__(self, cls):
+        self.cls = cls
+
+        # (field_name, field, json_name, load_name, to_json_func, load_kind)
+        self.fields = []
+
+        for field_name, field in self._get_fields(cls):
+            json_name = field.name or field_name
+            load_name = field_name
+
+            if cls._enable_snake_to_camel:
+                json_name = gstr.snakeToCamel(json_name)
+                load_name = gstr.snakeToCamel(load_name)
+
+            # 基础字段的 field_to_json 不做任何转换，无需调用
+            to_json_func = field.field_to_json
+            if type(field).field_to_json is JsonField.field_to_json:
+                to_json_func = None
+
+            if isinstance(field, JsonListField):
+                load_kind = self.LOAD_LIST
+            elif isinstance(field, JSONable):
+                load_kind = self.LOAD_OBJECT
+            else:
+                load_kind = self.LOAD_VALUE
+
+            self.fields.append((field_name, field, json_name, load_name, to_json_func, load_kind))
+
+    @staticmethod
+    def _get_fields(cls):
+        fields = gobject.get_instances_of(JsonField, cls)
+
+        # json_record 类的字段不是类属性（被 __slots__ 替换）
+        record_fields = getattr(cls, "_json_record_fields", None)
+        if record_fields:
+            all_fields = dict(record_fields)
+            all_fields.update(fields)
+            fields = sorted(all_fields.items(), key=lambda item: item[0])
+
+        return fields
+
+
 class JSONable(object):
-    """可以进行 json 序列化和反序列化的对象"""
+    """可以进行 json 序列化和反序列化的对象
+
+    每个子类在第一次序列化时生成 _JsonCodecPlan 并缓存。如果在类定义之后
+    动态修改了 JsonField，需要调用 reset_json_codec()。
+    """
+    __slots__ = ()
+
     object_description = ""
     _enable_snake_to_camel = True
 
+    _json_codec_plan = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._json_codec_plan = None
+
+    @classmethod
+    def reset_json_codec(cls):
+        """清除本类及所有子类缓存的序列化计划"""
+        cls._json_codec_plan = None
+
+        for subclass in cls.__subclasses__():
+            subclass.reset_json_codec()
+
+    @classmethod
+    def _get_json_codec_plan(cls) -> _JsonCodecPlan:
+        plan = cls._json_codec_plan
+        if plan is None or plan.cls is not cls:
+            plan = _JsonCodecPlan(cls)
+            cls._json_codec_plan = plan
+
+        return plan
+
     def to_json(self):
         """对象转换成 json """
+        return self._to_json_by_plan(self._get_json_codec_plan())
+
+    @classmethod
+    def to_json_many(cls, items):
+        """批量转换对象，同一类型的对象共用一份序列化计划"""
+        plan = cls._get_json_codec_plan()
+
+        result = []
+        for item in items:
+            if type(item) is cls:
+                result.append(item._to_json_by_plan(plan))
+            else:
+                result.append(item.to_json())
+
+        return result
+
+    def _to_json_by_plan(self, plan: _JsonCodecPlan):
         result = JsonObject()
 
-        fields = gobject.get_instances_of(JsonField, self.__class__)
-        for field_name, field in fields:
+        for field_name, field, json_name, _load_name, to_json_func, _load_kind in plan.fields:
             obj_value = getattr(self, field_name)
             if type(obj_value) == JsonField:
                 # 采用默认值；如果名称没有设置，则采用 field_name
                 if obj_value.allow_blank:
                     continue
 
-                json_name = obj_value.name or field_name
+                if obj_value is not field:
+                    json_name = obj_value.name or field_name
+                    if self._enable_snake_to_camel:
+                        json_name = gstr.snakeToCamel(json_name)
+
                 json_value = obj_value.default_value
             else:
-                json_name = field.name or field_name
                 json_value = obj_value
 
-            if self._enable_snake_to_camel:
-                json_name = gstr.snakeToCamel(json_name)
-
             if isinstance(json_value, JSONable):
                 result[json_name] = json_value.to_json()
             elif json_value:
-                result[json_name] = field.field_to_json(json_value)
+                if to_json_func:
+                    json_value = to_json_func(json_value)
+
+                result[json_name] = json_value
 
         self._extra_json_fields(result)
 
@@ -246,22 +1051,28 @@ class JSONable(object):
     def load_dict(cls, data: dict):
         return cls()._copy_from_dict(data)
 
+    def to_msgpack(self):
+        """对象转换成 msgpack（需要安装 msgpack）"""
+        from gcommon.utils import gmsgpack
+        return gmsgpack.packb(self.to_json())
+
+    @classmethod
+    def load_msgpack(cls, content):
+        from gcommon.utils import gmsgpack
+        return cls.load_dict(gmsgpack.unpackb(content))
+
     def _copy_from_dict(self, data: dict):
-        fields = gobject.get_instances_of(JsonField, self.__class__)
+        plan = self._get_json_codec_plan()
 
-        for field_name, field in fields:
-            json_name = field_name if not self._enable_snake_to_camel else gstr.snakeToCamel(field_name)
-            json_value = data.get(json_name, None)
+        for field_name, field, _json_name, load_name, _to_json_func, load_kind in plan.fields:
+            json_value = data.get(load_name, None)
 
             if json_value is None:
                 json_value = field
-            elif type(field) == JsonListField:
+            elif load_kind == _JsonCodecPlan.LOAD_LIST:
                 json_value = [field.list_to_field(item) for item in json_value]
-            elif isinstance(field, JSONable):
+            elif load_kind == _JsonCodecPlan.LOAD_OBJECT:
                 json_value = field.load_dict(json_value)
-            else:
-                assert type(field) == JsonField
-                json_value = json_value
 
             setattr(self, field_name, json_value)
 
@@ -269,6 +1080,31 @@ class JSONable(object):
         return self
 
 
+def prepare_json_codecs(*classes):
+    """预先生成 JSONable 类（及其子类）的序列化计划，并预热变量名转换缓存。
+
+    通常在导入所有模型之后调用一次。不指定 classes 时处理所有已定义的 JSONable 子类。
+    """
+    pending = list(classes) or JSONable.__subclasses__()
+    prepared = set()
+
+    while pending:
+        cls = pending.pop()
+        if cls in prepared:
+            continue
+
+        prepared.add(cls)
+        pending.extend(cls.__subclasses__())
+
+        plan = cls._get_json_codec_plan()
+        for _field_name, _field, json_name, load_name, _to_json_func, _load_kind in plan.fields:
+            # 请求参数（WebParams）会把驼峰名称转换回变量名
+            gstr.camel_to_snake(json_name)
+            gstr.camel_to_snake(load_name)
+
+    return len(prepared)
+
+
 class JsonObjectField(JsonField, JSONable):
     """复合对象，用于构造复杂的 json 字段，也可以作为独立对象使用"""
     def __init__(self, name="", *, validator=None, desc=""):
@@ -289,7 +1125,7 @@ class JsonListField(JsonField):
                 return [self.meta_class.to_json(item) for item in values]
             elif issubclass(self.meta_class, JSONable):
                 # Json 对象
-                return [item.to_json() for item in values]
+                return self.meta_class.to_json_many(values)
             else:
                 # 转换函数
                 return [self.meta_class(item) for item in values]
@@ -310,3 +1146,48 @@ class JsonListField(JsonField):
         else:
             # 转换函数 -> Json 转换成对象
             return [self.meta_class(item) for item in values]
+
+
+def _json_record_getattr(self, name):
+    """未赋值的 slot 返回字段定义（与普通 JSONable 回退到类属性的行为一致）"""
+    field = type(self)._json_record_fields.get(name, None)
+    if field is None:
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
+    return field
+
+
+def json_record(cls):
+    """类装饰器：紧凑模式的 JSONable，根据 JsonField 生成 __slots__，对象不再有 __dict__。
+
+    用于在内存中保存大量小对象。to_json/load_dict 以及默认值的行为与普通 JSONable 相同。
+    父类也必须是 json_record 或者定义了 __slots__，否则对象仍然会有 __dict__。
+    由于类被重新创建，方法中不能使用无参数的 super()。
+
+        @json_record
+        class Person(JSONable):
+            name = JsonField()
+            age = JsonField(default_value=0)
+    """
+    assert issubclass(cls, JSONable)
+
+    namespace = {}
+    fields = {}
+    for key, value in cls.__dict__.items():
+        if key in ("__dict__", "__weakref__"):
+            continue
+
+        if isinstance(value, JsonField):
+            fields[key] = value
+        else:
+            namespace[key] = value
+
+    record_fields = dict(getattr(cls, "_json_record_fields", None) or {})
+    record_fields.update(fields)
+
+    namespace["__slots__"] = tuple(fields.keys())
+    namespace["__qualname__"] = cls.__qualname__
+    namespace["_json_record_fields"] = record_fields
+    namespace.setdefault("__getattr__", _json_record_getattr)
+
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
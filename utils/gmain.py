@@ -34,6 +34,13 @@ ENV_LOG_FORMAT = 'G_COMMON_LOG_FORMAT'
 ENV_LOG_NOT_TO_FILE = 'G_COMMON_LOG_NOT_TO_FILE'
 ENV_LOG_LEVEL_NAMES = 'G_COMMON_LOG_LEVEL_NAMES'
 
+# 日志队列长度（大于 0 时在单独的线程中写日志），队列满时的处理方式：drop/block
+ENV_LOG_QUEUE_SIZE = 'G_COMMON_LOG_QUEUE_SIZE'
+ENV_LOG_QUEUE_FULL_POLICY = 'G_COMMON_LOG_QUEUE_FULL_POLICY'
+
+# 归档日志的压缩方式：gzip 或 zstd
+ENV_LOG_COMPRESS = 'G_COMMON_LOG_COMPRESS'
+
 
 def parse_log_level_names(str_log_level_names):
     """20:INFO,30:WARN,40:ERROR,50:FATAL"""
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""基于 tracemalloc 的内存分配统计：开始/停止跟踪，保存命名快照，
+查看占用内存最多的分配位置，以及两个快照之间的差异。
+
+快照和统计计算比较耗时，在事件循环中应当放到线程中执行。
+"""
+
+import collections
+import threading
+import tracemalloc
+
+# 最多保留的命名快照数量，超过时丢弃最早的
+MAX_SNAPSHOTS = 10
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+_snapshots = collections.OrderedDict()
+_lock = threading.Lock()
+
+# 不统计 tracemalloc 自身和导入机制的内存
+_filters = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def start(frames=1):
+    """开始跟踪，frames 为每次分配保存的调用栈深度"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop():
+    """停止跟踪，并清除所有快照"""
+    tracemalloc.stop()
+    with _lock:
+        _snapshots.clear()
+
+
+def is_tracing():
+    return tracemalloc.is_tracing()
+
+
+def status() -> dict:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "current": current,
+        "peak": peak,
+        "snapshots": list(_snapshots),
+    }
+
+
+def take_snapshot(name=""):
+    """创建快照。指定 name 时保存下来，用于之后的比较"""
+    snapshot = tracemalloc.take_snapshot().filter_traces(_filters)
+
+    if name:
+        with _lock:
+            _snapshots.pop(name, None)
+            _snapshots[name] = snapshot
+            while len(_snapshots) > MAX_SNAPSHOTS:
+                _snapshots.popitem(last=False)
+
+    return snapshot
+
+
+def get_snapshot(name):
+    return _snapshots.get(name, None)
+
+
+def _format_site(traceback, group_by):
+    if group_by == "filename":
+        return traceback[0].filename
+
+    if group_by == "traceback":
+        return ["%s:%s" % (frame.filename, frame.lineno) for frame in traceback]
+
+    return "%s:%s" % (traceback[0].filename, traceback[0].lineno)
+
+
+def top(snapshot=None, limit=20, group_by="lineno") -> list:
+    """占用内存最多的分配位置。snapshot 为空时创建一个新的快照"""
+    snapshot = snapshot or take_snapshot()
+
+    result = []
+    for stat in snapshot.statistics(group_by)[:limit]:
+        result.append({
+            "site": _format_site(stat.traceback, group_by),
+            "size": stat.size,
+            "count": stat.count,
+        })
+
+    return result
+
+
+def diff(old_snapshot, new_snapshot=None, limit=20, group_by="lineno") -> list:
+    """两个快照之间变化最大的分配位置。new_snapshot 为空时创建一个新的快照"""
+    new_snapshot = new_snapshot or take_snapshot()
+
+    result = []
+    for stat in new_snapshot.compare_to(old_snapshot, group_by)[:limit]:
+        result.append({
+            "site": _format_site(stat.traceback, group_by),
+            "size": stat.size,
+            "sizeDiff": stat.size_diff,
+            "count": stat.count,
+            "countDiff": stat.count_diff,
+        })
+
+    return result
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""将 gcounter 中注册的计数器、计时器导出为 Prometheus 文本格式。
+
+Counter 导出为 counter（由 Gauge.create 使用的计数器导出为 gauge），
+Timer 导出为 summary（单位：秒，包含 0.5/0.9/0.99/0.999 分位数）。
+"""
+
+import re
+import time
+from functools import lru_cache
+
+from gcommon.utils.gcounter import Counter, Timer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+QUANTILES = (("0.5", 50), ("0.9", 90), ("0.99", 99), ("0.999", 99.9))
+
+_invalid_name_chars = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+@lru_cache(maxsize=4096)
+def metric_name(name):
+    """转换成合法的 metric 名称"""
+    name = _invalid_name_chars.sub("_", name)
+    if not name or name[0].isdigit():
+        name = "_" + name
+
+    return name
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: dict):
+    """{"service": "demo"} -> '{service="demo"}'"""
+    if not labels:
+        return ""
+
+    items = ",".join('%s="%s"' % (metric_name(key), _escape_label_value(value)) for key, value in labels.items())
+    return "{%s}" % items
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(labels: dict = None, prefix="") -> str:
+    """导出所有计数器和计时器"""
+    label_text = format_labels(labels)
+    quantile_prefix = label_text[:-1] + "," if label_text else "{"
+
+    lines = []
+    for name, counter in sorted(Counter.all().items()):
+        name = metric_name(prefix + name)
+        lines.append("# TYPE %s %s" % (name, counter.metric_type))
+        lines.append("%s%s %s" % (name, label_text, _format_value(counter.value)))
+
+    for name, timer in sorted(Timer.all().items()):
+        name = metric_name(prefix + name + "_seconds")
+        snapshot = timer.histogram.snapshot()
+
+        lines.append("# TYPE %s summary" % name)
+        for quantile, percent in QUANTILES:
+            lines.append('%s%squantile="%s"} %s' % (
+                name, quantile_prefix, quantile, _format_value(snapshot.percentile(percent) / 1e9)))
+
+        lines.append("%s_sum%s %s" % (name, label_text, _format_value(snapshot.total / 1e9)))
+        lines.append("%s_count%s %s" % (name, label_text, snapshot.count))
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+class MetricsCache(object):
+    """缓存导出结果，ttl 秒内（一个抓取周期）的多次请求返回同样的内容"""
+
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self._content = b""
+        self._expire_at = 0
+
+    def get(self, labels: dict = None, prefix="") -> bytes:
+        now = time.monotonic()
+        if now >= self._expire_at:
+            self._content = render(labels, prefix).encode("utf-8")
+            self._expire_at = now + self.ttl
+
+        return self._content
+
+    def clear(self):
+        self._expire_at = 0
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""MessagePack 编解码，用于 kafka、websocket 等消息的二进制格式（替代 json）。
+
+依赖 msgpack。除了 json 支持的类型之外，还通过扩展类型支持 datetime/date/time/enum。
+注意：IntEnum/str 类型的 enum 会被当作 int/str 直接编码。
+"""
+
+import datetime
+import decimal
+import enum
+import uuid
+
+import msgpack
+
+from gcommon.utils.gjsonobj import JSONable, JsonTable
+
+CONTENT_TYPE = "application/msgpack"
+
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_TIME = 3
+EXT_ENUM = 4
+
+# 可以解码还原的 enum 类型：{名称: enum 类}
+_enum_types = {}
+
+
+def _get_enum_name(enum_class):
+    return "%s.%s" % (enum_class.__module__, enum_class.__qualname__)
+
+
+def register_enum(enum_class):
+    """注册 enum 类型（可用作类装饰器），解码时还原成 enum 对象。未注册的 enum 解码为它的值。"""
+    _enum_types[_get_enum_name(enum_class)] = enum_class
+    return enum_class
+
+
+def _default(obj):
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode("utf-8"))
+    elif isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode("utf-8"))
+    elif isinstance(obj, datetime.time):
+        return msgpack.ExtType(EXT_TIME, obj.isoformat().encode("utf-8"))
+    elif isinstance(obj, enum.Enum):
+        data = msgpack.packb([_get_enum_name(type(obj)), obj.value], default=_default, use_bin_type=True)
+        return msgpack.ExtType(EXT_ENUM, data)
+    elif isinstance(obj, (JSONable, JsonTable)):
+        return obj.to_json()
+    elif isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    elif isinstance(obj, (set, frozenset)):
+        return list(obj)
+
+    raise TypeError("Object of type %s is not msgpack serializable" % type(obj).__name__)
+
+
+def _ext_hook(code, data):
+    if code == EXT_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode("utf-8"))
+    elif code == EXT_DATE:
+        return datetime.date.fromisoformat(data.decode("utf-8"))
+    elif code == EXT_TIME:
+        return datetime.time.fromisoformat(data.decode("utf-8"))
+    elif code == EXT_ENUM:
+        name, value = unpackb(data)
+        enum_class = _enum_types.get(name, None)
+        return enum_class(value) if enum_class else value
+
+    return msgpack.ExtType(code, data)
+
+
+def packb(obj) -> bytes:
+    """编码成 msgpack bytes"""
+    return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+
+def unpackb(content):
+    """解码 msgpack，content 可以是 bytes/bytearray/memoryview"""
+    return msgpack.unpackb(content, raw=False, ext_hook=_ext_hook, strict_map_key=False)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""进程内的采样分析器。
+
+在单独的线程中定时读取所有线程的调用栈（sys._current_frames），
+输出 flame graph 工具使用的 collapsed stack 格式：
+
+    线程名;外层函数;...;内层函数 采样次数
+
+同一时间只能运行一个采样。
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class ProfilerBusyError(Exception):
+    """已经有一个采样在运行"""
+    pass
+
+
+class StackSampler(object):
+    """对所有线程（不包括采样线程自身）的调用栈采样"""
+
+    _running_lock = threading.Lock()
+
+    def __init__(self, rate=100):
+        # 每秒采样次数
+        self.rate = rate
+        self.samples = 0
+
+        self._stacks = collections.Counter()
+        self._labels = {}
+
+    @classmethod
+    def is_running(cls):
+        return cls._running_lock.locked()
+
+    def _label(self, code):
+        label = self._labels.get(code, None)
+        if label is None:
+            label = "%s (%s:%s)" % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+            self._labels[code] = label
+
+        return label
+
+    def _sample(self, ignore_thread_id, thread_names):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == ignore_thread_id:
+                continue
+
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+
+            thread_name = thread_names.get(thread_id, None)
+            if thread_name is None:
+                thread_names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                thread_name = thread_names.get(thread_id, str(thread_id))
+
+            self._stacks[(thread_name, tuple(reversed(codes)))] += 1
+
+        self.samples += 1
+
+    def run(self, seconds):
+        """阻塞运行 seconds 秒（应当在单独的线程中调用），返回 collapsed stack 文本"""
+        if not self._running_lock.acquire(blocking=False):
+            raise ProfilerBusyError()
+
+        try:
+            interval = 1.0 / self.rate
+            thread_id = threading.get_ident()
+            thread_names = {}
+
+            next_time = time.perf_counter()
+            end_time = next_time + seconds
+            while next_time < end_time:
+                self._sample(thread_id, thread_names)
+
+                next_time += interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # 采样跟不上时不补采
+                    next_time = time.perf_counter()
+        finally:
+            self._running_lock.release()
+
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        lines = []
+        for (thread_name, codes), count in self._stacks.most_common():
+            frames = [thread_name.replace(";", "_").replace(" ", "_")]
+            frames.extend(self._label(code) for code in codes)
+            lines.append("%s %s" % (";".join(frames), count))
+
+        return "\n".join(lines) + "\n" if lines else ""
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""同一主机上多个进程的计数器汇总（共享内存，mmap）。
+
+每个进程在共享内存中占用一个固定的进程槽，每个指标名称占用一个固定的指标槽。
+进程定期把自己的 Counter/Timer 写入自己的槽（publish），读取方直接读共享内存
+汇总所有存活进程的数据，不需要进程间通信。
+
+文件布局：
+    头部 | 进程表 (pid, 启动时间, key) | 指标名称表 (类型, 名称) | 数值 (进程数 x 指标数, double)
+
+进程槽中保存 pid 和进程的启动时间，已经退出的进程（或者 pid 被其他进程复用）的槽
+在 attach 时被清理，读取时被忽略。key（缺省为 full_server_name-pid）只用于显示。
+fork 出的子进程自动使用新的进程槽，只写入 fork 之后增加的数值（继承的数值已经由父进程写入）。
+只支持 posix 系统（使用 fcntl 文件锁）。
+"""
+
+import atexit
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+import fcntl
+
+from gcommon.utils import gmetrics
+from gcommon.utils.gcounter import Counter, Timer
+from gcommon.utils.gglobal import Global
+
+logger = logging.getLogger("metrics")
+
+MAGIC = b"GCMETRIC"
+VERSION = 1
+
+# 指标类型
+KIND_COUNTER = 1
+KIND_GAUGE = 2
+KIND_TIMER_COUNT = 3
+KIND_TIMER_SUM = 4
+
+_HEADER = struct.Struct("<8sIIII")
+_HEADER_SIZE = 64
+
+_PROCESS = struct.Struct("<qd64s")
+_NAME_SIZE = 128
+
+
+class SharedMetrics(object):
+    """共享内存中的指标"""
+
+    def __init__(self, path, max_processes=64, max_metrics=1024):
+        self.path = path
+        self.slot = -1
+        self.key = ""
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+
+        with self._file_lock():
+            self._open(max_processes, max_metrics)
+
+        # 名称 -> 指标槽
+        self._indexes = {}
+
+        # publish 时扣除的数值（fork 出的子进程继承的 Counter/Timer），{名称: 数值}
+        self.baseline = {}
+        self._publish_thread = None
+        self._publish_stopped = threading.Event()
+
+    def _open(self, max_processes, max_metrics):
+        file_size = os.fstat(self._fd).st_size
+        if file_size >= _HEADER_SIZE:
+            # 使用已有文件的布局
+            header = os.pread(self._fd, _HEADER.size, 0)
+            magic, version, max_processes, max_metrics, _ = _HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("bad shared metrics file: %s" % self.path)
+
+        self.max_processes = max_processes
+        self.max_metrics = max_metrics
+
+        self._process_offset = _HEADER_SIZE
+        self._name_offset = self._process_offset + _PROCESS.size * max_processes
+        self._value_offset = self._name_offset + _NAME_SIZE * max_metrics
+        size = self._value_offset + 8 * max_processes * max_metrics
+
+        if file_size < size:
+            os.ftruncate(self._fd, size)
+            os.pwrite(self._fd, _HEADER.pack(MAGIC, VERSION, max_processes, max_metrics, 0), 0)
+
+        self._mmap = mmap.mmap(self._fd, size)
+        self._values = memoryview(self._mmap)[self._value_offset:size].cast("d")
+
+    def _file_lock(self):
+        return _FileLock(self._fd)
+
+    def _detach_after_fork(self):
+        """fork 出的子进程中调用：关闭继承的文件，不释放父进程的槽"""
+        self._publish_thread = None
+        self.slot = -1
+
+        self._release()
+
+    def _release(self):
+        self._values.release()
+        self._mmap.close()
+        os.close(self._fd)
+        self._fd = -1
+
+    def close(self):
+        """停止 publish，并释放进程槽"""
+        if self._fd < 0:
+            return
+
+        self.stop_publish()
+
+        if self.slot >= 0:
+            with self._file_lock():
+                self._clear_process(self.slot)
+            self.slot = -1
+
+        self._release()
+
+    # 进程槽 ----------------------------------------------------------------
+
+    def _read_process(self, slot):
+        pid, started, key = _PROCESS.unpack_from(self._mmap, self._process_offset + _PROCESS.size * slot)
+        return pid, started, key.rstrip(b"\0").decode("utf-8")
+
+    def _clear_process(self, slot):
+        _PROCESS.pack_into(self._mmap, self._process_offset + _PROCESS.size * slot, 0, 0, b"")
+
+        start = slot * self.max_metrics
+        self._values[start:start + self.max_metrics] = memoryview(bytes(8 * self.max_metrics)).cast("d")
+
+    def attach(self, key):
+        """占用一个进程槽。已经退出的进程的槽被清理。"""
+        assert self.slot < 0
+
+        encoded_key = key.encode("utf-8")[:64]
+        with self._file_lock():
+            free_slot = -1
+            for slot in range(self.max_processes):
+                pid, started, slot_key = self._read_process(slot)
+                if pid and not _is_same_process(pid, started):
+                    logger.info("clean stale metrics slot: %s, pid: %s, key: %s", slot, pid, slot_key)
+                    self._clear_process(slot)
+                    pid = 0
+
+                if not pid and free_slot < 0:
+                    free_slot = slot
+
+            if free_slot < 0:
+                raise RuntimeError("no free process slot in shared metrics: %s" % self.path)
+
+            self._clear_process(free_slot)
+            _PROCESS.pack_into(self._mmap, self._process_offset + _PROCESS.size * free_slot,
+                               os.getpid(), _process_start_time(os.getpid()), encoded_key)
+
+        self.slot = free_slot
+        self.key = key
+        return free_slot
+
+    def processes(self) -> dict:
+        """存活的进程，{slot: (pid, key)}"""
+        result = {}
+        for slot in range(self.max_processes):
+            pid, started, key = self._read_process(slot)
+            if pid and _is_same_process(pid, started):
+                result[slot] = (pid, key)
+
+        return result
+
+    # 指标槽 ----------------------------------------------------------------
+
+    def _read_name(self, index):
+        offset = self._name_offset + _NAME_SIZE * index
+        kind = self._mmap[offset]
+        if not kind:
+            return 0, ""
+
+        return kind, bytes(self._mmap[offset + 1:offset + _NAME_SIZE]).rstrip(b"\0").decode("utf-8")
+
+    def _get_index(self, name, kind):
+        index = self._indexes.get(name, None)
+        if index is not None:
+            return index
+
+        encoded_name = name.encode("utf-8")
+        if len(encoded_name) >= _NAME_SIZE:
+            logger.warning("metric name too long for shared metrics: %s", name)
+            return -1
+
+        with self._file_lock():
+            for index in range(self.max_metrics):
+                slot_kind, slot_name = self._read_name(index)
+                if not slot_kind:
+                    offset = self._name_offset + _NAME_SIZE * index
+                    self._mmap[offset + 1:offset + 1 + len(encoded_name)] = encoded_name
+                    self._mmap[offset] = kind
+                    break
+
+                if slot_name == name:
+                    break
+            else:
+                logger.warning("no free metric slot in shared metrics: %s", name)
+                index = -1
+
+        self._indexes[name] = index
+        return index
+
+    def _set_value(self, name, kind, value):
+        index = self._get_index(name, kind)
+        if index >= 0:
+            self._values[self.slot * self.max_metrics + index] = value
+
+    def publish(self):
+        """把当前进程的 Counter/Timer 写入共享内存"""
+        assert self.slot >= 0
+
+        with self._lock:
+            for name, kind, value in _local_values():
+                self._set_value(name, kind, value - self.baseline.get(name, 0))
+
+    def aggregate(self) -> dict:
+        """汇总所有存活进程的数据，{name: (kind, value)}。计时器为 name:count、name:sum（秒）"""
+        slots = list(self.processes())
+
+        result = {}
+        for index in range(self.max_metrics):
+            kind, name = self._read_name(index)
+            if not kind:
+                break
+
+            value = sum(self._values[slot * self.max_metrics + index] for slot in slots)
+            result[name] = (kind, value)
+
+        return result
+
+    # 定期 publish ----------------------------------------------------------
+
+    def start_publish(self, interval=1.0):
+        """在后台线程中定期 publish"""
+        if self._publish_thread:
+            return
+
+        self._publish_stopped.clear()
+        self._publish_thread = threading.Thread(
+            target=self._publish_forever, args=(interval,), name="shared-metrics", daemon=True)
+        self._publish_thread.start()
+
+    def stop_publish(self):
+        if not self._publish_thread:
+            return
+
+        self._publish_stopped.set()
+        self._publish_thread.join()
+        self._publish_thread = None
+
+    def _publish_forever(self, interval):
+        while not self._publish_stopped.wait(interval):
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error("failed to publish shared metrics: %s", e)
+
+    def render(self, labels: dict = None) -> str:
+        """以 Prometheus 文本格式导出汇总数据"""
+        label_text = gmetrics.format_labels(labels)
+        types = {KIND_COUNTER: "counter", KIND_GAUGE: "gauge"}
+
+        lines = []
+        for name, (kind, value) in sorted(self.aggregate().items()):
+            if kind in types:
+                name = gmetrics.metric_name(name)
+                lines.append("# TYPE %s %s" % (name, types[kind]))
+            else:
+                # 计时器只汇总次数和总时间（秒）
+                name, suffix = name.rsplit(":", 1)
+                name = "%s_seconds_%s" % (gmetrics.metric_name(name), suffix)
+
+            lines.append("%s%s %s" % (name, label_text, repr(value)))
+
+        lines.append("")
+        return "\n".join(lines)
+
+
+class _FileLock(object):
+    """进程间的文件锁"""
+
+    def __init__(self, fd):
+        self._fd = fd
+
+    def __enter__(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+def _local_values():
+    """当前进程的 Counter/Timer：[(名称, 类型, 数值)]，计时器为 name:count、name:sum（秒）"""
+    values = []
+    for name, counter in list(Counter.all().items()):
+        kind = KIND_GAUGE if counter.metric_type == "gauge" else KIND_COUNTER
+        values.append((name, kind, counter.value))
+
+    for name, timer in list(Timer.all().items()):
+        snapshot = timer.histogram.snapshot()
+        values.append((name + ":count", KIND_TIMER_COUNT, snapshot.count))
+        values.append((name + ":sum", KIND_TIMER_SUM, snapshot.total / 1e9))
+
+    return values
+
+
+def _process_start_time(pid):
+    """进程的启动时间（/proc/<pid>/stat 中的 starttime），不支持时返回 0"""
+    try:
+        with open("/proc/%d/stat" % pid, "rb") as f:
+            stat = f.read()
+    except OSError:
+        return 0
+
+    # 进程名中可能有空格，从最后一个 ) 之后开始，starttime 是第 22 个字段
+    return float(stat[stat.rindex(b")") + 2:].split()[19])
+
+
+def _is_same_process(pid, started):
+    """pid 对应的进程存在，并且没有被其他进程复用"""
+    if not _is_alive(pid):
+        return False
+
+    if started:
+        start_time = _process_start_time(pid)
+        if start_time and start_time != started:
+            return False
+
+    return True
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def default_path(service_name=""):
+    """缺省的共享内存文件：/dev/shm/gcommon-<service>.metrics"""
+    folder = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(folder, "gcommon-%s.metrics" % (service_name or Global.service_name or "default"))
+
+
+_shared_metrics: SharedMetrics = None
+
+# enable_shared_metrics 的参数，fork 出的子进程使用同样的参数重新 attach
+_enable_params = None
+
+
+def _default_key():
+    pid = os.getpid()
+    return "%s-%s" % (Global.full_server_name, pid) if Global.full_server_name else str(pid)
+
+
+def enable_shared_metrics(path="", key="", interval=1.0) -> SharedMetrics:
+    """当前进程开始把指标写入共享内存（进程退出时释放进程槽）"""
+    if _shared_metrics:
+        return _shared_metrics
+
+    return _enable(path, key, interval)
+
+
+def _enable(path, key, interval, baseline=None):
+    global _shared_metrics, _enable_params
+
+    shared_metrics = SharedMetrics(path or default_path())
+    shared_metrics.baseline = baseline or {}
+    shared_metrics.attach(key or _default_key())
+    shared_metrics.start_publish(interval)
+
+    atexit.register(shared_metrics.close)
+
+    _shared_metrics = shared_metrics
+    _enable_params = (path, key, interval)
+    return shared_metrics
+
+
+def _reattach_after_fork():
+    """子进程继承了父进程的进程槽和文件锁，但没有 publish 线程：重新 attach。
+
+    继承的 Counter/Timer 数值由父进程写入，子进程只写入之后增加的部分。
+    """
+    global _shared_metrics
+    if _shared_metrics is None:
+        return
+
+    inherited, _shared_metrics = _shared_metrics, None
+    atexit.unregister(inherited.close)
+    inherited._detach_after_fork()
+
+    baseline = {name: value for name, _, value in _local_values()}
+    try:
+        _enable(*_enable_params, baseline=baseline)
+    except Exception as e:
+        logger.error("failed to attach shared metrics after fork: %s", e)
+
+
+os.register_at_fork(after_in_child=_reattach_after_fork)
+
+
+def get_shared_metrics() -> SharedMetrics:
+    return _shared_metrics
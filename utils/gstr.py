@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*- 
 # created: 2021-08-04
 # creator: liguopeng@liguopeng.net
+import functools
 import re
 
+# 变量名风格转换的缓存大小。变量名的数量有限，命中率很高。
+NAME_CACHE_SIZE = 4096
 
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
 def SnakeToCamel(name):
     """变量名风格转换"""
     return ''.join(word.title() for word in name.split('_'))
 
 
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
 def snakeToCamel(name):
     """变量名风格转换，首字母小写"""
     words = name.split('_')
@@ -20,9 +26,20 @@ _camel_pat_2 = re.compile('__([A-Z])')
 _camel_pat_3 = re.compile('([a-z0-9])([A-Z])')
 
 
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
 def camel_to_snake(name):
     """变量名风格转换"""
     name = _camel_pat_1.sub(r'\1_\2', name)
     name = _camel_pat_2.sub(r'_\1', name)
     name = _camel_pat_3.sub(r'\1_\2', name)
     return name.lower()
+
+
+def name_cache_info():
+    """变量名转换缓存的命中情况：{函数名: CacheInfo(hits, misses, maxsize, currsize)}"""
+    return {func.__name__: func.cache_info() for func in (SnakeToCamel, snakeToCamel, camel_to_snake)}
+
+
+def clear_name_cache():
+    for func in (SnakeToCamel, snakeToCamel, camel_to_snake):
+        func.cache_clear()
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""轻量的调用链跟踪（trace/span）。
+
+- 当前 span 保存在 contextvars 中，随 asyncio task 传递；
+- 跨进程传递使用 W3C traceparent 格式：00-<trace_id>-<span_id>-01，
+  放在 http 头、kafka 消息头，或者 json 消息的 traceparent 字段中；
+- 结束的 span 保存在有上限的内存缓冲区中，可以导出为 json。
+
+缺省不启用。未启用时 span() 返回一个空的 context manager，开销只有一次函数调用。
+"""
+
+import collections
+import contextvars
+import random
+import re
+import time
+
+from gcommon.utils import gjsonobj
+
+TRACEPARENT = "traceparent"
+
+KIND_INTERNAL = "internal"
+KIND_SERVER = "server"
+KIND_CLIENT = "client"
+KIND_PRODUCER = "producer"
+KIND_CONSUMER = "consumer"
+
+_enabled = False
+_spans = collections.deque(maxlen=10000)
+
+_current_span = contextvars.ContextVar("gcommon_trace_span", default=None)
+
+_traceparent_pattern = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_traceparent_in_json = re.compile(rb'"traceparent"\s*:\s*"([^"]{55})"')
+
+
+def enable(buffer_size=10000):
+    """启用跟踪，buffer_size 为保存的 span 数量上限"""
+    global _enabled, _spans
+    if _spans.maxlen != buffer_size:
+        _spans = collections.deque(_spans, maxlen=buffer_size)
+
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+class Span(object):
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind",
+                 "start_time", "start_ns", "duration_ns", "attributes", "error")
+
+    def __init__(self, name, kind, trace_id, parent_id, attributes):
+        self.trace_id = trace_id
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+
+        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.duration_ns = None
+
+        self.attributes = attributes
+        self.error = None
+
+    @property
+    def traceparent(self):
+        return "00-%s-%s-01" % (self.trace_id, self.span_id)
+
+    def set_attribute(self, name, value):
+        self.attributes[name] = value
+
+    def to_json(self):
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTime": self.start_time,
+            "durationMs": self.duration_ns / 1e6 if self.duration_ns is not None else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def parse_traceparent(value):
+    """解析 traceparent，返回 (trace_id, span_id)，格式错误时返回 None"""
+    if not value:
+        return None
+
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("ascii", errors="ignore")
+
+    match = _traceparent_pattern.match(value.strip())
+    return match.groups() if match else None
+
+
+def start_span(name, kind=KIND_INTERNAL, parent=None, **attributes):
+    """创建 span（不改变当前 span）。未启用时返回 None。
+
+    parent 可以是 Span、parse_traceparent 的结果、traceparent 字符串，缺省为当前 span。
+    """
+    if not _enabled:
+        return None
+
+    if parent is None:
+        parent = _current_span.get()
+    elif isinstance(parent, (str, bytes)):
+        parent = parse_traceparent(parent)
+
+    if isinstance(parent, Span):
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    elif isinstance(parent, tuple):
+        trace_id, parent_id = parent
+    else:
+        trace_id, parent_id = "%032x" % random.getrandbits(128), None
+
+    return Span(name, kind, trace_id, parent_id, attributes)
+
+
+def finish_span(span: Span, error=None):
+    """结束 span，保存到缓冲区"""
+    if span is None or span.duration_ns is not None:
+        return
+
+    span.duration_ns = time.perf_counter_ns() - span.start_ns
+    if error is not None:
+        span.error = error if isinstance(error, str) else repr(error)
+
+    _spans.append(span)
+
+
+def activate(span: Span):
+    """设置为当前 span，返回用于 deactivate 的 token"""
+    return _current_span.set(span)
+
+
+def deactivate(token):
+    _current_span.reset(token)
+
+
+def current_span() -> Span:
+    return _current_span.get()
+
+
+class _SpanScope(object):
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span):
+        self.span = span
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_span.reset(self._token)
+        finish_span(self.span, exc_val)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.__exit__(exc_type, exc_val, exc_tb)
+
+
+class _NullScope(object):
+    """未启用时使用"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_SCOPE = _NullScope()
+
+
+def span(name, kind=KIND_INTERNAL, parent=None, **attributes):
+    """with gtrace.span("name"): ...，在 with 中作为当前 span"""
+    if not _enabled:
+        return _NULL_SCOPE
+
+    return _SpanScope(start_span(name, kind, parent, **attributes))
+
+
+def current_traceparent():
+    """当前 span 的 traceparent，没有当前 span 时返回 None"""
+    if not _enabled:
+        return None
+
+    current = _current_span.get()
+    return current.traceparent if current else None
+
+
+def inject(message: dict):
+    """在 json 消息中加入 traceparent 字段（原地修改）"""
+    traceparent = current_traceparent()
+    if traceparent:
+        message[TRACEPARENT] = traceparent
+
+    return message
+
+
+def extract_from_json(content):
+    """从未解析的 json 消息中查找 traceparent 字段（不解析整个消息）"""
+    if not _enabled or not content:
+        return None
+
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    match = _traceparent_in_json.search(content)
+    return parse_traceparent(match.group(1)) if match else None
+
+
+def kafka_headers():
+    """kafka 消息头 [(traceparent, bytes)]，没有当前 span 时返回 None"""
+    traceparent = current_traceparent()
+    return [(TRACEPARENT, traceparent.encode("ascii"))] if traceparent else None
+
+
+def extract_from_kafka_headers(headers):
+    if not _enabled or not headers:
+        return None
+
+    for key, value in headers:
+        if key == TRACEPARENT:
+            return parse_traceparent(value)
+
+    return None
+
+
+def export(clear=False, trace_id="") -> list:
+    """导出缓冲区中的 span"""
+    spans = list(_spans)
+    if clear:
+        _spans.clear()
+
+    return [item.to_json() for item in spans if not trace_id or item.trace_id == trace_id]
+
+
+def export_json(clear=False, trace_id="") -> bytes:
+    return gjsonobj.dumpb(export(clear, trace_id))
+
+
+def clear():
+    _spans.clear()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""多线程计数的性能对比（手工运行，不在单元测试中执行）
+
+python -m gcommon.utils.test.benchmark_gcounter
+"""
+
+import threading
+import time
+
+from gcommon.utils.gcounter import SimpleCounter, ShardedCounter
+
+
+class _LockedCounter(SimpleCounter):
+    """使用全局锁的计数器，作为对比"""
+
+    def __init__(self):
+        SimpleCounter.__init__(self)
+        self._lock = threading.Lock()
+
+    def inc(self, count=1):
+        with self._lock:
+            self._value += count
+
+
+def _run(counter, threads, number):
+    def work():
+        inc = counter.inc
+        for _ in range(number):
+            inc()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - start
+
+
+def bench_counters(number=200000):
+    for threads in (1, 4, 16):
+        expected = threads * number
+        for title, counter_class in (("simple (unsafe)", SimpleCounter),
+                                     ("global lock", _LockedCounter),
+                                     ("sharded", ShardedCounter)):
+            counter = counter_class()
+            seconds = _run(counter, threads, number)
+            print("%-16s threads=%-3s %8.3f us/op  lost=%s" % (
+                title, threads, seconds / expected * 1000 * 1000, expected - counter.value))
+
+
+if __name__ == '__main__':
+    bench_counters()
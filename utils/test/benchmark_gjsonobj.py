@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""gjsonobj 性能对比（手工运行，不在单元测试中执行）
+
+python -m gcommon.utils.test.benchmark_gjsonobj
+"""
+
+import json
+import timeit
+import tracemalloc
+
+from gcommon.utils import gobject, gstr, gjsonobj
+from gcommon.utils.gjsonobj import JsonObject, LazyJsonObject, JsonField, JsonObjectField, JSONable, json_record
+from gcommon.utils.gjsonobj import JsonTable
+
+
+def _deep_document(depth=6, width=6):
+    """构造一个嵌套较深、较宽的文档"""
+    if depth == 0:
+        return {"id": 1, "name": "leaf", "value": 3.14, "tags": ["a", "b", "c"]}
+
+    node = {"id": depth, "name": "node-%s" % depth}
+    for i in range(width):
+        node["child_%s" % i] = _deep_document(depth - 1, width // 2 or 1)
+
+    node["items"] = [_deep_document(depth - 1, 1) for _ in range(width)]
+    return node
+
+
+def _report(title, number, seconds):
+    print("%-40s %10.2f us/op" % (title, seconds / number * 1000 * 1000))
+
+
+def bench_lazy_wrapping(number=200):
+    content = json.dumps(_deep_document())
+    print("document size: %s bytes" % len(content))
+
+    def eager():
+        obj = JsonObject(json.loads(content))
+        return obj.id, obj.name
+
+    def lazy():
+        obj = LazyJsonObject(json.loads(content))
+        return obj.id, obj.name
+
+    def lazy_walk():
+        obj = LazyJsonObject(json.loads(content))
+        return obj.child_0.child_0.child_0.name
+
+    _report("eager JsonObject (2 top-level keys)", number, timeit.timeit(eager, number=number))
+    _report("LazyJsonObject (2 top-level keys)", number, timeit.timeit(lazy, number=number))
+    _report("LazyJsonObject (one deep path)", number, timeit.timeit(lazy_walk, number=number))
+
+
+class _ApiRecord(JsonObjectField):
+    record_id = JsonField()
+    user_name = JsonField()
+    display_name = JsonField()
+    email_address = JsonField()
+    phone_number = JsonField()
+    created_time = JsonField()
+    updated_time = JsonField()
+    status = JsonField()
+    score = JsonField()
+    remark = JsonField(default_value="")
+
+
+def _reflective_to_json(obj):
+    """旧实现：每次序列化都通过 dir/getattr 反射字段，并做驼峰转换"""
+    result = JsonObject()
+    for field_name, field in gobject.get_instances_of(JsonField, obj.__class__):
+        json_value = getattr(obj, field_name)
+        if type(json_value) == JsonField:
+            json_value = json_value.default_value
+
+        json_name = gstr.snakeToCamel(field.name or field_name)
+        if isinstance(json_value, JSONable):
+            result[json_name] = json_value.to_json()
+        elif json_value:
+            result[json_name] = field.field_to_json(json_value)
+
+    return result
+
+
+def bench_jsonable_codec(count=2000, number=5):
+    records = []
+    for i in range(count):
+        records.append(_ApiRecord.load_dict({
+            "recordId": i, "userName": "user-%s" % i, "displayName": "User %s" % i,
+            "emailAddress": "user%s@localhost" % i, "phoneNumber": "1380000%04d" % i,
+            "createdTime": "2021-08-04 12:00:00", "updatedTime": "2021-08-04 12:00:00",
+            "status": 1, "score": i * 1.5,
+        }))
+
+    assert [_reflective_to_json(r) for r in records] == _ApiRecord.to_json_many(records)
+
+    def reflective():
+        return [_reflective_to_json(r) for r in records]
+
+    def planned():
+        return [r.to_json() for r in records]
+
+    def planned_many():
+        return _ApiRecord.to_json_many(records)
+
+    data = planned_many()
+
+    def load():
+        return [_ApiRecord.load_dict(item) for item in data]
+
+    _report("to_json (reflection) x %s" % count, number, timeit.timeit(reflective, number=number))
+    _report("to_json (codec plan) x %s" % count, number, timeit.timeit(planned, number=number))
+    _report("to_json_many x %s" % count, number, timeit.timeit(planned_many, number=number))
+    _report("load_dict x %s" % count, number, timeit.timeit(load, number=number))
+
+
+def _telemetry_message(items):
+    """典型的 kafka/mqtt 消息：少量头部字段 + 若干条数值型记录"""
+    return {
+        "eventId": "robot-1-12345", "eventType": "telemetry", "robotId": "robot-1",
+        "timestamp": "2021-08-04 12:00:00", "operator": "操作员",
+        "items": [{"seq": i, "x": i * 0.1, "y": i * 0.2, "speed": 1.5, "battery": 87,
+                   "status": "running", "tags": ["a", "b"]} for i in range(items)],
+    }
+
+
+def bench_json_backends(number=2000):
+    """对比 str -> bytes 的旧路径（json.dumps + encode / decode + json.loads）和 dumpb/loads"""
+    old_backend = gjsonobj.get_json_backend()
+
+    for items in (5, 50, 300):
+        message = JsonObject(_telemetry_message(items))
+        content = json.dumps(message, ensure_ascii=False).encode("utf-8")
+        print("message size: %s bytes" % len(content))
+
+        def stdlib_dumps():
+            return json.dumps(message, ensure_ascii=False).encode("utf-8")
+
+        def stdlib_loads():
+            return json.loads(content.decode("utf-8"))
+
+        _report("  json.dumps + encode", number, timeit.timeit(stdlib_dumps, number=number))
+        _report("  decode + json.loads", number, timeit.timeit(stdlib_loads, number=number))
+
+        for backend in gjsonobj.get_json_backends():
+            gjsonobj.set_json_backend(backend)
+            _report("  dumpb [%s]" % backend, number, timeit.timeit(lambda: gjsonobj.dumpb(message), number=number))
+            _report("  loads [%s]" % backend, number, timeit.timeit(lambda: gjsonobj.loads(content), number=number))
+
+    gjsonobj.set_json_backend(old_backend)
+
+
+class _Entity(JSONable):
+    uid = JsonField()
+    name = JsonField()
+    status = JsonField(default_value=0)
+    score = JsonField(default_value=0)
+
+
+@json_record
+class _EntityRecord(JSONable):
+    uid = JsonField()
+    name = JsonField()
+    status = JsonField(default_value=0)
+    score = JsonField(default_value=0)
+
+
+def bench_json_record_memory(count=100000):
+    data = [{"uid": "u%s" % i, "name": "user-%s" % i, "status": 1, "score": i} for i in range(count)]
+
+    for cls in (_Entity, _EntityRecord):
+        tracemalloc.start()
+        objects = [cls.load_dict(item) for item in data]
+        size, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print("%-40s %10.1f bytes/object" % ("%s x %s" % (cls.__name__, count), size / count))
+        del objects
+
+
+def bench_json_table(count=100000, number=5):
+    columns = ["id", "userName", "score", "status", "createdTime"]
+    rows = [(i, "user-%s" % i, i * 0.5, i % 3, "2021-08-04 12:00:00") for i in range(count)]
+
+    tracemalloc.start()
+    records = [JsonObject(dict(zip(columns, row))) for row in rows]
+    size_records, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    table = JsonTable.from_rows(rows, columns)
+    size_table, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("%-40s %10.1f bytes/row" % ("list of JsonObject x %s" % count, size_records / count))
+    print("%-40s %10.1f bytes/row" % ("JsonTable x %s" % count, size_table / count))
+
+    _report("dumpb list of JsonObject", number, timeit.timeit(lambda: gjsonobj.dumpb(records), number=number))
+    _report("dumpb JsonTable (rows)", number, timeit.timeit(table.dumpb, number=number))
+
+    table.columnar = True
+    print("columnar size: %s bytes, rows size: %s bytes" % (len(table.dumpb()), len(gjsonobj.dumpb(records))))
+    _report("dumpb JsonTable (columnar)", number, timeit.timeit(table.dumpb, number=number))
+
+
+if __name__ == '__main__':
+    bench_lazy_wrapping()
+    bench_jsonable_codec()
+    bench_json_backends()
+    bench_json_record_memory()
+    bench_json_table()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""msgpack 与 json 的消息大小、编解码速度对比（手工运行，不在单元测试中执行）
+
+python -m gcommon.utils.test.benchmark_gmsgpack
+"""
+
+import timeit
+
+from gcommon.utils import gjsonobj
+from gcommon.utils.gjsonobj import JsonObject
+
+
+def _telemetry_message(items):
+    """数值为主的遥测消息"""
+    return JsonObject({
+        "eventId": "robot-1-12345", "robotId": "robot-1", "timestamp": 1628049600123,
+        "points": [{"seq": i, "x": i * 0.125, "y": -i * 0.25, "z": 0.0, "speed": 1.5,
+                    "battery": 87, "temperature": 36.6, "ok": True} for i in range(items)],
+    })
+
+
+def _report(title, number, seconds):
+    print("%-40s %10.2f us/op" % (title, seconds / number * 1000 * 1000))
+
+
+def bench_msgpack(number=2000):
+    print("json backend: %s" % gjsonobj.get_json_backend())
+
+    for items in (5, 50, 500):
+        message = _telemetry_message(items)
+
+        json_content = message.dumpb()
+        msgpack_content = message.dumpb_msgpack()
+        print("%s points - json: %s bytes, msgpack: %s bytes (%.0f%%)" % (
+            items, len(json_content), len(msgpack_content), len(msgpack_content) * 100 / len(json_content)))
+
+        _report("  json dumpb", number, timeit.timeit(message.dumpb, number=number))
+        _report("  msgpack dumpb", number, timeit.timeit(message.dumpb_msgpack, number=number))
+        _report("  json loads", number, timeit.timeit(lambda: JsonObject.loads(json_content), number=number))
+        _report("  msgpack loads", number,
+                timeit.timeit(lambda: JsonObject.loads_msgpack(msgpack_content), number=number))
+
+
+if __name__ == '__main__':
+    bench_msgpack()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""变量名转换的性能对比（手工运行，不在单元测试中执行）
+
+python -m gcommon.utils.test.benchmark_gstr
+"""
+
+import timeit
+
+from gcommon.utils import gstr
+
+_SNAKE_NAMES = [
+    "user_id", "user_name", "display_name", "email_address", "phone_number", "created_time",
+    "updated_time", "page_size", "current_page", "robot_id", "task_status", "event_type",
+    "http_response_code", "is_deleted", "order_by", "parent_id", "access_token", "refresh_token",
+]
+
+_CAMEL_NAMES = [gstr.snakeToCamel(name) for name in _SNAKE_NAMES]
+
+
+def _report(title, number, seconds):
+    print("%-40s %10.3f us/op" % (title, seconds / number * 1000 * 1000))
+
+
+def bench_name_conversion(number=20000):
+    snake_to_camel = gstr.snakeToCamel.__wrapped__
+    camel_to_snake = gstr.camel_to_snake.__wrapped__
+
+    count = number * len(_SNAKE_NAMES)
+
+    def uncached_snake_to_camel():
+        for name in _SNAKE_NAMES:
+            snake_to_camel(name)
+
+    def cached_snake_to_camel():
+        for name in _SNAKE_NAMES:
+            gstr.snakeToCamel(name)
+
+    def uncached_camel_to_snake():
+        for name in _CAMEL_NAMES:
+            camel_to_snake(name)
+
+    def cached_camel_to_snake():
+        for name in _CAMEL_NAMES:
+            gstr.camel_to_snake(name)
+
+    _report("snakeToCamel (no cache)", count, timeit.timeit(uncached_snake_to_camel, number=number))
+    _report("snakeToCamel (lru cache)", count, timeit.timeit(cached_snake_to_camel, number=number))
+    _report("camel_to_snake (no cache)", count, timeit.timeit(uncached_camel_to_snake, number=number))
+    _report("camel_to_snake (lru cache)", count, timeit.timeit(cached_camel_to_snake, number=number))
+
+    for name, info in gstr.name_cache_info().items():
+        print(name, info)
+
+
+if __name__ == '__main__':
+    bench_name_conversion()
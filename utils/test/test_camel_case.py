@@ -2,6 +2,7 @@
 # created: 2021-08-04
 # creator: liguopeng@liguopeng.net
 
+from gcommon.utils import gstr
 from gcommon.utils.gstr import camel_to_snake, snakeToCamel, SnakeToCamel
 
 
@@ -35,6 +36,34 @@ def test_snake_to_camel():
     print(result)
 
 
+def test_name_cache():
+    gstr.clear_name_cache()
+
+    assert snakeToCamel('http_response_code') == 'httpResponseCode'
+    assert snakeToCamel('http_response_code') == 'httpResponseCode'
+    assert camel_to_snake('httpResponseCode') == 'http_response_code'
+
+    info = gstr.name_cache_info()
+    assert info['snakeToCamel'].hits == 1
+    assert info['snakeToCamel'].misses == 1
+    assert info['camel_to_snake'].misses == 1
+
+
+def test_prepare_json_codecs():
+    from gcommon.utils.gjsonobj import JSONable, JsonField, prepare_json_codecs
+
+    class DemoRecord(JSONable):
+        user_name = JsonField()
+
+    gstr.clear_name_cache()
+    assert prepare_json_codecs(DemoRecord) == 1
+
+    camel_to_snake('userName')
+    assert gstr.name_cache_info()['camel_to_snake'].hits >= 1
+
+
 if __name__ == '__main__':
     test_camel_to_snake()
     test_snake_to_camel()
+    test_name_cache()
+    test_prepare_json_codecs()
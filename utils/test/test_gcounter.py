@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""计数器在多线程中的使用"""
+
+import random
+import threading
+
+from gcommon.utils.gcounter import Counter, Gauge, Timer, Sequence, Histogram, HistogramSnapshot, RateMeter
+
+
+def _run_threads(target, count=8):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+
+def test_counter_threads():
+    counter = Counter("test_counter_threads")
+    assert Counter.get("test_counter_threads") is counter
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+            with Gauge.create("test_gauge_threads"):
+                pass
+
+    _run_threads(work)
+    assert counter.value == 80000
+    assert Counter.get("test_gauge_threads").value == 0
+
+    counter.dec(80000)
+    assert counter.value == 0
+
+
+def test_register_first_use():
+    barrier = threading.Barrier(8)
+    items = []
+
+    def work():
+        barrier.wait()
+        items.append(Counter.get("test_register_first_use"))
+
+    _run_threads(work)
+    assert len(set(map(id, items))) == 1
+
+
+def test_sequence_threads():
+    seq = Sequence()
+    values = []
+
+    def work():
+        values.extend(seq.next_value() for _ in range(10000))
+
+    _run_threads(work)
+    assert sorted(values) == list(range(1, 80001))
+
+
+def test_timer_threads():
+    timer = Timer.get("test_timer_threads")
+
+    def work():
+        for _ in range(1000):
+            timer.inc(2)
+
+    _run_threads(work)
+    assert timer.count == 8000
+    assert timer.clear() == 2
+    assert timer.count == 0
+    assert timer.clear() == 0
+
+    timer.inc(4)
+    assert timer.clear() == 4
+
+
+def test_histogram_percentile():
+    histogram = Histogram()
+    values = list(range(1, 100001))
+    random.shuffle(values)
+    for value in values:
+        histogram.record(value * 1000)
+
+    snapshot = histogram.snapshot()
+    assert snapshot.count == 100000
+    assert snapshot.min == 1000
+    assert snapshot.max == 100000000
+    assert snapshot.mean == 50000500
+
+    for percent in (50, 90, 99, 99.9):
+        expected = percent * 1000 * 1000
+        assert expected <= snapshot.percentile(percent) <= expected * 1.04
+
+    summary = snapshot.summary()
+    assert summary["count"] == 100000
+    assert 0.99 <= summary["p99"] / 99 <= 1.04
+    assert len(snapshot.buckets) < 600
+
+
+def test_histogram_merge():
+    first, second = Histogram(), Histogram()
+    for value in range(100):
+        first.record(value)
+        second.record(value + 100)
+
+    merged = first.snapshot().merge(second.snapshot())
+    assert merged.count == 200
+    assert merged.min == 0
+    assert merged.max == 199
+    assert merged.percentile(50) <= 100
+
+    assert HistogramSnapshot().merge(first.snapshot()).count == 100
+    assert merged.since(first.snapshot()).count == 100
+
+
+def test_timer_histogram():
+    timer = Timer.get("test_timer_histogram")
+    with Timer.create("test_timer_histogram"):
+        pass
+
+    for value in range(1, 101):
+        timer.inc(value)
+
+    snapshot = timer.snapshot()
+    assert snapshot.count == 101
+    assert 99 <= snapshot.summary()["p99"] <= 101
+
+    timer.clear()
+    timer.inc(7)
+    snapshot = timer.snapshot()
+    assert snapshot.count == 1
+    # 清零后的 min/max 为桶精度
+    assert 7 <= snapshot.summary()["p50"] <= 7 * 1.04
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_meter():
+    clock = _Clock()
+    meter = RateMeter(seconds=300, clock=clock)
+
+    for _ in range(120):
+        clock.now += 1
+        meter.mark(2)
+
+    assert meter.total(60) == 120
+    assert meter.rate(60) == 2
+    assert meter.total(300) == 240
+    assert meter.rates() == {"m1": 2, "m5": 0.8, "m15": 0.8}
+
+    # 空闲的时间段被清零
+    clock.now += 200
+    meter.mark(5)
+    assert meter.total(1) == 5
+    assert meter.total(60) == 5
+    assert meter.total(300) == 5 + 2 * 100
+
+    clock.now += 1000
+    assert meter.total(300) == 0
+
+
+def test_rate_meter_threads():
+    clock = _Clock()
+    meter = RateMeter(seconds=300, clock=clock)
+
+    def mark():
+        for _ in range(1000):
+            meter.mark()
+
+    # 各线程的分片在读取时合并，已经退出的线程的分片写入环形缓冲区
+    _run_threads(mark, 8)
+    assert meter.total(60) == 8000
+
+    clock.now += 1
+    meter.mark()
+    assert meter.total(60) == 8001
+    assert meter.total(1) == 1
+
+
+def test_counter_rate():
+    counter = Counter("test_counter_rate")
+    assert counter.rate_meter is None
+
+    meter = counter.enable_rate()
+    assert counter.enable_rate() is meter
+
+    counter.inc(30)
+    counter.dec(10)
+    assert counter.value == 20
+    assert meter.total(60) == 30
+    assert meter.rates()["m1"] == 0.5
+
+
+if __name__ == '__main__':
+    test_counter_threads()
+    test_register_first_use()
+    test_sequence_threads()
+    test_timer_threads()
+    test_histogram_percentile()
+    test_histogram_merge()
+    test_timer_histogram()
+    test_rate_meter()
+    test_rate_meter_threads()
+    test_counter_rate()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""tracemalloc 快照和比较"""
+
+from gcommon.utils import gmemtrace
+
+
+def allocate_blocks():
+    return [bytearray(10000) for _ in range(100)]
+
+
+def test_snapshot_diff():
+    gmemtrace.start(frames=5)
+    try:
+        gmemtrace.take_snapshot("before")
+        blocks = allocate_blocks()
+        gmemtrace.take_snapshot("after")
+
+        status = gmemtrace.status()
+        assert status["tracing"]
+        assert status["snapshots"] == ["before", "after"]
+
+        top = gmemtrace.top(gmemtrace.get_snapshot("after"), limit=5)
+        assert "test_gmemtrace.py" in top[0]["site"]
+        assert top[0]["size"] >= 1000000
+
+        diff = gmemtrace.diff(gmemtrace.get_snapshot("before"), gmemtrace.get_snapshot("after"), limit=5)
+        assert diff[0]["sizeDiff"] >= 1000000
+        assert diff[0]["countDiff"] >= 100
+
+        by_traceback = gmemtrace.diff(gmemtrace.get_snapshot("before"), limit=1, group_by="traceback")
+        assert any("test_gmemtrace.py" in site for site in by_traceback[0]["site"])
+
+        by_file = gmemtrace.top(limit=50, group_by="filename")
+        assert any(item["site"].endswith("test_gmemtrace.py") for item in by_file)
+        del blocks
+    finally:
+        gmemtrace.stop()
+
+    status = gmemtrace.status()
+    assert not status["tracing"]
+    assert status["snapshots"] == []
+
+
+def test_snapshot_limit():
+    gmemtrace.start()
+    try:
+        for i in range(gmemtrace.MAX_SNAPSHOTS + 2):
+            gmemtrace.take_snapshot("s%s" % i)
+
+        snapshots = gmemtrace.status()["snapshots"]
+        assert len(snapshots) == gmemtrace.MAX_SNAPSHOTS
+        assert snapshots[0] == "s2"
+    finally:
+        gmemtrace.stop()
+
+
+if __name__ == '__main__':
+    test_snapshot_diff()
+    test_snapshot_limit()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""Prometheus 格式导出"""
+
+from gcommon.utils import gmetrics
+from gcommon.utils.gcounter import Counter, Gauge, Timer
+
+
+def _find(content, prefix):
+    return [line for line in content.splitlines() if line.startswith(prefix)]
+
+
+def test_render():
+    Counter("test.metrics-requests").inc(3)
+    with Gauge.create("test_metrics_active"):
+        pass
+
+    timer = Timer.get("test_metrics_login")
+    for ms in range(1, 101):
+        timer.inc(ms)
+
+    content = gmetrics.render({"service": "demo", "instance": 'host.demo "01"'})
+
+    assert "# TYPE test_metrics_requests counter" in content
+    assert _find(content, "test_metrics_requests{")[0] == \
+        'test_metrics_requests{service="demo",instance="host.demo \\"01\\""} 3'
+
+    assert "# TYPE test_metrics_active gauge" in content
+    assert _find(content, "test_metrics_active{")[0].endswith(" 0")
+
+    assert "# TYPE test_metrics_login_seconds summary" in content
+    p99 = _find(content, 'test_metrics_login_seconds{service="demo",instance="host.demo \\"01\\"",quantile="0.99"}')
+    assert 0.099 <= float(p99[0].split()[-1]) <= 0.102
+    assert _find(content, "test_metrics_login_seconds_count{")[0].endswith(" 100")
+    assert float(_find(content, "test_metrics_login_seconds_sum{")[0].split()[-1]) == 5.05
+
+    assert "test_metrics_requests 3" in gmetrics.render()
+
+
+def test_metrics_cache():
+    counter = Counter("test_metrics_cache")
+    cache = gmetrics.MetricsCache(ttl=60)
+
+    content = cache.get()
+    counter.inc()
+    assert cache.get() is content
+
+    cache.clear()
+    assert b"test_metrics_cache 1" in cache.get()
+
+
+if __name__ == '__main__':
+    test_render()
+    test_metrics_cache()
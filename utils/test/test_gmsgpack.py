@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+import datetime
+import enum
+
+import pytest
+
+msgpack = pytest.importorskip("msgpack")
+
+from gcommon.utils import gmsgpack
+from gcommon.utils.gjsonobj import JsonObject, JSONable, JsonField
+
+
+@gmsgpack.register_enum
+class TaskStatus(enum.Enum):
+    running = "running"
+    stopped = "stopped"
+
+
+class Task(JSONable):
+    task_id = JsonField()
+    status = JsonField()
+    started = JsonField()
+
+
+def test_json_object_msgpack():
+    data = JsonObject({"robot": {"id": "r1", "battery": 87}, "points": [{"x": 1.5, "y": -2}]})
+    data.created = datetime.datetime(2021, 8, 4, 12, 0, 0)
+    data.day = datetime.date(2021, 8, 4)
+    data.status = TaskStatus.running
+
+    content = data.dumpb_msgpack()
+    assert type(content) == bytes
+
+    result = JsonObject.loads_msgpack(content)
+    assert result.robot.battery == 87
+    assert result.points[0].x == 1.5
+    assert result.created == data.created
+    assert result.day == data.day
+    assert result.status is TaskStatus.running
+
+    result = JsonObject.loads_msgpack(memoryview(content), lazy=True)
+    assert result.robot.id == "r1"
+
+
+def test_jsonable_msgpack():
+    task = Task.create(taskId="t1", status=TaskStatus.stopped, started=datetime.datetime(2021, 8, 4))
+
+    loaded = Task.load_msgpack(task.to_msgpack())
+    assert loaded.task_id == "t1"
+    assert loaded.status is TaskStatus.stopped
+    assert loaded.started == datetime.datetime(2021, 8, 4)
+
+
+if __name__ == '__main__':
+    test_json_object_msgpack()
+    test_jsonable_msgpack()
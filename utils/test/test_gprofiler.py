@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""采样分析器"""
+
+import threading
+import time
+
+import pytest
+
+from gcommon.utils.gprofiler import StackSampler, ProfilerBusyError
+
+
+def busy_worker(stopped):
+    while not stopped.is_set():
+        sum(range(1000))
+
+
+def test_sampler():
+    stopped = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stopped,), name="busy worker")
+    worker.start()
+
+    try:
+        sampler = StackSampler(rate=200)
+        content = sampler.run(0.2)
+    finally:
+        stopped.set()
+        worker.join()
+
+    assert sampler.samples > 10
+
+    lines = content.splitlines()
+    worker_lines = [line for line in lines if line.startswith("busy_worker;")]
+    assert worker_lines
+    assert "busy_worker (test_gprofiler.py:" in worker_lines[0]
+
+    # 每行以采样次数结尾，不包含采样线程自身
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in worker_lines) >= sampler.samples - 1
+    assert "_sample (" not in content
+
+
+def test_sampler_busy():
+    sampler = StackSampler()
+    thread = threading.Thread(target=sampler.run, args=(0.2,))
+    thread.start()
+    time.sleep(0.05)
+
+    try:
+        assert StackSampler.is_running()
+        with pytest.raises(ProfilerBusyError):
+            StackSampler().run(0.1)
+    finally:
+        thread.join()
+
+    assert not StackSampler.is_running()
+
+
+if __name__ == '__main__':
+    test_sampler()
+    test_sampler_busy()
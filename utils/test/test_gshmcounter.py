@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""多进程共享内存计数器"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+from gcommon.utils import gshmcounter
+from gcommon.utils.gcounter import Counter, Gauge, Timer
+from gcommon.utils.gshmcounter import SharedMetrics, KIND_COUNTER, KIND_GAUGE, KIND_TIMER_COUNT
+
+
+def _temp_path():
+    return os.path.join(tempfile.mkdtemp(), "test.metrics")
+
+
+def _worker(path, key, count, ready, done):
+    Counter.get("test_shm_requests").inc(count)
+    Timer.get("test_shm_login").inc(5)
+
+    shared_metrics = SharedMetrics(path)
+    shared_metrics.attach(key)
+    shared_metrics.publish()
+
+    ready.set()
+    done.wait(10)
+    shared_metrics.close()
+
+
+def test_aggregate():
+    path = _temp_path()
+    context = multiprocessing.get_context("fork")
+    done = context.Event()
+
+    workers = []
+    for i in range(3):
+        ready = context.Event()
+        worker = context.Process(target=_worker, args=(path, "demo.%02d" % i, i + 1, ready, done))
+        worker.start()
+        assert ready.wait(10)
+        workers.append(worker)
+
+    reader = SharedMetrics(path)
+    try:
+        assert len(reader.processes()) == 3
+
+        values = reader.aggregate()
+        assert values["test_shm_requests"] == (KIND_COUNTER, 6)
+        assert values["test_shm_login:count"] == (KIND_TIMER_COUNT, 3)
+        assert "test_shm_login_seconds_sum 0.015" in reader.render()
+    finally:
+        done.set()
+        for worker in workers:
+            worker.join()
+
+    # 进程退出后不再计入
+    assert reader.processes() == {}
+    assert reader.aggregate()["test_shm_requests"] == (KIND_COUNTER, 0)
+    reader.close()
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_stale_slot():
+    path = _temp_path()
+
+    # 模拟一个已经退出、没有释放进程槽的进程
+    stale = SharedMetrics(path, max_processes=2)
+    stale_slot = stale.attach("stale")
+
+    Counter.get("test_shm_stale").inc(3)
+    with Gauge.create("test_shm_gauge"):
+        stale.publish()
+
+    gshmcounter._PROCESS.pack_into(stale._mmap, stale._process_offset, _dead_pid(), 0, b"stale")
+    stale.slot = -1
+
+    shared_metrics = SharedMetrics(path)
+    assert shared_metrics.max_processes == 2
+    assert shared_metrics.aggregate()["test_shm_stale"] == (KIND_COUNTER, 0)
+
+    # 清理并复用已经退出的进程的槽
+    assert shared_metrics.attach("demo.00") == stale_slot
+    assert shared_metrics.aggregate()["test_shm_stale"] == (KIND_COUNTER, 0)
+
+    shared_metrics.publish()
+    assert shared_metrics.aggregate()["test_shm_stale"] == (KIND_COUNTER, 3)
+    assert shared_metrics.aggregate()["test_shm_gauge"] == (KIND_GAUGE, 0)
+    assert shared_metrics.processes() == {stale_slot: (os.getpid(), "demo.00")}
+
+    # 进程重启（原来的 pid 已经退出）后回收旧槽
+    gshmcounter._PROCESS.pack_into(shared_metrics._mmap, shared_metrics._process_offset, _dead_pid(), 0, b"demo.00")
+    shared_metrics.slot = -1
+
+    restarted = SharedMetrics(path)
+    assert restarted.attach("demo.00") == stale_slot
+    assert len(restarted.processes()) == 1
+
+    # pid 被其他进程复用（启动时间不同）
+    gshmcounter._PROCESS.pack_into(restarted._mmap, restarted._process_offset, os.getpid(), 1, b"demo.00")
+    assert restarted.processes() == {}
+
+    restarted.close()
+    shared_metrics.close()
+    stale.close()
+
+
+def _same_key_worker(path, ready, done):
+    shared_metrics = SharedMetrics(path)
+    shared_metrics.attach("demo")
+    ready.set()
+    done.wait(10)
+    shared_metrics.close()
+
+
+def test_same_key():
+    """同一 key 的多个存活进程（例如 fork 出的 worker）各自占用一个槽"""
+    path = _temp_path()
+    context = multiprocessing.get_context("fork")
+    ready, done = context.Event(), context.Event()
+
+    worker = context.Process(target=_same_key_worker, args=(path, ready, done))
+    worker.start()
+    assert ready.wait(10)
+
+    shared_metrics = SharedMetrics(path)
+    try:
+        slot = shared_metrics.attach("demo")
+        assert sorted(pid for pid, _key in shared_metrics.processes().values()) == sorted([worker.pid, os.getpid()])
+        assert shared_metrics.processes()[slot] == (os.getpid(), "demo")
+    finally:
+        done.set()
+        worker.join()
+        shared_metrics.close()
+
+
+def _fork_worker(queue):
+    shared_metrics = gshmcounter.get_shared_metrics()
+    queue.put((shared_metrics.slot, shared_metrics.key, shared_metrics._publish_thread is not None))
+
+
+def test_fork():
+    path = _temp_path()
+    parent = gshmcounter.enable_shared_metrics(path, interval=0.1)
+    try:
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        worker = context.Process(target=_fork_worker, args=(queue,))
+        worker.start()
+
+        slot, key, publishing = queue.get(timeout=10)
+        worker.join()
+
+        assert slot >= 0 and slot != parent.slot
+        assert key == str(worker.pid)
+        assert publishing
+
+        # 子进程退出时只释放自己的槽
+        assert parent.processes() == {parent.slot: (os.getpid(), str(os.getpid()))}
+    finally:
+        gshmcounter._shared_metrics = None
+        parent.close()
+
+
+def _fork_publish_worker(queue, done):
+    shared_metrics = gshmcounter.get_shared_metrics()
+    Counter.get("test_shm_fork_requests").inc(2)
+    shared_metrics.publish()
+
+    queue.put(shared_metrics.slot)
+    done.wait(10)
+
+
+def test_fork_aggregate():
+    path = _temp_path()
+    counter = Counter.get("test_shm_fork_requests")
+    counter.inc(5)
+
+    parent = gshmcounter.enable_shared_metrics(path, interval=60)
+    try:
+        context = multiprocessing.get_context("fork")
+        queue, done = context.Queue(), context.Event()
+        worker = context.Process(target=_fork_publish_worker, args=(queue, done))
+        worker.start()
+
+        try:
+            slot = queue.get(timeout=10)
+            parent.publish()
+
+            # 子进程继承的 5 不重复计入，只计入 fork 之后增加的 2
+            assert slot != parent.slot
+            assert parent.aggregate()["test_shm_fork_requests"] == (KIND_COUNTER, counter.value + 2)
+        finally:
+            done.set()
+            worker.join()
+    finally:
+        gshmcounter._shared_metrics = None
+        parent.close()
+
+
+if __name__ == '__main__':
+    test_aggregate()
+    test_stale_slot()
+    test_same_key()
+    test_fork()
+    test_fork_aggregate()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""调用链跟踪"""
+
+import asyncio
+import json
+
+from gcommon.utils import gtrace
+
+
+def test_disabled():
+    gtrace.disable()
+    with gtrace.span("noop") as span:
+        assert span is None
+        assert gtrace.current_traceparent() is None
+        assert gtrace.kafka_headers() is None
+        assert gtrace.inject({}) == {}
+
+    assert gtrace.start_span("noop") is None
+    assert gtrace.export() == []
+
+
+def test_nested_spans():
+    gtrace.enable()
+    gtrace.clear()
+    try:
+        with gtrace.span("outer", gtrace.KIND_SERVER, user="u1") as outer:
+            with gtrace.span("inner") as inner:
+                assert gtrace.current_span() is inner
+                message = gtrace.inject({"cmd": "push"})
+
+            assert gtrace.current_span() is outer
+
+        assert gtrace.current_span() is None
+        assert inner.trace_id == outer.trace_id
+        assert inner.parent_id == outer.span_id
+        assert message["traceparent"] == inner.traceparent
+
+        spans = gtrace.export()
+        assert [span["name"] for span in spans] == ["inner", "outer"]
+        assert spans[1]["attributes"] == {"user": "u1"}
+        assert spans[1]["durationMs"] >= spans[0]["durationMs"]
+        assert json.loads(gtrace.export_json(trace_id=outer.trace_id)) == spans
+
+        try:
+            with gtrace.span("failed"):
+                raise ValueError("bad")
+        except ValueError:
+            pass
+
+        assert "ValueError" in gtrace.export(clear=True)[-1]["error"]
+        assert gtrace.export() == []
+    finally:
+        gtrace.disable()
+
+
+def test_propagation():
+    gtrace.enable()
+    try:
+        with gtrace.span("producer") as producer:
+            headers = gtrace.kafka_headers()
+            content = json.dumps(gtrace.inject({"data": 1})).encode("utf-8")
+
+        # 从 kafka 消息头、json 消息中恢复上游的 span
+        for parent in (gtrace.extract_from_kafka_headers(headers), gtrace.extract_from_json(content),
+                       producer.traceparent):
+            span = gtrace.start_span("consumer", gtrace.KIND_CONSUMER, parent)
+            assert (span.trace_id, span.parent_id) == (producer.trace_id, producer.span_id)
+
+        assert gtrace.extract_from_json(b'{"data": 1}') is None
+        assert gtrace.parse_traceparent("bad") is None
+        assert gtrace.start_span("root", parent="bad").parent_id is None
+    finally:
+        gtrace.disable()
+
+
+def test_async_tasks():
+    gtrace.enable()
+
+    async def child():
+        await asyncio.sleep(0)
+        with gtrace.span("child") as span:
+            return span
+
+    async def main():
+        with gtrace.span("parent") as parent:
+            spans = await asyncio.gather(child(), child())
+        return parent, spans
+
+    try:
+        parent, spans = asyncio.run(main())
+        assert all(span.parent_id == parent.span_id for span in spans)
+    finally:
+        gtrace.disable()
+
+
+if __name__ == '__main__':
+    test_disabled()
+    test_nested_spans()
+    test_propagation()
+    test_async_tasks()
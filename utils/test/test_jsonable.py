@@ -48,5 +48,58 @@ def test_person():
     assert new_person.name == person.name
 
 
+def test_to_json_many():
+    jobs = [MyJob.load_dict({"title": "worker-%s" % i, "level": i, "company": "ms"}) for i in range(1, 4)]
+
+    result = MyJob.to_json_many(jobs)
+    assert [item.level for item in result] == [1, 2, 3]
+    assert result[0] == jobs[0].to_json()
+
+
+def test_reset_json_codec():
+    class Demo(JSONable):
+        user_name = JsonField()
+
+    demo = Demo.load_dict({"userName": "guli"})
+    assert demo.to_json() == {"userName": "guli"}
+
+    Demo.nick_name = JsonField()
+    Demo.reset_json_codec()
+
+    demo = Demo.load_dict({"userName": "guli", "nickName": "gl"})
+    assert demo.to_json() == {"nickName": "gl", "userName": "guli"}
+
+
+@json_record
+class JobRecord(JSONable):
+    title = JsonField()
+    level = JsonField(default_value=1)
+    company_name = JsonField()
+    memo = JsonField(allow_blank=True)
+
+
+def test_json_record():
+    job = JobRecord.load_dict({"title": "engineer", "companyName": "ms"})
+    assert not hasattr(job, "__dict__")
+
+    assert job.title == "engineer"
+    assert job.to_json() == {"title": "engineer", "level": 1, "companyName": "ms"}
+
+    job.level = 6
+    assert JobRecord.load_dict(job.to_json()).level == 6
+
+    try:
+        job.salary = 100
+        assert False
+    except AttributeError:
+        pass
+
+    person = Person.load_dict({"name": "guli", "jobHistory": [job.to_json()]})
+    assert person.to_json()["jobHistory"][0]["title"] == "engineer"
+
+
 if __name__ == '__main__':
     test_person()
+    test_to_json_many()
+    test_reset_json_codec()
+    test_json_record()
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+# created: 2026-10-17
+# creator: liguopeng@liguopeng.net
+
+"""JsonObject 及其变体"""
+
+import asyncio
+import copy
+import datetime
+import io
+import json
+import pickle
+
+import pytest
+
+from gcommon.utils import gjsonobj
+from gcommon.utils.gjsonobj import JsonObject, LazyJsonObject, FrozenJsonObject, JsonTable
+
+
+def _demo_data():
+    return {
+        "name": "user123",
+        "props": {"sex": "male", "address": {"city": "beijing"}},
+        "jobs": [{"title": "engineer"}, {"title": "designer"}, 3],
+    }
+
+
+def test_lazy_json_object():
+    data = _demo_data()
+    lazy = LazyJsonObject(data)
+
+    # 未访问前，嵌套对象保持原样
+    assert type(dict.get(lazy, "props")) == dict
+
+    assert lazy.name == "user123"
+    assert lazy.props.sex == "male"
+    assert lazy.props.address.city == "beijing"
+    assert type(dict.get(lazy, "props")) == LazyJsonObject
+
+    # 转换结果被缓存
+    assert lazy.props is lazy["props"]
+
+    assert lazy.jobs[0].title == "engineer"
+    assert lazy["jobs"][1].title == "designer"
+    assert lazy.jobs[2] == 3
+    assert lazy.email is None
+
+    assert lazy == JsonObject(_demo_data())
+    assert JsonObject.loads(JsonObject(_demo_data()).dumps(), lazy=True) == lazy
+
+
+def test_lazy_json_object_items():
+    lazy = LazyJsonObject(_demo_data())
+    for key, value in lazy.items():
+        if key == "props":
+            assert isinstance(value, JsonObject)
+            assert value.address.city == "beijing"
+
+    lazy.props.age = 26
+    assert lazy.props.age == 26
+
+    lazy.extra = {"a": 1}
+    assert lazy.extra.a == 1
+
+    assert isinstance(lazy.pop("props"), JsonObject)
+    assert lazy.props is None
+
+
+def test_lazy_json_object_copy():
+    lazy = LazyJsonObject(_demo_data())
+
+    # 与 JsonObject 相同，复制后嵌套对象仍然可以按属性访问
+    assert lazy.copy()["props"].sex == "male"
+    assert dict(lazy)["props"].address.city == "beijing"
+    assert {**lazy}["jobs"][0].title == "engineer"
+    assert (lazy | {"x": 1})["props"].sex == "male"
+    assert ({"x": 1} | lazy)["props"].sex == "male"
+
+    lazy = LazyJsonObject(_demo_data())
+    cloned = copy.deepcopy(lazy)
+    assert type(cloned) == LazyJsonObject
+    assert cloned.props.address.city == "beijing"
+    assert pickle.loads(pickle.dumps(lazy)) == lazy
+
+
+def test_json_backends():
+    data = JsonObject(_demo_data())
+    data.title = "工程师"
+    data.created = "2021-08-04"
+
+    old_backend = gjsonobj.get_json_backend()
+    try:
+        for backend in gjsonobj.get_json_backends():
+            gjsonobj.set_json_backend(backend)
+
+            content = data.dumpb()
+            assert type(content) == bytes
+            assert "工程师".encode("utf-8") in content
+
+            assert JsonObject.loads(content).jobs[0].title == "engineer"
+            assert JsonObject.loads(memoryview(content)).created == "2021-08-04"
+            assert gjsonobj.loads(bytearray(content))["title"] == "工程师"
+
+            assert data.dumps().isascii()
+            assert JsonObject.loads(data.dumps()) == JsonObject.loads(content)
+
+            # 与 json.dumps 相同，日期等类型需要通过 default 转换
+            created = JsonObject({"created": datetime.date(2021, 8, 4)})
+            with pytest.raises(TypeError):
+                created.dumps()
+            with pytest.raises(TypeError):
+                created.dumpb()
+            assert gjsonobj.dumpb(created, default=str) == b'{"created":"2021-08-04"}'
+
+            if backend != "ujson":
+                assert gjsonobj.loads(gjsonobj.dumpb({"id": 2 ** 70}))["id"] == 2 ** 70
+    finally:
+        gjsonobj.set_json_backend(old_backend)
+
+
+def _records(count):
+    return [{"seq": i, "name": "记录-%s" % i, "value": i * 1.5, "tags": ["a", "b"]} for i in range(count)]
+
+
+def test_iter_loads_array():
+    records = _records(100)
+    content = json.dumps(records, ensure_ascii=False, indent=2).encode("utf-8")
+
+    # 很小的块，保证数字、多字节字符都会被截断
+    items = list(JsonObject.iter_loads(io.BytesIO(content), chunk_size=7))
+    assert items == records
+    assert type(items[0]) == JsonObject
+
+    numbers = list(JsonObject.iter_loads(io.StringIO("[1, 22, 333, 4444]"), chunk_size=2))
+    assert numbers == [1, 22, 333, 4444]
+
+    assert list(JsonObject.iter_loads(io.StringIO("[]"))) == []
+
+
+def test_iter_loads_ndjson():
+    records = _records(50)
+    content = "\n".join(json.dumps(record) for record in records) + "\n"
+
+    items = list(JsonObject.iter_loads(io.StringIO(content), chunk_size=5, lazy=True, ndjson=True))
+    assert items == records
+    assert type(items[0]) == LazyJsonObject
+
+    # 每行是一个数组
+    assert list(JsonObject.iter_loads([b'[1,2]\n[3,4]\n'], ndjson=True)) == [[1, 2], [3, 4]]
+
+
+def test_iter_loads_error():
+    with pytest.raises(json.JSONDecodeError):
+        list(JsonObject.iter_loads(io.StringIO('[{"a": 1}, {"b": ')))
+
+    with pytest.raises(json.JSONDecodeError):
+        list(JsonObject.iter_loads(io.StringIO('[{"a": 1}')))
+
+    # 数组元素之间需要逗号，数组之后只能有空白
+    for content in ['[1 2 3]', '[1, 2, 3] trailing', '[1, 2,]', '[1,, 2]', '[,1]', '{"a": 1}',
+                    '[1,2]\n[3,4]\n']:
+        with pytest.raises(json.JSONDecodeError):
+            list(JsonObject.iter_loads([content]))
+
+        # 分成小块也一样
+        with pytest.raises(json.JSONDecodeError):
+            list(JsonObject.iter_loads(io.StringIO(content), chunk_size=1))
+
+    assert list(JsonObject.iter_loads(io.StringIO(" [ 1 , 2 ] \n"), chunk_size=1)) == [1, 2]
+
+
+def test_aiter_loads():
+    records = _records(20)
+    content = json.dumps(records).encode("utf-8")
+
+    async def chunks():
+        for i in range(0, len(content), 11):
+            yield content[i:i + 11]
+
+    async def load():
+        return [item async for item in JsonObject.aiter_loads(chunks())]
+
+    assert asyncio.run(load()) == records
+
+
+def test_frozen_json_object():
+    frozen = JsonObject(_demo_data()).freeze()
+    assert type(frozen) == FrozenJsonObject
+    assert frozen.props.address.city == "beijing"
+    assert frozen.jobs[0].title == "engineer"
+
+    for mutate in (lambda: setattr(frozen, "name", "x"),
+                   lambda: frozen.__setitem__("name", "x"),
+                   lambda: frozen.props.update({"sex": "female"}),
+                   lambda: frozen.pop("name"),
+                   lambda: frozen.jobs.append({})):
+        with pytest.raises((TypeError, AttributeError)):
+            mutate()
+
+    # 序列化结果被缓存
+    assert frozen.dumpb() is frozen.dumpb()
+    assert json.loads(frozen.dumpb()) == _demo_data()
+
+    # 内容相同则 hash 相同，可以作为 dict key
+    other = FrozenJsonObject(_demo_data())
+    assert frozen == other
+    assert hash(frozen) == hash(other)
+    assert frozen.content_hash == other.content_hash
+    assert {frozen: 1}[other] == 1
+
+    # 相等的对象 hash 相同
+    assert FrozenJsonObject({"a": 1, "b": [1]}) == FrozenJsonObject({"a": 1.0, "b": [True]})
+    assert hash(FrozenJsonObject({"a": 1, "b": [1]})) == hash(FrozenJsonObject({"a": 1.0, "b": [True]}))
+
+    # 原地修改同样被禁止，缓存的 hash 和序列化结果保持不变
+    content, frozen_hash = frozen.dumpb(), hash(frozen)
+    with pytest.raises(TypeError):
+        frozen |= {"name": "x"}
+    assert frozen.name == "user123"
+    assert frozen.dumpb() is content and hash(frozen) == frozen_hash
+
+    # 按内容与原来的 dict 比较（list 转换成了 tuple）
+    source = JsonObject(_demo_data())
+    assert source.freeze() == source and source == source.freeze()
+    assert frozen == _demo_data() and _demo_data() == frozen
+    assert not (frozen != source)
+    assert frozen != dict(source, name="x")
+    assert frozen.jobs != source.jobs
+
+    mutable = JsonObject(frozen)
+    mutable.name = "x"
+    assert mutable.props.sex == "male"
+
+
+def test_dump_message():
+    data = FrozenJsonObject({"robot": "r1", "value": "工程师"})
+
+    message = JsonObject()
+    message.cmd = "push"
+    message.data = data
+    assert type(message.data) == FrozenJsonObject
+
+    assert json.loads(gjsonobj.dumpb_message(message)) == {"cmd": "push", "data": dict(data)}
+    assert json.loads(gjsonobj.dumps_message(message)) == {"cmd": "push", "data": dict(data)}
+    assert gjsonobj.dumpb_message(data) is data.dumpb()
+    assert json.loads(gjsonobj.dumps_message({"data": data})) == {"data": dict(data)}
+
+    # 非字符串的 key 与 json.dumps 相同
+    message = {1: data, None: data, "x": 1}
+    assert json.loads(gjsonobj.dumps_message(message)) == {"1": dict(data), "null": dict(data), "x": 1}
+    assert json.loads(gjsonobj.dumpb_message(message)) == {"1": dict(data), "null": dict(data), "x": 1}
+
+
+def test_json_table():
+    rows = [(i, "user-%s" % i, i * 0.5, None if i % 2 else "vip") for i in range(10)]
+    table = JsonTable.from_rows(rows, columns=["id", "name", "score", "level"])
+
+    assert len(table) == 10
+    assert table.to_rows()[3] == {"id": 3, "name": "user-3", "score": 1.5, "level": None}
+    assert json.loads(table.dumpb()) == table.to_rows()
+
+    table.append((10, "user-10", 7, "vip"))
+    assert table.to_rows()[10]["score"] == 7
+    assert type(table.to_rows()[10]["score"]) == int
+
+    columnar = JsonTable.from_dicts(table.to_rows(), columnar=True).to_json()
+    assert columnar["columns"] == ["id", "name", "score", "level"]
+    assert columnar["values"][0] == list(range(11))
+
+    # 作为 json 的值直接序列化
+    message = JsonObject({"code": 0})
+    message.data = table
+    assert JsonObject.loads(message.dumpb()).data[1].name == "user-1"
+
+
+def test_json_table_row_length():
+    table = JsonTable.from_rows([(1, "x"), (2, "y")], columns=["id", "name"])
+
+    for row in [(3,), (3, "z", None)]:
+        with pytest.raises(ValueError):
+            table.append(row)
+
+        with pytest.raises(ValueError):
+            table.extend([(3, "z"), row])
+
+    # 出错时不添加任何行，各列保持对齐
+    assert table.to_rows() == [{"id": 1, "name": "x"}, {"id": 2, "name": "y"}]
+    assert table.to_columnar()["values"] == [[1, 2], ["x", "y"]]
+
+    with pytest.raises(ValueError):
+        JsonTable.from_rows([(1, "x"), (2,)], columns=["id", "name"])
+
+
+def test_json_table_from_mappings():
+    rows = [{"id": 1, "n": "x"}, {"id": 2, "n": "y"}]
+    assert JsonTable.from_rows(rows).to_rows() == rows
+    assert JsonTable.from_rows(iter(rows), columns=["n"]).to_rows() == [{"n": "x"}, {"n": "y"}]
+
+    class MappingResult(object):
+        """类似 SQLAlchemy 的 result.mappings()"""
+
+        def keys(self):
+            return ["id", "n"]
+
+        def __iter__(self):
+            return iter(rows)
+
+    assert JsonTable.from_rows(MappingResult()).to_rows() == rows
+    assert JsonTable.from_rows([]).to_rows() == []
+
+
+def test_json_table_from_jsonables():
+    from gcommon.utils.gjsonobj import JSONable, JsonField
+
+    class User(JSONable):
+        user_id = JsonField()
+        user_name = JsonField()
+
+    users = [User.create(userId=i, userName="u%s" % i) for i in range(1, 4)]
+    table = JsonTable.from_jsonables(users)
+
+    assert table.columns == ["userId", "userName"]
+    assert table.to_rows() == User.to_json_many(users)
+
+
+if __name__ == '__main__':
+    test_lazy_json_object()
+    test_lazy_json_object_items()
+    test_lazy_json_object_copy()
+    test_json_backends()
+    test_iter_loads_array()
+    test_iter_loads_ndjson()
+    test_iter_loads_error()
+    test_aiter_loads()
+    test_frozen_json_object()
+    test_dump_message()
+    test_json_table()
+    test_json_table_row_length()
+    test_json_table_from_mappings()
+    test_json_table_from_jsonables()
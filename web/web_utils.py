@@ -29,6 +29,7 @@ class WebConst(object):
     MAX_PAGE_SIZE = 200
 
     MIME_TYPE_JSON = 'application/json'
+    MIME_TYPE_NDJSON = 'application/x-ndjson'
 
     GET = [REQUEST_METHOD_GET]
     POST = [REQUEST_METHOD_POST]
@@ -36,6 +37,9 @@ class WebConst(object):
     DELETE = [REQUEST_METHOD_DELETE]
 
     GCOMMON_DETAIL_RESPONSE_LOG = "_gcommon_detail_response_log"
+    GCOMMON_STREAMING_RESPONSE = "_gcommon_streaming_response"
+    GCOMMON_TRACE_SPAN = "_gcommon_trace_span"
+    GCOMMON_REQUEST_START_TIME = "_gcommon_request_start_time"
 
 
 def set_options_methods(request, post=False, get=False, put=False, delete=False, allowed_methods=None):